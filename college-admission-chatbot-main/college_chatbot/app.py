@@ -1,4 +1,5 @@
 import streamlit as st
+import asyncio
 import json
 from datetime import datetime
 import os
@@ -13,11 +14,17 @@ try:
     from chatbot.llm_handler import LLMHandler
     from chatbot.knowledge_base import KnowledgeBase  
     from chatbot.response_handler import ResponseHandler
+    from chatbot.tenants import TenantManager
+    from chatbot.pipeline import ResponsePipeline
+    from chatbot.context_assembler import get_context_assembler
     from config import Config
 except ImportError:
     # Fallback if modules are in different structure
     try:
         from chatbot import LLMHandler, KnowledgeBase, ResponseHandler
+        from chatbot.tenants import TenantManager
+        from chatbot.pipeline import ResponsePipeline
+        from chatbot.context_assembler import get_context_assembler
         from config import Config
     except ImportError:
         st.error("Required modules not found. Please check your project structure.")
@@ -75,8 +82,50 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Initialize session state
+# Heavy components are loaded once per process and shared by all sessions;
+# they only read shared state while answering, so concurrent sessions are safe
+@st.cache_resource(show_spinner="Loading AI models... This may take a moment on first run.")
+def load_shared_components():
+    """Load the LLM handler, knowledge base and response handler once per process"""
+    llm_handler = LLMHandler()
+    knowledge_base = KnowledgeBase()
+    knowledge_base.start_watching()
+    # Keyword search answers until the embedding model has loaded
+    knowledge_base.load_model_in_background()
+    response_handler = ResponseHandler()
+    return llm_handler, knowledge_base, response_handler
+
+@st.cache_resource(show_spinner="Loading tokenizer...")
+def load_pipeline():
+    """Deadline-bound answering pipeline shared by all sessions"""
+    llm_handler, _, response_handler = load_shared_components()
+    # Prompts count tokens with Config.TOKENIZER_NAME; loaded here so no request waits for the download
+    get_context_assembler().load_token_counter()
+    return ResponsePipeline(llm_handler, response_handler, create_enhanced_prompt)
+
+@st.cache_resource(show_spinner=False)
+def load_tenant_manager():
+    """Knowledge bases of all hosted colleges, loaded on demand"""
+    return TenantManager(Config.TENANTS_DIR)
+
+def get_knowledge_base(show_errors: bool = False):
+    """Get the knowledge base of the college selected by the URL, or the default one"""
+    if Config.TENANTS_DIR is not None:
+        tenant_id = st.query_params.get("college")
+        if tenant_id:
+            try:
+                return load_tenant_manager().get(tenant_id)
+            except KeyError:
+                # An unknown ?college= falls back to the default college
+                if show_errors:
+                    st.error(f"Unknown college '{tenant_id}'. Showing the default college instead.")
+    return load_shared_components()[1]
+
+# Initialize session state (per-session state is only the conversation)
 def initialize_session_state():
+    # Also loads the shared components and the prompt tokenizer before the first question
+    load_pipeline()
+    
     if 'messages' not in st.session_state:
         st.session_state.messages = []
         st.session_state.messages.append({
@@ -84,17 +133,6 @@ def initialize_session_state():
             "content": "Hello! 👋 I'm your College Admission Assistant. I can help you with admission requirements, deadlines, programs, fees, and more. What would you like to know?"
         })
     
-    if 'llm_handler' not in st.session_state:
-        with st.spinner("Loading AI models... This may take a moment on first run."):
-            st.session_state.llm_handler = LLMHandler()
-    
-    if 'knowledge_base' not in st.session_state:
-        with st.spinner("Loading knowledge base..."):
-            st.session_state.knowledge_base = KnowledgeBase()
-    
-    if 'response_handler' not in st.session_state:
-        st.session_state.response_handler = ResponseHandler()
-    
     if 'show_faq' not in st.session_state:
         st.session_state.show_faq = False
 
@@ -142,19 +180,18 @@ def display_sidebar():
         st.markdown('</div>', unsafe_allow_html=True)
         
         # Knowledge base statistics
-        if hasattr(st.session_state, 'knowledge_base'):
-            st.markdown('<div class="sidebar-info">', unsafe_allow_html=True)
-            st.header("📊 Knowledge Base Stats")
-            stats = st.session_state.knowledge_base.get_statistics()
-            
-            col1, col2 = st.columns(2)
-            with col1:
-                st.metric("Total Entries", stats['total_entries'])
-                st.metric("FAQs", stats['faqs'])
-            with col2:
-                st.metric("Programs", stats['programs'])
-                st.metric("Categories", stats['categories'])
-            st.markdown('</div>', unsafe_allow_html=True)
+        st.markdown('<div class="sidebar-info">', unsafe_allow_html=True)
+        st.header("📊 Knowledge Base Stats")
+        stats = get_knowledge_base(show_errors=True).get_statistics()
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Total Entries", stats['total_entries'])
+            st.metric("FAQs", stats['faqs'])
+        with col2:
+            st.metric("Programs", stats['programs'])
+            st.metric("Categories", stats['categories'])
+        st.markdown('</div>', unsafe_allow_html=True)
         
         # Quick questions
         st.markdown('<div class="sidebar-info">', unsafe_allow_html=True)
@@ -195,65 +232,31 @@ def display_sidebar():
         
         st.markdown('</div>', unsafe_allow_html=True)
 
-def generate_response(user_message):
-    """Generate response using the improved pipeline"""
+def stream_response(user_message):
+    """Generate the response as a stream of markdown chunks"""
     try:
-        # Detect intent
-        intent = st.session_state.response_handler.detect_intent(user_message)
-        
-        # Search for relevant information
-        relevant_info = st.session_state.knowledge_base.search_similar(user_message, top_k=3)
-        
-        # Handle specific intents with direct responses
-        if intent in ['admission_requirements', 'deadlines', 'programs', 'contact', 'fees']:
-            # Try to get a quick response first
-            quick_response = st.session_state.llm_handler.get_quick_response(intent)
-            if quick_response:
-                return st.session_state.response_handler.format_response(quick_response, intent, relevant_info)
-        
-        # Generate response using LLM
+        knowledge_base = get_knowledge_base()
         conversation_history = st.session_state.messages[-6:]  # Last 6 messages for context
         
-        # Create a more specific prompt based on intent and relevant info
-        enhanced_prompt = create_enhanced_prompt(user_message, intent, relevant_info)
+        # Intent, retrieval and generation share Config.RESPONSE_DEADLINE; a stage that would
+        # overrun it is skipped and the answer degrades to the quick response or template
+        pipeline = load_pipeline()
+        result = asyncio.run(pipeline.prepare(user_message, knowledge_base))
         
-        response = st.session_state.llm_handler.get_response(
-            enhanced_prompt, 
-            conversation_history, 
-            relevant_info
-        )
-        
-        # Format and enhance the response
-        formatted_response = st.session_state.response_handler.format_response(
-            response, intent, relevant_info
-        )
-        
-        # Validate response quality
-        if not st.session_state.response_handler.validate_response_quality(formatted_response):
-            # Use fallback response
-            formatted_response = st.session_state.response_handler.get_fallback_response(intent)
-        
-        return formatted_response
+        # Generated chunks are formatted and shown as they are decoded
+        yield from pipeline.stream(result, conversation_history)
         
     except Exception as e:
         st.error(f"Error generating response: {str(e)}")
-        return "I apologize, but I'm experiencing technical difficulties. Please try asking your question again, or contact our admission office directly for assistance."
+        yield "I apologize, but I'm experiencing technical difficulties. Please try asking your question again, or contact our admission office directly for assistance."
 
 def create_enhanced_prompt(user_message, intent, relevant_info):
     """Create an enhanced prompt with context"""
-    prompt = f"Question about college admissions: {user_message}\n\n"
-    
-    if relevant_info:
-        prompt += "Relevant information:\n\n"
-        for info in relevant_info[:2]:  # Use top 2 relevant pieces
-            if info['knowledge']['type'] == 'faq':
-                prompt += f"FAQ: {info['knowledge']['question']} - {info['knowledge']['answer']}\n"
-            else:
-                prompt += f"Info: {str(info['knowledge']['data'])}\n"
-    
-    prompt += f"\nPlease provide a helpful, friendly response about {intent if intent != 'general' else 'this topic'}."
+    header = f"Question about college admissions: {user_message}\n\n"
+    footer = f"\nPlease provide a helpful, friendly response about {intent if intent != 'general' else 'this topic'}."
     
-    return prompt
+    # The best retrieved snippets that fit Config.MAX_CONTEXT_LENGTH tokens, without near-duplicates
+    return get_context_assembler().build_prompt(header, relevant_info, footer)
 
 def display_chat():
     """Display the chat interface"""
@@ -281,11 +284,10 @@ def display_chat():
         with st.chat_message("user"):
             st.markdown(prompt)
         
-        # Generate and display assistant response
+        # Generate and display assistant response, writing chunks as they are produced
         with st.chat_message("assistant"):
-            with st.spinner("Thinking..."):
-                response = generate_response(prompt)
-                st.markdown(response)
+            response_handler = load_shared_components()[2]
+            response = st.write_stream(response_handler.latency.measure_stream('response', stream_response(prompt)))
         
         # Add assistant response to chat history
         st.session_state.messages.append({"role": "assistant", "content": response})
@@ -2,10 +2,21 @@ __version__ = "1.0.0"
 __author__ = "College Admission Chatbot Team"
 __email__ = "admissions@college.edu"
 
-# Import main classes for easy access
-from .llm_handler import LLMHandler
-from .knowledge_base import KnowledgeBase
-from .response_handler import ResponseHandler
+import importlib
+
+# Main classes are imported on first access, so importing one submodule
+# (e.g. the rule-based LLMHandler) does not pull in numpy or the embedding stack
+_LAZY_IMPORTS = {
+    'LLMHandler': '.llm_handler',
+    'KnowledgeBase': '.knowledge_base',
+    'ResponseHandler': '.response_handler'
+}
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        module = importlib.import_module(_LAZY_IMPORTS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 __all__ = [
     'LLMHandler',
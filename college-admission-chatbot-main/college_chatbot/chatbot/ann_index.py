@@ -0,0 +1,592 @@
+import json
+import math
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import numpy as np
+import logging
+
+from .vector_utils import l2_normalize, top_k_indices
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_faiss = None
+
+def _load_faiss():
+    """Import faiss-cpu on first use; returns None when the optional dependency is missing"""
+    global _faiss
+    if _faiss is None:
+        try:
+            import faiss
+            _faiss = faiss
+        except ImportError:
+            _faiss = False
+    return _faiss or None
+
+class VectorIndex:
+    """Base class for inner-product search over L2-normalized vectors"""
+    
+    backend = "base"
+    
+    # Recall@k against exact search, measured when the index is built
+    recall: Optional[float] = None
+    
+    def __init__(self, vectors: np.ndarray):
+        self.vectors = vectors
+    
+    def __len__(self) -> int:
+        return len(self.vectors)
+    
+    @property
+    def memory_bytes(self) -> int:
+        """Bytes held by the index structures besides the indexed vectors"""
+        return 0
+    
+    def search(self, query: np.ndarray, k: int, mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the vectors most similar to a query
+        
+        Args:
+            query: Normalized query vector
+            k: Number of neighbours to return
+            mask: Boolean mask of the vectors allowed in the results, or None for all
+            
+        Returns:
+            Tuple of (indices, scores) in descending score order
+        """
+        raise NotImplementedError
+    
+    # Masks allowing at most this fraction of the rows gather them; wider masks score every
+    # row, since copying most of the matrix costs more than the scan it saves
+    GATHER_FRACTION = 0.05
+    
+    def _search_subset(self, query: np.ndarray, k: int, mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact search over the allowed vectors only"""
+        if np.count_nonzero(mask) <= self.GATHER_FRACTION * len(mask):
+            rows = np.flatnonzero(mask)
+            scores = np.asarray(self.vectors[rows]) @ query
+            top = top_k_indices(scores, k)
+            return rows[top], scores[top]
+        
+        scores = np.where(mask, self.vectors @ query, -np.inf)
+        top = top_k_indices(scores, k)
+        # Fewer than k allowed rows leave disallowed ones at -inf in the top k
+        top = top[np.isfinite(scores[top])]
+        return top, scores[top]
+    
+    def save(self, path: Path, version: str):
+        """Serialize the index; backends without persistent structures write nothing"""
+    
+    def _write_atomic(self, path: Path, write_fn):
+        """Write a file through a temporary file and rename it into place"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        os.close(fd)
+        try:
+            write_fn(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+class ExactIndex(VectorIndex):
+    """Brute-force scan; exact and fastest for small corpora"""
+    
+    backend = "exact"
+    
+    def search(self, query: np.ndarray, k: int, mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        if mask is not None:
+            return self._search_subset(query, k, mask)
+        scores = self.vectors @ query
+        top = top_k_indices(scores, k)
+        return top, scores[top]
+
+class IVFIndex(VectorIndex):
+    """Inverted-file index: spherical k-means lists, probing only the closest lists per query"""
+    
+    backend = "ivf"
+    
+    def __init__(self, vectors: np.ndarray, nlist: Optional[int] = None, nprobe: int = 8,
+                 iterations: int = 10, seed: int = 0, _trained: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None):
+        """
+        Build or restore the index
+        
+        Args:
+            vectors: Normalized float32 vectors to index
+            nlist: Number of lists; defaults to 4 * sqrt(len(vectors))
+            nprobe: Lists scanned per query; higher means better recall and slower search
+            iterations: k-means iterations
+            seed: Random seed for centroid initialization
+        """
+        super().__init__(vectors)
+        self.nprobe = nprobe
+        
+        if _trained is not None:
+            self.centroids, self.order, self.offsets = _trained
+            return
+        
+        n = len(vectors)
+        nlist = nlist or max(1, int(4 * math.sqrt(n)))
+        nlist = min(nlist, n)
+        self.centroids = self._train(vectors, nlist, iterations, seed)
+        
+        assignments = self._assign(vectors, self.centroids)
+        self.order = np.argsort(assignments, kind='stable').astype(np.int64)
+        counts = np.bincount(assignments, minlength=nlist)
+        self.offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+    
+    @staticmethod
+    def _assign(vectors: np.ndarray, centroids: np.ndarray, chunk_size: int = 8192) -> np.ndarray:
+        """Assign each vector to its nearest centroid, in chunks to bound memory"""
+        assignments = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), chunk_size):
+            chunk = vectors[start:start + chunk_size]
+            assignments[start:start + chunk_size] = np.argmax(chunk @ centroids.T, axis=1)
+        return assignments
+    
+    def _train(self, vectors: np.ndarray, nlist: int, iterations: int, seed: int) -> np.ndarray:
+        """Spherical k-means on a sample of the vectors"""
+        rng = np.random.default_rng(seed)
+        sample_size = min(len(vectors), nlist * 64)
+        sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))])
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+        
+        for _ in range(iterations):
+            assignments = self._assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            empty = np.bincount(assignments, minlength=nlist) == 0
+            # Re-seed empty lists from random sample points
+            sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            centroids = l2_normalize(sums)
+        
+        return centroids
+    
+    @property
+    def memory_bytes(self) -> int:
+        return int(self.centroids.nbytes + self.order.nbytes + self.offsets.nbytes)
+    
+    def search(self, query: np.ndarray, k: int, mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        probes = top_k_indices(self.centroids @ query, self.nprobe)
+        candidates = np.concatenate([self.order[self.offsets[p]:self.offsets[p + 1]] for p in probes])
+        if mask is not None:
+            candidates = candidates[mask[candidates]]
+            # A selective filter can leave the probed lists short of k allowed vectors
+            if len(candidates) < k:
+                return self._search_subset(query, k, mask)
+        if len(candidates) == 0:
+            return candidates, np.empty(0, dtype=np.float32)
+        
+        scores = np.asarray(self.vectors[candidates]) @ query
+        top = top_k_indices(scores, k)
+        return candidates[top], scores[top]
+    
+    def save(self, path: Path, version: str):
+        def write(tmp_path):
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, version=np.array(version), count=np.array(len(self.vectors)),
+                         recall=np.array(np.nan if self.recall is None else self.recall),
+                         centroids=self.centroids, order=self.order, offsets=self.offsets)
+        self._write_atomic(path, write)
+    
+    @classmethod
+    def load(cls, path: Path, vectors: np.ndarray, version: str, nprobe: int = 8) -> Optional["IVFIndex"]:
+        """Restore a saved index, or return None if it is missing or stale"""
+        try:
+            with np.load(path, allow_pickle=False) as saved:
+                if str(saved['version']) != version or int(saved['count']) != len(vectors):
+                    return None
+                trained = (saved['centroids'], saved['order'], saved['offsets'])
+                recall = float(saved['recall']) if 'recall' in saved.files else math.nan
+            if trained[0].shape[1] != vectors.shape[1]:
+                return None
+            index = cls(vectors, nprobe=nprobe, _trained=trained)
+            index.recall = None if math.isnan(recall) else recall
+            return index
+        except Exception as e:
+            logger.warning(f"Could not load IVF index {path}: {e}")
+            return None
+
+class HNSWIndex(VectorIndex):
+    """HNSW graph index backed by faiss-cpu"""
+    
+    backend = "hnsw"
+    
+    FILTER_OVERFETCH = 4
+    
+    def __init__(self, vectors: np.ndarray, m: int = 32, ef_construction: int = 200,
+                 ef_search: int = 64, _index=None):
+        """
+        Build or restore the index
+        
+        Args:
+            vectors: Normalized float32 vectors to index
+            m: Graph neighbours per node; higher means better recall and more memory
+            ef_construction: Build-time search breadth
+            ef_search: Query-time search breadth; higher means better recall and slower search
+        """
+        super().__init__(vectors)
+        if _index is None:
+            faiss = _load_faiss()
+            _index = faiss.IndexHNSWFlat(vectors.shape[1], m, faiss.METRIC_INNER_PRODUCT)
+            _index.hnsw.efConstruction = ef_construction
+            _index.add(np.ascontiguousarray(vectors, dtype=np.float32))
+        _index.hnsw.efSearch = ef_search
+        self.index = _index
+    
+    @property
+    def memory_bytes(self) -> int:
+        # faiss keeps its own copy of the vectors next to the graph links
+        return int(self.index.ntotal * self.index.d * 4 + self.index.hnsw.neighbors.size() * 4)
+    
+    def search(self, query: np.ndarray, k: int, mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        # With a filter, over-fetch and drop disallowed neighbours
+        fetch = k if mask is None else k * self.FILTER_OVERFETCH
+        scores, indices = self.index.search(query.reshape(1, -1).astype(np.float32), fetch)
+        keep = indices[0] >= 0
+        indices, scores = indices[0][keep].astype(np.int64), scores[0][keep]
+        if mask is not None:
+            allowed = mask[indices]
+            indices, scores = indices[allowed][:k], scores[allowed][:k]
+            if len(indices) < k:
+                return self._search_subset(query, k, mask)
+        return indices, scores
+    
+    def save(self, path: Path, version: str):
+        self._write_atomic(path, lambda tmp_path: _load_faiss().write_index(self.index, tmp_path))
+        with open(path.with_suffix('.json'), 'w', encoding='utf-8') as f:
+            json.dump({'version': version, 'count': len(self.vectors), 'recall': self.recall}, f)
+    
+    @classmethod
+    def load(cls, path: Path, vectors: np.ndarray, version: str, ef_search: int = 64) -> Optional["HNSWIndex"]:
+        """Restore a saved index, or return None if it is missing or stale"""
+        try:
+            with open(path.with_suffix('.json'), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest['version'] != version or manifest['count'] != len(vectors):
+                return None
+            index = cls(vectors, ef_search=ef_search, _index=_load_faiss().read_index(str(path)))
+            index.recall = manifest.get('recall')
+            return index
+        except Exception as e:
+            logger.warning(f"Could not load HNSW index {path}: {e}")
+            return None
+
+class QuantizedIndex(VectorIndex):
+    """Scan over int8 or float16 codes of optionally reduced dimension, rescoring candidates exactly
+    
+    Only the codes are scanned, so the full-precision vectors are read for a few
+    candidate rows per query and can stay paged out in a memory-mapped file.
+    float32 codes of reduced dimension are scanned by BLAS directly and are the
+    fastest; int8 and float16 codes are smaller but are widened block by block.
+    """
+    
+    backend = "quantized"
+    
+    DTYPES = {'float32': np.float32, 'int8': np.int8, 'float16': np.float16}
+    
+    def __init__(self, vectors: np.ndarray, dtype: str = "int8", dimensions: Optional[int] = None,
+                 reduction: str = "pca", rescore_factor: int = 4, seed: int = 0,
+                 _trained: Optional[Dict[str, np.ndarray]] = None):
+        """
+        Build or restore the index
+        
+        Args:
+            vectors: Normalized float32 vectors to index
+            dtype: Code type, 'float32' (scanned by BLAS; smaller only with fewer dimensions),
+                'int8' (4x smaller) or 'float16' (2x smaller)
+            dimensions: Dimensions kept in the codes, or None to keep all
+            reduction: 'pca' to project onto the top principal components, or 'truncate'
+                to keep the leading dimensions (for models trained for truncation)
+            rescore_factor: Candidates rescored at full precision per requested result
+            seed: Random seed for the PCA sample
+        """
+        super().__init__(vectors)
+        if dtype not in self.DTYPES:
+            raise ValueError(f"Unknown quantization dtype: {dtype}")
+        self.dtype = dtype
+        self.rescore_factor = max(1, rescore_factor)
+        
+        if _trained is not None:
+            self.codes = _trained['codes']
+            self.scale = _trained['scale']
+            self.projection = _trained['projection'] if _trained['projection'].size else None
+            return
+        
+        dimension = vectors.shape[1]
+        dimensions = min(dimensions or dimension, dimension)
+        self.projection = None
+        if dimensions < dimension:
+            if reduction == "pca":
+                # PCA finds at most one axis per sampled vector
+                dimensions = min(dimensions, len(vectors))
+                self.projection = self._fit_pca(vectors, dimensions, seed)
+            elif reduction != "truncate":
+                raise ValueError(f"Unknown dimension reduction: {reduction}")
+        
+        reduced = self._reduce_all(vectors, dimensions)
+        if dtype == "int8":
+            # Symmetric per-dimension scale so each column uses the full int8 range
+            self.scale = np.maximum(np.abs(reduced).max(axis=0), np.float32(1e-12)) / np.float32(127)
+            self.codes = np.clip(np.rint(reduced / self.scale), -127, 127).astype(np.int8)
+        else:
+            self.scale = np.ones(dimensions, dtype=np.float32)
+            self.codes = reduced.astype(self.DTYPES[dtype])
+    
+    @staticmethod
+    def _fit_pca(vectors: np.ndarray, dimensions: int, seed: int, sample_size: int = 20000) -> np.ndarray:
+        """Top principal axes of a sample of the vectors, as a (dimensions, dim) matrix"""
+        rng = np.random.default_rng(seed)
+        count = min(len(vectors), sample_size)
+        sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), count, replace=False))], dtype=np.float32)
+        sample = sample - sample.mean(axis=0)
+        _, _, components = np.linalg.svd(sample, full_matrices=False)
+        # The projected mean adds the same offset to every score of a query, so it is dropped
+        return np.ascontiguousarray(components[:dimensions], dtype=np.float32)
+    
+    def _reduce(self, vectors: np.ndarray, dimensions: int) -> np.ndarray:
+        """Project or truncate vectors to the code dimensions"""
+        if self.projection is not None:
+            return vectors @ self.projection.T
+        return vectors[..., :dimensions]
+    
+    def _reduce_all(self, vectors: np.ndarray, dimensions: int, chunk_size: int = 8192) -> np.ndarray:
+        """Reduce every vector, in chunks to bound memory"""
+        reduced = np.empty((len(vectors), dimensions), dtype=np.float32)
+        for start in range(0, len(vectors), chunk_size):
+            chunk = np.asarray(vectors[start:start + chunk_size], dtype=np.float32)
+            reduced[start:start + chunk_size] = self._reduce(chunk, dimensions)
+        return reduced
+    
+    @property
+    def memory_bytes(self) -> int:
+        """Bytes held by the scanned codes"""
+        projection_bytes = self.projection.nbytes if self.projection is not None else 0
+        return int(self.codes.nbytes + self.scale.nbytes + projection_bytes)
+    
+    def approximate_scores(self, query: np.ndarray, chunk_size: int = 256) -> np.ndarray:
+        """First-pass scores of every vector from the codes"""
+        # Folding the scale into the query dequantizes the codes inside the dot product
+        reduced_query = (self._reduce(query, self.codes.shape[1]) * self.scale).astype(np.float32)
+        if self.codes.dtype == np.float32:
+            return self.codes @ reduced_query
+        
+        # numpy has no BLAS kernel for int8 or float16, so each block is widened into one
+        # reused float32 buffer that stays in cache, then scored by BLAS
+        scores = np.empty(len(self.codes), dtype=np.float32)
+        buffer = np.empty((min(chunk_size, len(self.codes)), self.codes.shape[1]), dtype=np.float32)
+        for start in range(0, len(self.codes), chunk_size):
+            chunk = self.codes[start:start + chunk_size]
+            block = buffer[:len(chunk)]
+            np.copyto(block, chunk, casting='unsafe')
+            np.dot(block, reduced_query, out=scores[start:start + len(chunk)])
+        return scores
+    
+    def search(self, query: np.ndarray, k: int, mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        approximate = self.approximate_scores(query)
+        if mask is not None:
+            approximate[~mask] = -np.inf
+        candidates = top_k_indices(approximate, k * self.rescore_factor)
+        if mask is not None:
+            candidates = candidates[mask[candidates]]
+        if len(candidates) == 0:
+            return candidates, np.empty(0, dtype=np.float32)
+        
+        # Sorted row order keeps reads from a memory-mapped matrix sequential
+        candidates = np.sort(candidates)
+        scores = np.asarray(self.vectors[candidates], dtype=np.float32) @ query
+        top = top_k_indices(scores, k)
+        return candidates[top], scores[top]
+    
+    def map_vectors(self, path: Path):
+        """
+        Rescore from a memory-mapped copy of the vectors instead of the heap
+        
+        Vectors already served from a memory-mapped store are left as they are.
+        
+        Args:
+            path: .npy file holding the vectors; reused if it has the right shape
+        """
+        if isinstance(self.vectors, np.memmap):
+            return
+        mapped = None
+        if path.exists():
+            try:
+                mapped = np.load(path, mmap_mode='r', allow_pickle=False)
+            except Exception as e:
+                logger.warning(f"Could not map vectors {path}: {e}")
+        if mapped is None or mapped.shape != self.vectors.shape or mapped.dtype != np.float32:
+            vectors = np.asarray(self.vectors, dtype=np.float32)
+            
+            def write(tmp_path):
+                with open(tmp_path, 'wb') as f:
+                    np.save(f, vectors)
+            self._write_atomic(path, write)
+            mapped = np.load(path, mmap_mode='r', allow_pickle=False)
+        self.vectors = mapped
+    
+    def save(self, path: Path, version: str):
+        projection = self.projection if self.projection is not None else np.empty((0, 0), np.float32)
+        
+        def write(tmp_path):
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, version=np.array(version), count=np.array(len(self.vectors)),
+                         dtype=np.array(self.dtype), recall=np.array(np.nan if self.recall is None else self.recall),
+                         codes=self.codes, scale=self.scale, projection=projection)
+        self._write_atomic(path, write)
+    
+    @classmethod
+    def load(cls, path: Path, vectors: np.ndarray, version: str, dtype: str = "int8",
+             dimensions: Optional[int] = None, rescore_factor: int = 4) -> Optional["QuantizedIndex"]:
+        """Restore a saved index, or return None if it is missing, stale or built with other settings"""
+        try:
+            with np.load(path, allow_pickle=False) as saved:
+                if str(saved['version']) != version or int(saved['count']) != len(vectors):
+                    return None
+                expected = min(dimensions or vectors.shape[1], vectors.shape[1])
+                if str(saved['dtype']) != dtype or saved['codes'].shape[1] not in (expected, min(expected, len(vectors))):
+                    return None
+                trained = {name: saved[name] for name in ('codes', 'scale', 'projection')}
+                recall = float(saved['recall'])
+            index = cls(vectors, dtype, rescore_factor=rescore_factor, _trained=trained)
+            index.recall = None if math.isnan(recall) else recall
+            return index
+        except Exception as e:
+            logger.warning(f"Could not load quantized index {path}: {e}")
+            return None
+
+def held_out_queries(vectors: np.ndarray, sample_size: int = 200, seed: int = 0) -> np.ndarray:
+    """
+    Queries near the data that are not themselves indexed
+    
+    Each query is the normalized midpoint of two random indexed vectors. An indexed
+    vector used as its own query is always found first, which overstates recall.
+    
+    Args:
+        vectors: The indexed vectors
+        sample_size: Number of queries
+        seed: Random seed
+        
+    Returns:
+        (sample_size, dim) float32 queries
+    """
+    rng = np.random.default_rng(seed)
+    pairs = np.sort(rng.integers(0, len(vectors), size=(2, sample_size)), axis=1)
+    first = np.asarray(vectors[pairs[0]], dtype=np.float32)
+    second = np.asarray(vectors[pairs[1]], dtype=np.float32)
+    return l2_normalize(first + second)
+
+def measure_recall(index: VectorIndex, vectors: np.ndarray, k: int = 10, sample_size: int = 200,
+                   seed: int = 0, queries: Optional[np.ndarray] = None) -> float:
+    """
+    Measure recall@k of an index against exact search
+    
+    Args:
+        index: Index to evaluate
+        vectors: The indexed vectors
+        k: Neighbours compared per query
+        sample_size: Number of generated queries when none are given
+        seed: Random seed for the generated queries
+        queries: Held-out query vectors; defaults to held_out_queries(vectors)
+        
+    Returns:
+        Mean fraction of the exact top k found by the index
+    """
+    if queries is None:
+        queries = held_out_queries(vectors, sample_size, seed)
+    exact = ExactIndex(vectors)
+    found = 0
+    for query in queries:
+        query = np.asarray(query, dtype=np.float32)
+        expected = set(exact.search(query, k)[0].tolist())
+        found += len(expected & set(index.search(query, k)[0].tolist()))
+    return found / max(1, len(queries) * min(k, len(vectors)))
+
+def build_index(vectors: np.ndarray, backend: str = "auto", min_entries: int = 5000,
+                index_path: Optional[Path] = None, version: Optional[str] = None,
+                **params) -> VectorIndex:
+    """
+    Build a vector index, reusing a serialized one when it matches the version
+    
+    Corpora smaller than min_entries always use exact search.
+    
+    Args:
+        vectors: Normalized float32 vectors
+        backend: 'exact', 'ivf', 'hnsw', 'quantized' or 'auto' (hnsw when faiss is installed, else ivf)
+        min_entries: Corpus size from which an approximate index is used
+        index_path: Where the index is serialized (without suffix), or None to skip
+        version: Knowledge base version the index must match when loaded
+        **params: Backend knobs: nlist, nprobe, m, ef_construction, ef_search, dtype,
+            dimensions, reduction, rescore_factor, recall_sample
+        
+    Returns:
+        Vector index
+    """
+    has_faiss = backend in ("auto", "hnsw") and _load_faiss() is not None
+    if backend == "auto":
+        backend = "hnsw" if has_faiss else "ivf"
+    if backend == "hnsw" and not has_faiss:
+        logger.warning("faiss is not installed, falling back to the IVF index")
+        backend = "ivf"
+    
+    if backend == "exact" or len(vectors) < min_entries:
+        return ExactIndex(vectors)
+    
+    path = Path(f"{index_path}.{backend}") if index_path is not None else None
+    
+    can_persist = path is not None and version is not None
+    
+    if backend == "hnsw":
+        ef_search = params.get('ef_search', 64)
+        index = HNSWIndex.load(path, vectors, version, ef_search) if can_persist and path.exists() else None
+        if index is None:
+            index = HNSWIndex(vectors, params.get('m', 32), params.get('ef_construction', 200), ef_search)
+        else:
+            logger.info(f"Loaded {backend} index from {path}")
+            return index
+    elif backend == "ivf":
+        nprobe = params.get('nprobe', 8)
+        index = IVFIndex.load(path, vectors, version, nprobe) if can_persist and path.exists() else None
+        if index is None:
+            index = IVFIndex(vectors, params.get('nlist'), nprobe)
+        else:
+            logger.info(f"Loaded {backend} index from {path}")
+            return index
+    elif backend == "quantized":
+        dtype = params.get('dtype', "float32")
+        dimensions = params.get('dimensions')
+        rescore_factor = params.get('rescore_factor', 4)
+        index = (QuantizedIndex.load(path, vectors, version, dtype, dimensions, rescore_factor)
+                 if can_persist and path.exists() else None)
+        loaded = index is not None
+        if not loaded:
+            index = QuantizedIndex(vectors, dtype, dimensions, params.get('reduction', "pca"), rescore_factor)
+        if path is not None:
+            # Only the codes stay on the heap; candidates are rescored from the mapped file
+            try:
+                index.map_vectors(Path(f"{path}.vectors.npy"))
+            except Exception as e:
+                logger.warning(f"Could not map vectors next to {path}: {e}")
+        if loaded:
+            logger.info(f"Loaded {backend} index from {path}")
+            return index
+    else:
+        raise ValueError(f"Unknown index backend: {backend}")
+    
+    logger.info(f"Built {backend} index over {len(vectors)} vectors")
+    
+    recall_sample = params.get('recall_sample', 200)
+    if recall_sample:
+        index.recall = measure_recall(index, index.vectors, sample_size=recall_sample)
+        logger.info(f"{backend} index recall@10 against exact search: {index.recall:.3f}")
+    
+    if can_persist:
+        try:
+            index.save(path, version)
+        except Exception as e:
+            logger.warning(f"Could not save {backend} index to {path}: {e}")
+    
+    return index
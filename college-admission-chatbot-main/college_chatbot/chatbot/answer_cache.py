@@ -0,0 +1,197 @@
+import itertools
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+import logging
+
+from .query_cache import normalize_query
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class _CachedAnswer:
+    __slots__ = ('bucket', 'query', 'embedding', 'answer', 'latency_ms', 'size')
+    
+    def __init__(self, bucket: Tuple[str, str], query: str, embedding: np.ndarray, answer: str, latency_ms: float):
+        self.bucket = bucket
+        self.query = query
+        self.embedding = embedding
+        self.answer = answer
+        self.latency_ms = latency_ms
+        self.size = len(answer.encode('utf-8')) + embedding.nbytes
+
+class _Bucket:
+    """Answers of one (knowledge base version, intent), with their embeddings stacked for one matrix product"""
+    
+    def __init__(self):
+        self.entries: Dict[int, _CachedAnswer] = {}
+        self._ids: Optional[np.ndarray] = None
+        self._matrix: Optional[np.ndarray] = None
+    
+    def add(self, entry_id: int, entry: _CachedAnswer):
+        self.entries[entry_id] = entry
+        self._matrix = None
+    
+    def remove(self, entry_id: int):
+        del self.entries[entry_id]
+        self._matrix = None
+    
+    def nearest(self, embedding: np.ndarray) -> Tuple[Optional[int], float]:
+        """Id and cosine similarity of the closest cached question"""
+        if not self.entries:
+            return None, 0.0
+        if self._matrix is None:
+            self._ids = np.fromiter(self.entries, dtype=np.int64, count=len(self.entries))
+            self._matrix = np.stack([self.entries[entry_id].embedding for entry_id in self._ids.tolist()])
+        scores = self._matrix @ embedding
+        best = int(scores.argmax())
+        return int(self._ids[best]), float(scores[best])
+
+class SemanticAnswerCache:
+    """Formatted answers reused for questions that mean the same
+    
+    A question hits when its normalized embedding has at least min_similarity
+    (cosine similarity) to an answered question with the same intent on the
+    same knowledge base version. Entries are evicted least recently used
+    first once either the entry count or the total size exceeds its bound.
+    """
+    
+    def __init__(self, max_entries: int = 512, max_bytes: int = 8 * 1024 * 1024, min_similarity: float = 0.95):
+        """
+        Initialize the cache
+        
+        Args:
+            max_entries: Maximum answers kept
+            max_bytes: Maximum total size of the answers and their embeddings
+            min_similarity: Smallest cosine similarity counted as the same question
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.min_similarity = min_similarity
+        self._entries: "OrderedDict[int, _CachedAnswer]" = OrderedDict()
+        self._buckets: Dict[Tuple[str, str], _Bucket] = {}
+        self._exact: Dict[Tuple[str, str, str], int] = {}
+        self._ids = itertools.count()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'saved_ms': 0.0}
+    
+    def lookup(self, version: str, intent: str, query: str, embedding: Optional[np.ndarray]) -> Optional[str]:
+        """
+        Find the cached answer of an equivalent question
+        
+        Args:
+            version: Knowledge base version
+            intent: Detected intent
+            query: Question text; an identical normalized question hits without its embedding
+            embedding: L2-normalized question embedding, or None if unavailable
+            
+        Returns:
+            Cached formatted answer, or None
+        """
+        bucket_key = (version, intent)
+        with self._lock:
+            entry_id = self._exact.get((version, intent, normalize_query(query)))
+            if entry_id is None and embedding is not None and bucket_key in self._buckets:
+                nearest_id, similarity = self._buckets[bucket_key].nearest(embedding)
+                if nearest_id is not None and similarity >= self.min_similarity:
+                    entry_id = nearest_id
+            
+            if entry_id is None:
+                self._stats['misses'] += 1
+                return None
+            
+            entry = self._entries[entry_id]
+            self._entries.move_to_end(entry_id)
+            self._stats['hits'] += 1
+            self._stats['saved_ms'] += entry.latency_ms
+            return entry.answer
+    
+    def store(self, version: str, intent: str, query: str, embedding: np.ndarray, answer: str, latency_ms: float):
+        """
+        Cache a formatted answer
+        
+        Args:
+            version: Knowledge base version the answer was built from
+            intent: Detected intent
+            query: Question text
+            embedding: L2-normalized question embedding
+            answer: Formatted answer
+            latency_ms: Time the answer took, credited as saved on every hit
+        """
+        entry = _CachedAnswer((version, intent), normalize_query(query),
+                              np.asarray(embedding, dtype=np.float32), answer, latency_ms)
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            exact_key = (version, intent, entry.query)
+            if exact_key in self._exact:
+                self._remove(self._exact[exact_key])
+            
+            entry_id = next(self._ids)
+            self._entries[entry_id] = entry
+            self._buckets.setdefault(entry.bucket, _Bucket()).add(entry_id, entry)
+            self._exact[exact_key] = entry_id
+            self._bytes += entry.size
+            
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._stats['evictions'] += 1
+    
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id)
+        bucket = self._buckets[entry.bucket]
+        bucket.remove(entry_id)
+        if not bucket.entries:
+            del self._buckets[entry.bucket]
+        self._exact.pop((entry.bucket[0], entry.bucket[1], entry.query), None)
+        self._bytes -= entry.size
+    
+    def invalidate_version(self, version: str) -> int:
+        """Drop all answers of a knowledge base version"""
+        with self._lock:
+            stale = [entry_id for entry_id, entry in self._entries.items() if entry.bucket[0] == version]
+            for entry_id in stale:
+                self._remove(entry_id)
+        if stale:
+            logger.info(f"Invalidated {len(stale)} cached answers for knowledge base version {version}")
+        return len(stale)
+    
+    def clear(self):
+        """Remove all cached answers"""
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+            self._exact.clear()
+            self._bytes = 0
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit rate, saved latency, size and eviction statistics"""
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self._stats['hits'],
+                'misses': self._stats['misses'],
+                'hit_rate': self._stats['hits'] / lookups if lookups else 0.0,
+                'evictions': self._stats['evictions'],
+                'saved_ms': self._stats['saved_ms'],
+                'mean_saved_ms': self._stats['saved_ms'] / self._stats['hits'] if self._stats['hits'] else 0.0
+            }
+
+_shared_answer_cache: Optional[SemanticAnswerCache] = None
+_shared_lock = threading.Lock()
+
+def get_shared_answer_cache(max_entries: int = 512, max_bytes: int = 8 * 1024 * 1024,
+                            min_similarity: float = 0.95) -> SemanticAnswerCache:
+    """Get the process-wide answer cache shared by all sessions"""
+    global _shared_answer_cache
+    with _shared_lock:
+        if _shared_answer_cache is None:
+            _shared_answer_cache = SemanticAnswerCache(max_entries, max_bytes, min_similarity)
+        return _shared_answer_cache
@@ -0,0 +1,175 @@
+import hashlib
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import numpy as np
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Model of a pool worker process, loaded once by _init_worker
+_worker_model = None
+
+def _init_worker(backend: str, model_name: str, threads: int):
+    """Load the embedding backend in a pool worker"""
+    global _worker_model
+    try:
+        import torch
+        # Workers split the cores instead of each using all of them
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    from .embedders import create_embedding_backend
+    _worker_model = create_embedding_backend(backend, model_name)
+
+def _encode_batch(batch_index: int, texts: List[str]):
+    return batch_index, np.asarray(_worker_model.encode(texts), dtype=np.float32)
+
+class ProgressReporter:
+    """Logs throughput and estimated time remaining of a long-running build"""
+    
+    def __init__(self, total: int, done: int = 0, interval: float = 5.0):
+        self.total = total
+        self.done = done
+        self.interval = interval
+        self._initial = done
+        self._started = time.perf_counter()
+        self._last_report = self._started
+    
+    @property
+    def rate(self) -> float:
+        """Texts per second encoded in this run"""
+        elapsed = time.perf_counter() - self._started
+        return (self.done - self._initial) / elapsed if elapsed > 0 else 0.0
+    
+    def update(self, count: int):
+        """Record finished texts, logging progress at most once per interval"""
+        self.done += count
+        now = time.perf_counter()
+        if now - self._last_report >= self.interval or self.done >= self.total:
+            self._last_report = now
+            rate = self.rate
+            eta = (self.total - self.done) / rate if rate > 0 else float('inf')
+            logger.info(f"Embedded {self.done}/{self.total} texts ({rate:.1f} texts/sec, ETA {eta:.0f}s)")
+
+class BulkEmbedder:
+    """Encodes large corpora in batches across a process pool, resumably
+    
+    Each finished batch is checkpointed to disk, so a build that is interrupted
+    continues with the remaining batches when it is run again on the same texts.
+    """
+    
+    def __init__(self, backend: str, model_name: str, checkpoint_dir: Path, batch_size: int = 512,
+                 workers: Optional[int] = None, progress_interval: float = 5.0):
+        """
+        Initialize the embedder
+        
+        Args:
+            backend: Embedding backend loaded by each worker
+            model_name: Model of the backend
+            checkpoint_dir: Directory for per-batch checkpoints
+            batch_size: Texts per batch (and per checkpoint)
+            workers: Worker processes; None for one per CPU core, 1 to encode in-process
+            progress_interval: Seconds between progress log lines
+        """
+        self.backend = backend
+        self.model_name = model_name
+        self.checkpoint_dir = Path(checkpoint_dir)
+        self.batch_size = batch_size
+        self.workers = workers or os.cpu_count() or 1
+        self.progress_interval = progress_interval
+        self.last_stats: Dict[str, float] = {}
+    
+    def _job_dir(self, texts: List[str]) -> Path:
+        """Checkpoint directory of a build, identified by the backend, model, batch size and texts"""
+        digest = hashlib.sha256(f"{self.backend}\0{self.model_name}\0{self.batch_size}".encode('utf-8'))
+        for text in texts:
+            digest.update(hashlib.sha256(text.encode('utf-8')).digest())
+        return self.checkpoint_dir / digest.hexdigest()[:16]
+    
+    @staticmethod
+    def _save_batch(job_dir: Path, batch_index: int, vectors: np.ndarray):
+        """Write a batch checkpoint atomically so a crash never leaves a partial file"""
+        fd, tmp_path = tempfile.mkstemp(dir=job_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, vectors)
+            os.replace(tmp_path, job_dir / f"batch_{batch_index:06d}.npy")
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+    
+    @staticmethod
+    def _load_batch(job_dir: Path, batch_index: int, size: int) -> Optional[np.ndarray]:
+        try:
+            vectors = np.load(job_dir / f"batch_{batch_index:06d}.npy", allow_pickle=False)
+            return vectors if len(vectors) == size else None
+        except Exception:
+            return None
+    
+    def embed(self, texts: List[str], encode_fn: Optional[Callable[[List[str]], np.ndarray]] = None) -> np.ndarray:
+        """
+        Encode texts, resuming from checkpoints of an interrupted build
+        
+        Args:
+            texts: Texts to encode
+            encode_fn: In-process encoder used when there is a single worker
+            
+        Returns:
+            Embedding matrix in the order of texts
+        """
+        job_dir = self._job_dir(texts)
+        job_dir.mkdir(parents=True, exist_ok=True)
+        
+        batches = [texts[start:start + self.batch_size] for start in range(0, len(texts), self.batch_size)]
+        results: Dict[int, np.ndarray] = {}
+        for batch_index, batch in enumerate(batches):
+            vectors = self._load_batch(job_dir, batch_index, len(batch))
+            if vectors is not None:
+                results[batch_index] = vectors
+        
+        resumed = sum(len(batches[batch_index]) for batch_index in results)
+        if resumed:
+            logger.info(f"Resuming embedding build from {len(results)}/{len(batches)} checkpointed batches")
+        
+        pending = [batch_index for batch_index in range(len(batches)) if batch_index not in results]
+        progress = ProgressReporter(len(texts), resumed, self.progress_interval)
+        
+        def finish(batch_index, vectors):
+            self._save_batch(job_dir, batch_index, vectors)
+            results[batch_index] = vectors
+            progress.update(len(vectors))
+        
+        workers = min(self.workers, len(pending))
+        if workers <= 1 and encode_fn is not None:
+            for batch_index in pending:
+                finish(batch_index, np.asarray(encode_fn(batches[batch_index]), dtype=np.float32))
+        elif pending:
+            threads = max(1, (os.cpu_count() or 1) // max(1, workers))
+            # Spawned workers do not inherit the parent's threads and locks
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=max(1, workers), mp_context=context,
+                                     initializer=_init_worker, initargs=(self.backend, self.model_name, threads)) as pool:
+                futures = [pool.submit(_encode_batch, batch_index, batches[batch_index]) for batch_index in pending]
+                for future in as_completed(futures):
+                    finish(*future.result())
+        
+        self.last_stats = {
+            'texts': len(texts),
+            'encoded': len(texts) - resumed,
+            'resumed': resumed,
+            'texts_per_sec': progress.rate
+        }
+        
+        # The build is complete, so its checkpoints are no longer needed
+        shutil.rmtree(job_dir, ignore_errors=True)
+        if not batches:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.concatenate([results[batch_index] for batch_index in range(len(batches))])
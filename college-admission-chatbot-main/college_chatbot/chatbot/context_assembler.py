@@ -0,0 +1,202 @@
+import re
+import sys
+import threading
+from pathlib import Path
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+import logging
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config import Config
+from .query_cache import LRUCache
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_PIECE_PATTERN = re.compile(r"\w+|[^\w\s]")
+_WORD_PATTERN = re.compile(r"\w+")
+
+def approximate_token_count(text: str) -> int:
+    """Estimate tokens without a tokenizer: one per punctuation mark and per started 6 characters of a word"""
+    return sum((len(piece) + 5) // 6 for piece in _PIECE_PATTERN.findall(text))
+
+def load_token_counter(model_name: Optional[str] = None) -> Callable[[str], int]:
+    """
+    Token counter of the generation model's tokenizer, or the estimate if it is unavailable
+    
+    Args:
+        model_name: Tokenizer to load; defaults to Config.TOKENIZER_NAME
+        
+    Returns:
+        Function counting the tokens of a text
+    """
+    if model_name is None:
+        model_name = Config.TOKENIZER_NAME
+    if model_name is None:
+        return approximate_token_count
+    try:
+        from transformers import AutoTokenizer
+    except ImportError:
+        logger.info(f"transformers is not installed, estimating token counts instead of using {model_name}")
+        return approximate_token_count
+    try:
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+    except Exception as e:
+        logger.warning(f"Tokenizer {model_name} unavailable, estimating token counts: {e}")
+        return approximate_token_count
+    return lambda text: len(tokenizer.encode(text, add_special_tokens=False))
+
+def snippet_text(info: Dict) -> str:
+    """Compact prompt line of a retrieved entry"""
+    knowledge = info.get('knowledge', {})
+    if knowledge.get('type') == 'faq':
+        return f"FAQ: {knowledge.get('question', '')} - {knowledge.get('answer', '')}"
+    if knowledge.get('type') == 'program':
+        program = knowledge.get('data', {})
+        details = ', '.join(str(program[field]) for field in ('degree', 'duration') if program.get(field))
+        line = f"Program: {program.get('name', '')}" + (f" ({details})" if details else '')
+        if program.get('description'):
+            line += f" - {program['description']}"
+        if program.get('specializations'):
+            line += f" Specializations: {', '.join(map(str, program['specializations']))}."
+        return line
+    return f"Info: {info.get('text', '')}"
+
+class ContextAssembler:
+    """Packs retrieved snippets into a prompt under a token budget
+    
+    Snippets are taken best first and skipped when they would overflow the
+    budget or mostly repeat one already packed. Token counts and word sets of
+    snippets are cached per entry, so packing a request only counts tokens of
+    entries it has not seen.
+    """
+    
+    # Share of a snippet's words found in a packed snippet above which it is a duplicate
+    DUPLICATE_OVERLAP = 0.8
+    
+    def __init__(self, token_counter: Optional[Callable[[str], int]] = None, cache_size: int = 4096):
+        """
+        Initialize the assembler
+        
+        Args:
+            token_counter: Counts the tokens of a text; loaded on first use by default,
+                or up front by load_token_counter
+            cache_size: Snippets whose token count is kept
+        """
+        self._token_counter = token_counter
+        self._counter_lock = threading.Lock()
+        # (entry id, snippet) -> (token count, word set); an edited entry gets a new key
+        self._snippets = LRUCache(cache_size)
+    
+    def load_token_counter(self) -> Callable[[str], int]:
+        """Load the configured tokenizer now, e.g. at startup, so no request waits for it to download"""
+        if self._token_counter is None:
+            with self._counter_lock:
+                if self._token_counter is None:
+                    self._token_counter = load_token_counter()
+        return self._token_counter
+    
+    def count_tokens(self, text: str) -> int:
+        """Count tokens with the configured tokenizer"""
+        return self.load_token_counter()(text)
+    
+    def _measure(self, info: Dict, text: str) -> Tuple[int, FrozenSet[str]]:
+        key = (info.get('knowledge', {}).get('id'), text)
+        measured = self._snippets.get(key)
+        if measured is None:
+            measured = (self.count_tokens(text + '\n'), frozenset(_WORD_PATTERN.findall(text.lower())))
+            self._snippets.put(key, measured)
+        return measured
+    
+    def _is_duplicate(self, words: FrozenSet[str], packed: List[FrozenSet[str]]) -> bool:
+        if not words:
+            return True
+        return any(len(words & other) >= self.DUPLICATE_OVERLAP * min(len(words), len(other)) for other in packed)
+    
+    def pack(self, relevant_info: List[Dict], budget: int) -> List[str]:
+        """
+        Choose the snippets of a prompt
+        
+        Args:
+            relevant_info: Retrieved entries, best first
+            budget: Tokens the snippets may use together, one line each
+            
+        Returns:
+            Snippet lines in rank order
+        """
+        lines: List[str] = []
+        packed_words: List[FrozenSet[str]] = []
+        seen_ids = set()
+        used = 0
+        for info in relevant_info:
+            entry_id = info.get('knowledge', {}).get('id')
+            if entry_id is not None and entry_id in seen_ids:
+                continue
+            text = snippet_text(info)
+            tokens, words = self._measure(info, text)
+            # A later, shorter snippet may still fit
+            if used + tokens > budget or self._is_duplicate(words, packed_words):
+                continue
+            lines.append(text)
+            packed_words.append(words)
+            seen_ids.add(entry_id)
+            used += tokens
+        return lines
+    
+    def build_prompt(self, header: str, relevant_info: List[Dict], footer: str,
+                     max_tokens: int = Config.MAX_CONTEXT_LENGTH) -> str:
+        """
+        Build a prompt whose retrieved context fills what the header and footer leave of max_tokens
+        
+        A header that leaves no room for the footer is cut to fit, so a long
+        question cannot push the prompt over max_tokens.
+        
+        Args:
+            header: Text before the context, e.g. the question
+            relevant_info: Retrieved entries, best first
+            footer: Text after the context, e.g. the instruction
+            max_tokens: Token budget of the whole prompt
+            
+        Returns:
+            Prompt text
+            
+        Raises:
+            ValueError: If the footer alone exceeds max_tokens
+        """
+        if self.count_tokens(header + footer) > max_tokens:
+            header = self._truncate_header(header, footer, max_tokens)
+        
+        context_title = "Relevant information:\n\n"
+        budget = max_tokens - self.count_tokens(header + context_title + footer)
+        lines = self.pack(relevant_info, budget) if relevant_info and budget > 0 else []
+        if not lines:
+            return header + footer
+        return header + context_title + ''.join(f"{line}\n" for line in lines) + footer
+    
+    def _truncate_header(self, header: str, footer: str, max_tokens: int) -> str:
+        """Longest start of header that fits max_tokens together with footer"""
+        if self.count_tokens(footer) > max_tokens:
+            raise ValueError(f"Prompt footer exceeds the budget of {max_tokens} tokens")
+        # Token counts grow with the prefix length, so the cut is found by bisection
+        low, high = 0, len(header)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.count_tokens(header[:middle] + footer) <= max_tokens:
+                low = middle
+            else:
+                high = middle - 1
+        logger.warning(f"Prompt header cut from {len(header)} to {low} characters to fit {max_tokens} tokens")
+        return header[:low]
+
+_shared_assembler: Optional[ContextAssembler] = None
+_shared_assembler_lock = threading.Lock()
+
+def get_context_assembler() -> ContextAssembler:
+    """Get the process-wide context assembler"""
+    global _shared_assembler
+    with _shared_assembler_lock:
+        if _shared_assembler is None:
+            _shared_assembler = ContextAssembler()
+        return _shared_assembler
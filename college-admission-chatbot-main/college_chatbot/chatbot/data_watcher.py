@@ -0,0 +1,73 @@
+import threading
+from typing import Dict, Optional, Tuple
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class DataFileWatcher:
+    """Polls knowledge data files and hot-reloads the knowledge base when they change"""
+    
+    def __init__(self, knowledge_base, interval: float = 2.0):
+        """
+        Initialize the watcher
+        
+        Args:
+            knowledge_base: KnowledgeBase whose data files are watched
+            interval: Seconds between checks
+        """
+        self.knowledge_base = knowledge_base
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._signatures = self._scan()
+    
+    def _scan(self) -> Dict[str, Optional[Tuple[int, int]]]:
+        """Get the (mtime, size) signature of each data file, None if missing"""
+        signatures = {}
+        for data_type in self.knowledge_base.DATA_FILES:
+            try:
+                stat = self.knowledge_base.data_path(data_type).stat()
+                signatures[data_type] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                signatures[data_type] = None
+        return signatures
+    
+    def check(self) -> bool:
+        """Reload changed data files once; returns True if the knowledge base changed"""
+        signatures = self._scan()
+        changed = [data_type for data_type, signature in signatures.items()
+                   if signature != self._signatures.get(data_type)]
+        if not changed:
+            return False
+        
+        logger.info(f"Data files changed: {', '.join(changed)}")
+        try:
+            updated = self.knowledge_base.reload_data(changed, raise_errors=True)
+        except Exception as e:
+            # Signatures are kept, so the reload is retried on the next check
+            logger.error(f"Error reloading {', '.join(changed)}, retrying on the next check: {e}")
+            return False
+        self._signatures = signatures
+        return updated
+    
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Error checking data files: {e}")
+    
+    def start(self):
+        """Start polling in a daemon thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="data-file-watcher", daemon=True)
+            self._thread.start()
+    
+    def stop(self):
+        """Stop polling and wait for the thread to exit"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
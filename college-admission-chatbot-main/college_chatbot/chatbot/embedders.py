@@ -0,0 +1,133 @@
+import hashlib
+import re
+from typing import Dict, List
+import numpy as np
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class EmbeddingBackend:
+    """Base class for turning texts into embedding vectors"""
+    
+    name = "base"
+    
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+    
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode texts
+        
+        Args:
+            texts: Texts to encode
+            
+        Returns:
+            float32 matrix with one (unnormalized) row per text
+        """
+        raise NotImplementedError
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    """sentence-transformers model in PyTorch (downloaded on first use)"""
+    
+    name = "sentence-transformers"
+    
+    def __init__(self, model_name: str):
+        super().__init__(model_name)
+        from sentence_transformers import SentenceTransformer
+        self.model = self._load(SentenceTransformer, model_name)
+    
+    def _load(self, model_class, model_name: str):
+        return model_class(model_name)
+    
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(self.model.encode(texts), dtype=np.float32)
+
+class Int8Backend(SentenceTransformerBackend):
+    """sentence-transformers model with its linear layers dynamically quantized to int8 for CPU"""
+    
+    name = "int8"
+    
+    def _load(self, model_class, model_name: str):
+        import torch
+        model = model_class(model_name, device="cpu")
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+class OnnxBackend(SentenceTransformerBackend):
+    """sentence-transformers model exported to ONNX Runtime (needs optimum and onnxruntime)"""
+    
+    name = "onnx"
+    
+    def _load(self, model_class, model_name: str):
+        # sentence-transformers >= 3.2 exports the model on first load
+        return model_class(model_name, backend="onnx", device="cpu")
+
+class HashingBackend(EmbeddingBackend):
+    """Deterministic hashed bag of words and bigrams; no model download or extra dependency
+    
+    Similar wording gives similar vectors, but there is no notion of synonyms, so
+    it suits tests and air-gapped deployments rather than production retrieval.
+    """
+    
+    name = "hashing"
+    
+    TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+    
+    DIMENSION = 384
+    
+    def __init__(self, model_name: str = "hashing"):
+        super().__init__(model_name)
+        self.dimension = self.DIMENSION
+        self._features: Dict[str, tuple] = {}
+    
+    def _feature(self, term: str) -> tuple:
+        """Bucket and sign of a term; a stable digest keeps vectors identical across processes"""
+        feature = self._features.get(term)
+        if feature is None:
+            digest = int.from_bytes(hashlib.blake2b(term.encode('utf-8'), digest_size=8).digest(), 'little')
+            feature = (digest % self.dimension, 1.0 if (digest >> 63) & 1 else -1.0)
+            if len(self._features) < 1_000_000:
+                self._features[term] = feature
+        return feature
+    
+    def encode(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = self.TOKEN_PATTERN.findall(text.lower())
+            terms = tokens + [f"{first} {second}" for first, second in zip(tokens, tokens[1:])]
+            for term in terms:
+                bucket, sign = self._feature(term)
+                vectors[row, bucket] += sign
+        # Sublinear term frequency so repeated words do not dominate
+        return np.sign(vectors) * np.log1p(np.abs(vectors))
+
+BACKENDS = {
+    SentenceTransformerBackend.name: SentenceTransformerBackend,
+    Int8Backend.name: Int8Backend,
+    OnnxBackend.name: OnnxBackend,
+    HashingBackend.name: HashingBackend
+}
+
+def embedding_identifier(backend: str, model_name: str) -> str:
+    """Name of the vector space a backend produces; caches and stores never mix identifiers"""
+    if backend == HashingBackend.name:
+        return f"hashing-{HashingBackend.DIMENSION}"
+    return f"{model_name}@{backend}"
+
+def create_embedding_backend(backend: str, model_name: str) -> EmbeddingBackend:
+    """
+    Create an embedding backend
+    
+    Args:
+        backend: 'sentence-transformers', 'int8', 'onnx' or 'hashing'
+        model_name: Model to load (ignored by the hashing backend)
+        
+    Returns:
+        Loaded backend
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {backend}")
+    if backend == HashingBackend.name:
+        return HashingBackend()
+    return BACKENDS[backend](model_name)
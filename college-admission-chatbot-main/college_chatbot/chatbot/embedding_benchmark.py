@@ -0,0 +1,80 @@
+"""Embedding backend latency benchmark: run `python -m chatbot.embedding_benchmark [backend ...]` from the app directory"""
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config import Config
+from .embedders import BACKENDS, create_embedding_backend
+
+SAMPLE_QUERIES = [
+    "What are the admission requirements?",
+    "When is the application deadline for fall?",
+    "How much is tuition for international students?",
+    "Do you offer a Computer Science program?",
+    "Is financial aid available?",
+    "What scholarships can I apply for?",
+    "How do I contact the admissions office?",
+    "Can I visit the campus?"
+]
+
+def benchmark_backend(backend: str, model_name: str = Config.EMBEDDING_MODEL,
+                      queries: List[str] = SAMPLE_QUERIES, repeats: int = 20) -> Dict[str, float]:
+    """
+    Measure one backend
+    
+    Args:
+        backend: Embedding backend name
+        model_name: Model the backend loads
+        queries: Queries encoded one at a time, as at search time
+        repeats: Passes over the queries
+        
+    Returns:
+        Load time, per-query p50/p95 latency in milliseconds and batch throughput
+    """
+    start = time.perf_counter()
+    embedder = create_embedding_backend(backend, model_name)
+    load_ms = (time.perf_counter() - start) * 1000
+    # The first call initializes lazy state, so it is not timed
+    embedder.encode(queries[:1])
+    
+    latencies = []
+    for _ in range(repeats):
+        for query in queries:
+            start = time.perf_counter()
+            embedder.encode([query])
+            latencies.append((time.perf_counter() - start) * 1000)
+    
+    batch = queries * repeats
+    start = time.perf_counter()
+    embedder.encode(batch)
+    batch_seconds = time.perf_counter() - start
+    
+    return {
+        'load_ms': load_ms,
+        'p50_ms': statistics.median(latencies),
+        'p95_ms': statistics.quantiles(latencies, n=20)[18],
+        'batch_texts_per_sec': len(batch) / batch_seconds if batch_seconds > 0 else float('inf')
+    }
+
+def run_benchmark(backends: Optional[List[str]] = None, repeats: int = 20) -> Dict[str, Optional[Dict[str, float]]]:
+    """Benchmark backends (all by default), printing a comparison; unavailable ones are reported as None"""
+    results = {}
+    print(f"{'backend':<22} {'load ms':>9} {'p50 ms':>8} {'p95 ms':>8} {'texts/sec':>10}")
+    for backend in backends or list(BACKENDS):
+        try:
+            stats = benchmark_backend(backend, repeats=repeats)
+        except Exception as e:
+            results[backend] = None
+            print(f"{backend:<22} unavailable: {e}")
+            continue
+        results[backend] = stats
+        print(f"{backend:<22} {stats['load_ms']:9.0f} {stats['p50_ms']:8.2f} {stats['p95_ms']:8.2f} "
+              f"{stats['batch_texts_per_sec']:10.0f}")
+    return results
+
+if __name__ == "__main__":
+    run_benchmark(sys.argv[1:] or None)
@@ -0,0 +1,145 @@
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import numpy as np
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class EmbeddingCache:
+    """On-disk embedding store keyed by model name and the content hash of each text"""
+    
+    FORMAT_VERSION = 1
+    
+    def __init__(self, cache_dir: str, model_name: str, namespace: str = "default"):
+        """
+        Initialize the embedding cache
+        
+        Args:
+            cache_dir: Directory where cache files are written
+            model_name: Name of the embedding model; part of the cache key
+            namespace: Separates caches of different knowledge bases sharing cache_dir
+        """
+        self.cache_dir = Path(cache_dir)
+        self.model_name = model_name
+        safe_name = re.sub(r'[^\w.-]', '_', f"{model_name}-{namespace}")
+        self.cache_path = self.cache_dir / f"embeddings_{safe_name}.npz"
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def hash_text(text: str) -> str:
+        """Return the content hash used as the cache key of a text"""
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+    
+    def _load(self) -> Dict[str, np.ndarray]:
+        """Load cached vectors, discarding the file if it is corrupt or stale"""
+        if not self.cache_path.exists():
+            return {}
+        
+        try:
+            with np.load(self.cache_path, allow_pickle=False) as cached:
+                format_version = int(cached['format_version'])
+                model_name = str(cached['model_name'])
+                hashes = cached['hashes']
+                vectors = cached['vectors']
+            
+            if format_version != self.FORMAT_VERSION or model_name != self.model_name:
+                raise ValueError("cache was written by a different format or model")
+            if vectors.ndim != 2 or len(hashes) != len(vectors):
+                raise ValueError("hash and vector counts do not match")
+            if not np.all(np.isfinite(vectors)):
+                raise ValueError("cache contains non-finite values")
+            
+            return {str(text_hash): vectors[i] for i, text_hash in enumerate(hashes)}
+            
+        except Exception as e:
+            logger.warning(f"Discarding invalid embedding cache {self.cache_path}: {e}")
+            self._remove()
+            return {}
+    
+    def _save(self, hashes: List[str], vectors: np.ndarray):
+        """Atomically write the cache file"""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    np.savez(
+                        f,
+                        format_version=np.array(self.FORMAT_VERSION),
+                        model_name=np.array(self.model_name),
+                        hashes=np.array(hashes),
+                        vectors=vectors
+                    )
+                os.replace(tmp_path, self.cache_path)
+            except Exception:
+                os.unlink(tmp_path)
+                raise
+        except Exception as e:
+            logger.warning(f"Could not write embedding cache {self.cache_path}: {e}")
+    
+    def _remove(self):
+        """Delete the cache file if present"""
+        try:
+            self.cache_path.unlink()
+        except OSError:
+            pass
+    
+    def get_embeddings(self, texts: List[str], encode_fn: Callable[[List[str]], np.ndarray],
+                       prune: bool = True) -> np.ndarray:
+        """
+        Get embeddings for texts, encoding only entries missing from the cache
+        
+        Args:
+            texts: Texts to embed
+            encode_fn: Function encoding a list of texts into a 2-D array
+            prune: Drop cached entries not among texts; disable for partial updates
+            
+        Returns:
+            Array of embeddings in the same order as texts
+        """
+        cached = self._load()
+        hashes = [self.hash_text(text) for text in texts]
+        
+        missing: Dict[str, str] = {}
+        for text, text_hash in zip(texts, hashes):
+            if text_hash not in cached and text_hash not in missing:
+                missing[text_hash] = text
+        
+        hits = sum(1 for text_hash in hashes if text_hash in cached)
+        
+        if missing:
+            encoded = np.asarray(encode_fn(list(missing.values())))
+            dimension: Optional[int] = next(iter(cached.values())).shape[0] if cached else None
+            if dimension is not None and encoded.shape[1] != dimension:
+                # The model output changed under the same name; the cache is stale
+                logger.warning("Cached embedding dimension changed, rebuilding embedding cache")
+                self._remove()
+                hits = 0
+                missing = dict(zip(hashes, texts))
+                encoded = np.asarray(encode_fn(list(missing.values())))
+                cached = {}
+            for text_hash, vector in zip(missing, encoded):
+                cached[text_hash] = vector
+        
+        self.hits += hits
+        self.misses += len(hashes) - hits
+        logger.info(f"Embedding cache: {hits} hits, {len(hashes) - hits} misses")
+        
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        
+        embeddings = np.stack([cached[text_hash] for text_hash in hashes])
+        
+        # Only rewrite the file when entries were added or became stale
+        unique_hashes = list(dict.fromkeys(hashes)) if prune else list(cached)
+        if missing or len(cached) != len(unique_hashes):
+            self._save(unique_hashes, np.stack([cached[text_hash] for text_hash in unique_hashes]))
+        
+        return embeddings
@@ -0,0 +1,214 @@
+import json
+import os
+import shutil
+import tempfile
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class RecordTable(Sequence):
+    """Read-only table of JSON records stored one per line, decoded on access"""
+    
+    def __init__(self, records_path: Path, offsets_path: Path, count: int):
+        # Both files are memory-mapped so worker processes share their pages
+        self._data = np.memmap(records_path, dtype=np.uint8, mode='r') if count else np.empty(0, np.uint8)
+        self._offsets = np.memmap(offsets_path, dtype=np.int64, mode='r', shape=(count + 1,))
+        self._count = count
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("record index out of range")
+        start, end = int(self._offsets[index]), int(self._offsets[index + 1])
+        return json.loads(self._data[start:end].tobytes().decode('utf-8'))
+    
+    def column(self, field: str) -> "RecordColumn":
+        """Lazy view of one field of every record"""
+        return RecordColumn(self, field)
+
+class RecordColumn(Sequence):
+    """Lazy view of one field of a RecordTable"""
+    
+    def __init__(self, table: RecordTable, field: str):
+        self._table = table
+        self._field = field
+    
+    def __len__(self) -> int:
+        return len(self._table)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [record[self._field] for record in self._table[index]]
+        return self._table[index][self._field]
+
+class EmbeddingStore:
+    """Embedding matrix and metadata table on disk, shared between processes via np.memmap
+    
+    Each knowledge base version is written to its own subdirectory and published by
+    atomically replacing a CURRENT pointer file, so readers never open a partial store.
+    """
+    
+    # Version 2 adds the FAQ category to the metadata
+    FORMAT_VERSION = 2
+    
+    def __init__(self, path: Path, manifest: Dict[str, Any]):
+        self.path = path
+        self.manifest = manifest
+        self.version = manifest['version']
+        count, dimension = manifest['count'], manifest['dimension']
+        
+        # Pages are loaded lazily by the OS on first access and shared through the page cache
+        self.embeddings = np.memmap(path / "embeddings.f32", dtype=np.float32, mode='r',
+                                    shape=(count, dimension)) if count and dimension else np.empty((0, dimension), np.float32)
+        self.records = RecordTable(path / "records.jsonl", path / "offsets.i64", count)
+    
+    @property
+    def ids(self) -> RecordColumn:
+        return self.records.column('id')
+    
+    @property
+    def texts(self) -> RecordColumn:
+        return self.records.column('text')
+    
+    @property
+    def metadata(self) -> RecordColumn:
+        return self.records.column('metadata')
+    
+    @classmethod
+    def open(cls, store_dir: Path, version: Optional[str] = None) -> Optional["EmbeddingStore"]:
+        """
+        Open the current store
+        
+        Args:
+            store_dir: Directory the store was written to
+            version: Required knowledge base version, or None to accept any
+            
+        Returns:
+            The store, or None if it is missing, corrupt or of another version
+        """
+        store_dir = Path(store_dir)
+        try:
+            current = (store_dir / "CURRENT").read_text(encoding='utf-8').strip()
+            path = store_dir / current
+            with open(path / "manifest.json", 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('format_version') != cls.FORMAT_VERSION:
+                return None
+            if version is not None and manifest.get('version') != version:
+                return None
+            store = cls(path, manifest)
+            logger.info(f"Opened embedding store {path} ({manifest['count']} entries)")
+            return store
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Could not open embedding store in {store_dir}: {e}")
+            return None
+    
+    @classmethod
+    def write(cls, store_dir: Path, version: str, model_name: str, ids: List[str], texts: List[str],
+              metadata: List[Dict], embeddings: np.ndarray) -> Path:
+        """
+        Write a store for one knowledge base version and make it current
+        
+        Args:
+            store_dir: Directory holding the store versions
+            version: Knowledge base version
+            model_name: Embedding model the vectors come from
+            ids: Entry ids
+            texts: Entry texts
+            metadata: Entry metadata (JSON serializable)
+            embeddings: Normalized float32 embedding matrix
+            
+        Returns:
+            Path of the written version directory
+        """
+        return cls.write_batches(store_dir, version, model_name, [(ids, texts, metadata, embeddings)])
+    
+    @classmethod
+    def write_batches(cls, store_dir: Path, version: str, model_name: str,
+                      batches: Iterable[Tuple[List[str], List[str], List[Dict], np.ndarray]]) -> Path:
+        """
+        Write a store from batches of entries and make it current
+        
+        Each batch is appended to the files as it arrives, so memory use is bounded
+        by the batch size rather than the number of entries.
+        
+        Args:
+            store_dir: Directory holding the store versions
+            version: Knowledge base version
+            model_name: Embedding model the vectors come from
+            batches: Iterable of (ids, texts, metadata, embeddings) batches
+            
+        Returns:
+            Path of the written version directory
+        """
+        store_dir = Path(store_dir)
+        store_dir.mkdir(parents=True, exist_ok=True)
+        
+        tmp_dir = Path(tempfile.mkdtemp(dir=store_dir, prefix=f".{version}-"))
+        count, dimension, position = 0, 0, 0
+        try:
+            with open(tmp_dir / "embeddings.f32", 'wb') as vectors_file, \
+                    open(tmp_dir / "records.jsonl", 'wb') as records_file, \
+                    open(tmp_dir / "offsets.i64", 'wb') as offsets_file:
+                offsets_file.write(np.int64(0).tobytes())
+                for ids, texts, metadata, embeddings in batches:
+                    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+                    if embeddings.ndim == 2 and embeddings.shape[1]:
+                        if dimension and embeddings.shape[1] != dimension:
+                            raise ValueError(f"Embedding dimension changed from {dimension} to {embeddings.shape[1]}")
+                        dimension = int(embeddings.shape[1])
+                    vectors_file.write(embeddings.tobytes())
+                    
+                    offsets = []
+                    for entry_id, text, meta in zip(ids, texts, metadata):
+                        line = json.dumps({'id': entry_id, 'text': text, 'metadata': meta},
+                                          ensure_ascii=False).encode('utf-8') + b'\n'
+                        records_file.write(line)
+                        position += len(line)
+                        offsets.append(position)
+                    offsets_file.write(np.asarray(offsets, dtype=np.int64).tobytes())
+                    count += len(offsets)
+            
+            with open(tmp_dir / "manifest.json", 'w', encoding='utf-8') as f:
+                json.dump({
+                    'format_version': cls.FORMAT_VERSION,
+                    'version': version,
+                    'model_name': model_name,
+                    'count': count,
+                    'dimension': dimension
+                }, f)
+            
+            target = store_dir / version
+            if target.exists():
+                shutil.rmtree(target)
+            os.replace(tmp_dir, target)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        
+        fd, tmp_pointer = tempfile.mkstemp(dir=store_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(version)
+        os.replace(tmp_pointer, store_dir / "CURRENT")
+        
+        # Processes that still map an old version keep their pages until they close it
+        for old in store_dir.iterdir():
+            if old.is_dir() and old.name != version and not old.name.startswith('.'):
+                shutil.rmtree(old, ignore_errors=True)
+        
+        logger.info(f"Wrote embedding store {target} ({count} entries)")
+        return target
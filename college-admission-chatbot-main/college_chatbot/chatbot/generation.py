@@ -0,0 +1,454 @@
+import queue
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import logging
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config import Config
+from .retrieval import LatencyTracker
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class GenerationBackend:
+    """Base class for local text generation models"""
+    
+    name = "base"
+    
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+    
+    def generate(self, prompts: List[str], max_new_tokens: int, temperature: float, top_p: float,
+                 on_text: Optional[Callable[[int, str], None]] = None,
+                 stop: Optional[Callable[[int], bool]] = None) -> List[str]:
+        """
+        Generate one completion per prompt in a single batch
+        
+        Args:
+            prompts: Prompts of the batch
+            max_new_tokens: Tokens generated at most per prompt
+            temperature: Sampling temperature; 0 decodes greedily
+            top_p: Nucleus sampling probability mass
+            on_text: Called with (row, new text) as each completion is decoded
+            stop: Called with a row at each decode step; a row it returns True for
+                is no longer decoded, and the batch ends once no row is left
+            
+        Returns:
+            Completions in the order of prompts; a stopped row's is cut off
+        """
+        raise NotImplementedError
+
+class _RowStreamer:
+    """Streamer for model.generate that decodes each row of a batch as its tokens arrive"""
+    
+    def __init__(self, tokenizer, rows: int, on_text: Callable[[int, str], None]):
+        self.tokenizer = tokenizer
+        self.on_text = on_text
+        self.tokens: List[List[int]] = [[] for _ in range(rows)]
+        self.sent = [0] * rows
+        self.done = [False] * rows
+        self.prompt_seen = False
+    
+    def put(self, value):
+        # The first call carries the prompt ids, later ones one new token per row
+        if not self.prompt_seen:
+            self.prompt_seen = True
+            return
+        for row, token in enumerate(value.reshape(-1).tolist()):
+            if self.done[row]:
+                continue
+            # Finished rows are padded with the EOS token
+            if token == self.tokenizer.eos_token_id:
+                self.done[row] = True
+                continue
+            self.tokens[row].append(token)
+            text = self.tokenizer.decode(self.tokens[row], skip_special_tokens=True)
+            # A character split over several tokens decodes to U+FFFD until it is complete
+            if len(text) > self.sent[row] and not text.endswith('\ufffd'):
+                self.on_text(row, text[self.sent[row]:])
+                self.sent[row] = len(text)
+    
+    def end(self):
+        pass
+
+def _stop_criteria(stopping_criteria_class, torch, stop: Callable[[int], bool], rows: int):
+    """Stopping criteria for model.generate that finishes the rows stop returns True for"""
+    class StoppedRows(stopping_criteria_class):
+        def __call__(self, input_ids, scores, **kwargs):
+            return torch.tensor([stop(row) for row in range(rows)], dtype=torch.bool, device=input_ids.device)
+    
+    return StoppedRows()
+
+class TransformersBackend(GenerationBackend):
+    """Hugging Face causal language model on CPU (e.g. Config.MODEL_NAME)"""
+    
+    name = "transformers"
+    
+    def __init__(self, model_name: str):
+        super().__init__(model_name)
+        import torch
+        from transformers import AutoModelForCausalLM, AutoTokenizer, StoppingCriteria, StoppingCriteriaList
+        self._torch = torch
+        self._stopping_criteria = (StoppingCriteria, StoppingCriteriaList)
+        # Prompts are padded and truncated on the left so every row ends where generation starts
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name, padding_side='left', truncation_side='left')
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        self.model = AutoModelForCausalLM.from_pretrained(model_name)
+        self.model.to('cpu')
+        self.model.eval()
+        self.max_positions = getattr(self.model.config, 'max_position_embeddings', 1024)
+    
+    def generate(self, prompts: List[str], max_new_tokens: int, temperature: float, top_p: float,
+                 on_text: Optional[Callable[[int, str], None]] = None,
+                 stop: Optional[Callable[[int], bool]] = None) -> List[str]:
+        # Dialogue models such as DialoGPT end each turn with the EOS token
+        texts = [prompt + self.tokenizer.eos_token for prompt in prompts]
+        inputs = self.tokenizer(texts, return_tensors='pt', padding=True, truncation=True,
+                                max_length=max(1, self.max_positions - max_new_tokens))
+        sampling = {'do_sample': True, 'temperature': temperature, 'top_p': top_p} if temperature > 0 else {'do_sample': False}
+        streamer = _RowStreamer(self.tokenizer, len(prompts), on_text) if on_text is not None else None
+        if stop is not None:
+            stopping_criteria_class, stopping_criteria_list = self._stopping_criteria
+            sampling['stopping_criteria'] = stopping_criteria_list([
+                _stop_criteria(stopping_criteria_class, self._torch, stop, len(prompts))])
+        with self._torch.inference_mode():
+            # use_cache keeps each row's attention keys/values, so a decode step only processes its new token
+            outputs = self.model.generate(**inputs, max_new_tokens=max_new_tokens, use_cache=True,
+                                          pad_token_id=self.tokenizer.pad_token_id, streamer=streamer, **sampling)
+        new_tokens = outputs[:, inputs['input_ids'].shape[1]:]
+        return [text.strip() for text in self.tokenizer.batch_decode(new_tokens, skip_special_tokens=True)]
+
+class StubGenerationBackend(GenerationBackend):
+    """Tiny deterministic local model for tests, with an optional simulated cost per batch and per token"""
+    
+    name = "stub"
+    
+    def __init__(self, model_name: str = "stub", batch_latency: float = 0.0, token_latency: float = 0.0):
+        super().__init__(model_name)
+        self.batch_latency = batch_latency
+        self.token_latency = token_latency
+    
+    def generate(self, prompts: List[str], max_new_tokens: int, temperature: float, top_p: float,
+                 on_text: Optional[Callable[[int, str], None]] = None,
+                 stop: Optional[Callable[[int], bool]] = None) -> List[str]:
+        time.sleep(self.batch_latency)
+        outputs = [f"Thanks for your question ({' '.join(prompt.split()[:12])}). "
+                   f"Our admission office can give you the details." for prompt in prompts]
+        if on_text is None:
+            time.sleep(self.token_latency * max_new_tokens)
+            return outputs
+        
+        # One word per row and decode step, spread over the same total time
+        words = [re.findall(r'\S+\s*', output) for output in outputs]
+        steps = max(len(row_words) for row_words in words)
+        decoded = [''] * len(prompts)
+        for step in range(steps):
+            rows = [row for row, row_words in enumerate(words)
+                    if step < len(row_words) and not (stop is not None and stop(row))]
+            if not rows:
+                break
+            time.sleep(self.token_latency * max_new_tokens / steps)
+            for row in rows:
+                decoded[row] += words[row][step]
+                on_text(row, words[row][step])
+        return [text.strip() for text in decoded]
+
+GENERATION_BACKENDS = {
+    TransformersBackend.name: TransformersBackend,
+    StubGenerationBackend.name: StubGenerationBackend
+}
+
+def create_generation_backend(backend: str, model_name: str) -> GenerationBackend:
+    """Create a generation backend ('transformers' or 'stub')"""
+    if backend not in GENERATION_BACKENDS:
+        raise ValueError(f"Unknown generation backend: {backend}")
+    return GENERATION_BACKENDS[backend](model_name)
+
+def _depth_bucket(depth: int) -> str:
+    """Power-of-two histogram bucket: 1, 2-3, 4-7, ..."""
+    low = 1 << (max(depth, 1).bit_length() - 1)
+    return str(low) if low == 1 else f"{low}-{2 * low - 1}"
+
+class _Request:
+    __slots__ = ('prompt', 'future', 'enqueued', 'on_text', 'cancelled')
+    
+    def __init__(self, prompt: str, on_text: Optional[Callable[[str], None]] = None):
+        self.prompt = prompt
+        self.future: Future = Future()
+        self.enqueued = time.perf_counter()
+        self.on_text = on_text
+        # Set when the caller left while the request was being generated
+        self.cancelled = False
+    
+    def cancel(self):
+        """Drop a queued request, or stop generating a running one at its next decode step"""
+        if not self.future.cancel():
+            self.cancelled = True
+
+class BatchScheduler:
+    """Collects generation requests from concurrent sessions into micro-batches
+    
+    A single worker thread owns the model. The oldest queued request waits at
+    most max_wait_ms for others to join its batch, so a lone request is barely
+    delayed while bursts are decoded together. The backend is loaded by the
+    worker on the first batch.
+    """
+    
+    def __init__(self, backend_factory: Callable[[], GenerationBackend],
+                 max_batch_size: int = Config.GENERATION_MAX_BATCH,
+                 max_wait_ms: float = Config.GENERATION_MAX_WAIT_MS,
+                 max_new_tokens: int = Config.MAX_TOKENS,
+                 temperature: float = Config.TEMPERATURE,
+                 top_p: float = Config.TOP_P):
+        """
+        Initialize the scheduler
+        
+        Args:
+            backend_factory: Creates the generation backend on first use
+            max_batch_size: Requests generated together at most
+            max_wait_ms: How long the oldest request waits for a batch to fill
+            max_new_tokens: Tokens generated at most per request
+            temperature: Sampling temperature
+            top_p: Nucleus sampling probability mass
+        """
+        self.backend_factory = backend_factory
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_new_tokens = max_new_tokens
+        self.temperature = temperature
+        self.top_p = top_p
+        self.latency = LatencyTracker()
+        self._queue: "queue.Queue[Optional[_Request]]" = queue.Queue()
+        self._backend: Optional[GenerationBackend] = None
+        self._backend_error: Optional[Exception] = None
+        self._thread: Optional[threading.Thread] = None
+        self._closed = threading.Event()
+        self._lock = threading.Lock()
+        self._batch_sizes: Counter = Counter()
+        self._queue_depths: Counter = Counter()
+        self._stats = {'requests': 0, 'batches': 0, 'errors': 0, 'cancelled': 0, 'wait_ms_total': 0.0}
+        # Statistics are updated by the worker and read by callers
+        self._stats_lock = threading.Lock()
+    
+    def submit(self, prompt: str, on_text: Optional[Callable[[str], None]] = None) -> Future:
+        """
+        Queue a prompt
+        
+        Args:
+            prompt: Prompt to complete
+            on_text: Called from the worker thread with each new piece of the completion
+            
+        Returns:
+            Future resolving to the whole completion
+        """
+        return self._submit(prompt, on_text).future
+    
+    def _submit(self, prompt: str, on_text: Optional[Callable[[str], None]] = None) -> _Request:
+        if self._closed.is_set():
+            raise RuntimeError("Generation scheduler is closed")
+        self._ensure_started()
+        request = _Request(prompt, on_text)
+        self._queue.put(request)
+        return request
+    
+    def generate(self, prompt: str, timeout: Optional[float] = None) -> str:
+        """Generate a completion, waiting for its batch"""
+        return self.submit(prompt).result(timeout)
+    
+    def stream(self, prompt: str, timeout: Optional[float] = None) -> Iterator[str]:
+        """
+        Generate a completion as a stream of text pieces, yielded as they are decoded
+        
+        Args:
+            prompt: Prompt to complete
+            timeout: Seconds the whole stream may take
+            
+        Yields:
+            Pieces of the completion
+            
+        Raises:
+            TimeoutError: If the stream is not complete in time; the request is
+                dropped, or stopped at its next decode step, as it is when the
+                caller stops reading
+        """
+        pieces: "queue.Queue[Optional[str]]" = queue.Queue()
+        request = self._submit(prompt, on_text=pieces.put)
+        future = request.future
+        # Runs after the last piece was put, so it ends the stream
+        future.add_done_callback(lambda _: pieces.put(None))
+        expires = time.monotonic() + timeout if timeout is not None else None
+        try:
+            while True:
+                remaining = expires - time.monotonic() if expires is not None else None
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("Generation stream timed out")
+                try:
+                    piece = pieces.get(timeout=remaining)
+                except queue.Empty:
+                    raise TimeoutError("Generation stream timed out")
+                if piece is None:
+                    break
+                yield piece
+            # Raises the error of a failed batch
+            future.result()
+        finally:
+            if not future.done():
+                request.cancel()
+    
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="generation-scheduler", daemon=True)
+                self._thread.start()
+    
+    def close(self):
+        """Stop the worker after the requests already queued"""
+        self._closed.set()
+        self._queue.put(None)
+    
+    def _collect(self) -> List[_Request]:
+        """Wait for a request, then gather more until the batch is full or the oldest has waited long enough"""
+        first = self._queue.get()
+        if first is None:
+            return []
+        batch = [first]
+        deadline = first.enqueued + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                break
+            batch.append(request)
+        
+        # Depth seen by this batch: its own requests plus those still waiting
+        depth = _depth_bucket(len(batch) + self._queue.qsize())
+        with self._stats_lock:
+            self._queue_depths[depth] += 1
+        return batch
+    
+    def _get_backend(self) -> GenerationBackend:
+        if self._backend is None:
+            if self._backend_error is not None:
+                raise self._backend_error
+            try:
+                with self.latency.measure('load'):
+                    self._backend = self.backend_factory()
+            except Exception as e:
+                # Loading is not retried on every batch
+                self._backend_error = e
+                raise
+        return self._backend
+    
+    def _run(self):
+        while True:
+            batch = self._collect()
+            # Requests whose caller gave up before they ran are dropped
+            runnable = [request for request in batch if request.future.set_running_or_notify_cancel()]
+            with self._stats_lock:
+                self._stats['cancelled'] += len(batch) - len(runnable)
+            if runnable:
+                self._generate_batch(runnable)
+            if self._closed.is_set() and self._queue.empty():
+                return
+    
+    def _generate_batch(self, batch: List[_Request]):
+        started = time.perf_counter()
+        with self._stats_lock:
+            self._stats['batches'] += 1
+            self._stats['requests'] += len(batch)
+            self._stats['wait_ms_total'] += sum(started - request.enqueued for request in batch) * 1000.0
+            self._batch_sizes[len(batch)] += 1
+        on_text = None
+        if any(request.on_text is not None for request in batch):
+            def on_text(row, text):
+                if batch[row].on_text is not None and not batch[row].cancelled:
+                    batch[row].on_text(text)
+        
+        def stop(row):
+            return batch[row].cancelled
+        
+        try:
+            backend = self._get_backend()
+            with self.latency.measure('batch'):
+                outputs = backend.generate([request.prompt for request in batch], self.max_new_tokens,
+                                           self.temperature, self.top_p, on_text, stop)
+        except Exception as e:
+            logger.error(f"Generation batch of {len(batch)} failed: {e}")
+            with self._stats_lock:
+                self._stats['errors'] += 1
+            for request in batch:
+                request.future.set_exception(e)
+            return
+        
+        with self._stats_lock:
+            self._stats['cancelled'] += sum(request.cancelled for request in batch)
+        for request, output in zip(batch, outputs):
+            request.future.set_result(output)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get request and batch counts, queue depth and batch size histograms, and latencies"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+            batch_sizes = dict(sorted(self._batch_sizes.items()))
+            queue_depths = dict(sorted(self._queue_depths.items(), key=lambda item: int(item[0].split('-')[0])))
+        wait_ms_total = stats.pop('wait_ms_total')
+        return {
+            **stats,
+            'queue_depth': self._queue.qsize(),
+            'mean_batch_size': stats['requests'] / stats['batches'] if stats['batches'] else 0.0,
+            'mean_wait_ms': wait_ms_total / stats['requests'] if stats['requests'] else 0.0,
+            'batch_size_histogram': batch_sizes,
+            'queue_depth_histogram': queue_depths,
+            'latency': self.latency.get_stats()
+        }
+
+_shared_scheduler: Optional[BatchScheduler] = None
+_shared_scheduler_lock = threading.Lock()
+
+def get_generation_scheduler() -> Optional[BatchScheduler]:
+    """Scheduler of Config.GENERATION_BACKEND shared by the process, or None when generation is disabled"""
+    global _shared_scheduler
+    if Config.GENERATION_BACKEND is None:
+        return None
+    with _shared_scheduler_lock:
+        if _shared_scheduler is None:
+            backend, model_name = Config.GENERATION_BACKEND, Config.MODEL_NAME
+            _shared_scheduler = BatchScheduler(lambda: create_generation_backend(backend, model_name))
+        return _shared_scheduler
+
+def run_load_test(sessions: int = 32, requests_per_session: int = 4, batch_latency: float = 0.05) -> Dict[str, Any]:
+    """Drive a scheduler over the stub model from concurrent sessions and return its statistics"""
+    scheduler = BatchScheduler(lambda: StubGenerationBackend(batch_latency=batch_latency))
+    
+    def session(index):
+        for turn in range(requests_per_session):
+            scheduler.generate(f"Session {index} question {turn}")
+    
+    threads = [threading.Thread(target=session, args=(index,)) for index in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    scheduler.close()
+    return scheduler.get_stats()
+
+if __name__ == "__main__":
+    # Scheduler check without a model: `python -m chatbot.generation` from the app directory
+    stats = run_load_test()
+    print(f"{stats['requests']} requests in {stats['batches']} batches (mean size {stats['mean_batch_size']:.1f}, "
+          f"mean wait {stats['mean_wait_ms']:.1f} ms)")
+    print(f"batch sizes: {stats['batch_size_histogram']}")
+    print(f"queue depths: {stats['queue_depth_histogram']}")
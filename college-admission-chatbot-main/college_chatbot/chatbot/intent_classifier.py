@@ -0,0 +1,95 @@
+import sys
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config import Config
+from .vector_utils import l2_normalize
+
+class IntentClassifier:
+    """Nearest-centroid intent classifier over sentence embeddings
+    
+    Each intent is the normalized mean embedding of its seed phrases, so
+    classifying a message is one matrix product with the (intents x dim)
+    centroid matrix. Messages already embedded for retrieval are classified
+    without encoding them again.
+    """
+    
+    def __init__(self, encode_fn: Callable[[List[str]], np.ndarray],
+                 seeds: Optional[Dict[str, List[str]]] = None,
+                 min_similarity: float = Config.INTENT_MIN_SIMILARITY):
+        """
+        Embed the seed phrases into centroids
+        
+        Args:
+            encode_fn: Embedding function of the retrieval model
+            seeds: Intent to labeled example phrases; defaults to Config.INTENT_SEEDS
+            min_similarity: Best centroid similarity below which no intent is returned
+        """
+        seeds = seeds if seeds is not None else Config.INTENT_SEEDS
+        self.encode_fn = encode_fn
+        self.min_similarity = min_similarity
+        self.intents = [intent for intent, phrases in seeds.items() if phrases]
+        
+        phrases = [phrase for intent in self.intents for phrase in seeds[intent]]
+        labels = np.repeat(np.arange(len(self.intents)), [len(seeds[intent]) for intent in self.intents])
+        vectors = l2_normalize(encode_fn(phrases))
+        
+        centroids = np.zeros((len(self.intents), vectors.shape[1]), dtype=np.float32)
+        np.add.at(centroids, labels, vectors)
+        self.centroids = l2_normalize(centroids)
+    
+    def scores(self, embeddings: np.ndarray) -> np.ndarray:
+        """Cosine similarity of each embedding (row) to each intent centroid (column)"""
+        return l2_normalize(np.atleast_2d(embeddings)) @ self.centroids.T
+    
+    def classify_embeddings(self, embeddings: np.ndarray) -> List[Tuple[Optional[str], float]]:
+        """
+        Classify embedded messages
+        
+        Args:
+            embeddings: One embedding per row (or a single 1-D embedding)
+            
+        Returns:
+            (intent, similarity) per message; intent is None below min_similarity
+        """
+        scores = self.scores(embeddings)
+        best = scores.argmax(axis=1)
+        best_scores = scores[np.arange(len(scores)), best]
+        return [(self.intents[index] if score >= self.min_similarity else None, float(score))
+                for index, score in zip(best.tolist(), best_scores.tolist())]
+    
+    def classify(self, embedding: np.ndarray) -> Tuple[Optional[str], float]:
+        """Classify one embedded message"""
+        return self.classify_embeddings(embedding)[0]
+    
+    def classify_batch(self, texts: List[str], batch_size: int = Config.INGEST_BATCH_SIZE) -> List[Tuple[Optional[str], float]]:
+        """
+        Classify raw messages, e.g. a chat log, encoding them in batches
+        
+        Args:
+            texts: Messages to classify
+            batch_size: Messages encoded per call
+            
+        Returns:
+            (intent, similarity) per message, in order
+        """
+        results = []
+        for start in range(0, len(texts), batch_size):
+            results.extend(self.classify_embeddings(self.encode_fn(texts[start:start + batch_size])))
+        return results
+
+# Centroids depend only on the vector space, so they are shared like the embedding models
+_shared_classifiers: Dict[str, IntentClassifier] = {}
+_shared_classifiers_lock = threading.Lock()
+
+def get_shared_intent_classifier(embedding_id: str, encode_fn: Callable[[List[str]], np.ndarray]) -> IntentClassifier:
+    """Build the classifier of a vector space once per process and return the shared instance"""
+    with _shared_classifiers_lock:
+        if embedding_id not in _shared_classifiers:
+            _shared_classifiers[embedding_id] = IntentClassifier(encode_fn)
+        return _shared_classifiers[embedding_id]
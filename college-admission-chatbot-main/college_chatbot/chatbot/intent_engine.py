@@ -0,0 +1,101 @@
+import re
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config import Config
+
+class IntentEngine:
+    """Keyword intent matcher compiled into a single regular expression
+    
+    All phrases of all intents are alternatives of one pattern, longest first and
+    bounded by word boundaries, so a message is scanned once whatever the size of
+    the vocabulary, "application date" wins over "application", and "hi" does not
+    match inside "this".
+    
+    A phrase counts less when its words are shared by several intents: "application"
+    is also part of a deadlines phrase, so in "What is the application deadline?"
+    the unshared "deadline" decides.
+    """
+    
+    def __init__(self, vocabulary: Dict[str, List[str]]):
+        """
+        Compile a vocabulary
+        
+        Args:
+            vocabulary: Intent to its keywords and phrases; earlier intents win ties
+        """
+        self.intents = list(vocabulary)
+        # Phrase -> intents listing it
+        self._phrases: Dict[str, List[str]] = {}
+        # Word -> intents with a phrase containing it
+        word_intents: Dict[str, Set[str]] = {}
+        for intent, phrases in vocabulary.items():
+            for phrase in phrases:
+                phrase = self._normalize(phrase)
+                if phrase:
+                    self._phrases.setdefault(phrase, []).append(intent)
+                    for word in phrase.split():
+                        word_intents.setdefault(word, set()).add(intent)
+        
+        # Phrase -> its specificity: 1 over the number of intents sharing its most specific word
+        self._weights: Dict[str, float] = {
+            phrase: 1.0 / min(len(word_intents[word]) for word in phrase.split())
+            for phrase in self._phrases
+        }
+        
+        alternatives = [r'\s+'.join(re.escape(word) for word in phrase.split())
+                        for phrase in sorted(self._phrases, key=len, reverse=True)]
+        self._pattern = re.compile(r'\b(' + '|'.join(alternatives) + r')\b', re.IGNORECASE) if alternatives else None
+    
+    @staticmethod
+    def _normalize(phrase: str) -> str:
+        return ' '.join(phrase.lower().split())
+    
+    def match(self, text: str) -> Dict[str, float]:
+        """
+        Find every intent a message mentions
+        
+        Args:
+            text: Message to scan
+            
+        Returns:
+            Matched intents with the specificity-weighted number of distinct phrases found for each
+        """
+        if self._pattern is None:
+            return {}
+        found = {self._normalize(match.group(1)) for match in self._pattern.finditer(text)}
+        scores: Dict[str, float] = {}
+        for phrase in found:
+            for intent in self._phrases[phrase]:
+                scores[intent] = scores.get(intent, 0) + self._weights[phrase]
+        return scores
+    
+    def best(self, scores: Dict[str, float], candidates: Optional[Iterable[str]] = None,
+             default: str = 'general') -> str:
+        """Highest scoring intent among candidates (all intents by default), in vocabulary order on ties"""
+        allowed = set(candidates) if candidates is not None else None
+        best_intent, best_score = default, 0
+        for intent in self.intents:
+            if (allowed is None or intent in allowed) and scores.get(intent, 0) > best_score:
+                best_intent, best_score = intent, scores[intent]
+        return best_intent
+    
+    def detect(self, text: str, candidates: Optional[Iterable[str]] = None, default: str = 'general') -> str:
+        """Highest scoring intent of a message"""
+        return self.best(self.match(text), candidates, default)
+
+_shared_engine: Optional[IntentEngine] = None
+_shared_engine_lock = threading.Lock()
+
+def get_intent_engine() -> IntentEngine:
+    """Compile Config.INTENTS once per process and return the shared engine"""
+    global _shared_engine
+    with _shared_engine_lock:
+        if _shared_engine is None:
+            _shared_engine = IntentEngine(Config.INTENTS)
+        return _shared_engine
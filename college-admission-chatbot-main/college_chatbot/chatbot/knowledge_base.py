@@ -1,76 +1,237 @@
 import json
 import os
 import re
+import sys
+import hashlib
+import threading
+from collections import Counter
+from itertools import zip_longest
 from pathlib import Path
-from typing import List, Dict, Any, Optional
-from sentence_transformers import SentenceTransformer
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 import logging
 
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config import Config
+from .embedding_cache import EmbeddingCache
+from .vector_utils import l2_normalize
+from .query_cache import QueryCache, get_shared_query_cache
+from .answer_cache import SemanticAnswerCache, get_shared_answer_cache
+from .lexical_index import BM25Index
+from .retrieval import LatencyTracker, reciprocal_rank_fusion
+from .ann_index import VectorIndex, build_index
+from .embedding_store import EmbeddingStore
+from .program_index import PROGRAM_GROUPS, ProgramIndex, normalize_phrase
+from .streaming_loader import batched, iter_records
+from .metadata_filter import MetadataMasks, matches_filters, normalize_filters
+from .embedders import EmbeddingBackend, create_embedding_backend, embedding_identifier
+from .intent_classifier import IntentClassifier, get_shared_intent_classifier
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Embedding models are shared by every knowledge base in the process
+_shared_embedders: Dict[Tuple[str, str], EmbeddingBackend] = {}
+_shared_embedders_lock = threading.Lock()
+
+def get_shared_embedder(backend: str, model_name: str) -> EmbeddingBackend:
+    """Load an embedding backend once per process and return the shared instance"""
+    with _shared_embedders_lock:
+        if (backend, model_name) not in _shared_embedders:
+            _shared_embedders[(backend, model_name)] = create_embedding_backend(backend, model_name)
+        return _shared_embedders[(backend, model_name)]
+
+class IndexSnapshot:
+    """Immutable searchable state of the knowledge base
+    
+    Searches read a single snapshot reference, so updates build a new snapshot
+    in the background and swap it in without blocking or exposing partial state.
+    """
+    
+    def __init__(self, knowledge_data: Dict[str, Any], version: str, ids: List[str], texts: List[str],
+                 metadata: List[Dict], embeddings: np.ndarray, lexical_index: BM25Index,
+                 vector_index: Optional[VectorIndex], program_index: ProgramIndex):
+        self.knowledge_data = knowledge_data
+        self.version = version
+        self.ids = ids
+        self.texts = texts
+        self.metadata = metadata
+        self.embeddings = embeddings
+        self.lexical_index = lexical_index
+        self.vector_index = vector_index
+        self.program_index = program_index
+        self.masks = MetadataMasks(metadata)
+        self._entry_counts: Optional[Counter] = None
+        self._memory_usage: Optional[Dict[str, int]] = None
+    
+    def entry_counts(self) -> Counter:
+        """Number of entries per type, counted once per snapshot"""
+        if self._entry_counts is None:
+            self._entry_counts = Counter(entry_id.split(':', 1)[0] for entry_id in self.ids)
+        return self._entry_counts
+    
+    def memory_usage(self) -> Dict[str, int]:
+        """Estimated bytes this snapshot holds in memory, computed once per snapshot"""
+        if self._memory_usage is None:
+            # Memory-mapped vectors live in the page cache, which the OS can reclaim
+            mapped = isinstance(self.embeddings, np.memmap)
+            # Store-backed texts and metadata are decoded on access; in-memory ones are
+            # counted as the texts plus metadata built from the same strings
+            entries = 2 * sum(sys.getsizeof(text) for text in self.texts) if isinstance(self.texts, list) else 0
+            usage = {
+                'embeddings': 0 if mapped else int(self.embeddings.nbytes),
+                'mapped_embeddings': int(self.embeddings.nbytes) if mapped else 0,
+                'vector_index': self.vector_index.memory_bytes if self.vector_index is not None else 0,
+                'lexical_index': self.lexical_index.memory_bytes,
+                'entries': entries
+            }
+            usage['total'] = usage['embeddings'] + usage['vector_index'] + usage['lexical_index'] + entries
+            self._memory_usage = usage
+        return self._memory_usage
+
 class KnowledgeBase:
     """Knowledge base manager for the College Admission Chatbot"""
     
-    def __init__(self, data_dir: str = "data"):
+    # Minimum cosine similarity for a search result
+    MIN_SIMILARITY = 0.1
+    
+    # Data file of each knowledge category
+    DATA_FILES = {
+        'college_info': 'college_info.json',
+        'faqs': 'faqs.json',
+        'programs': 'programs.json'
+    }
+    
+    # Categories that are streamed from a .jsonl export or a large .json file
+    # instead of being held in memory; their section only records the source file
+    STREAMED_SECTIONS = ('faqs',)
+    STREAM_KEY = 'streamed_from'
+    # Ids of streamed records deleted through delete_entry; upserted records kept in
+    # the section replace streamed records with the same id
+    DELETED_KEY = 'deleted_ids'
+    # Subdirectory of the ingest store holding streamed entries without vectors,
+    # searched by keyword until the embedding model is loaded
+    TEXT_STORE_SUBDIR = 'text_only'
+    
+    def __init__(self, data_dir: str = "data", query_cache: Optional[QueryCache] = None,
+                 store_dir: Optional[str] = None, answer_cache: Optional[SemanticAnswerCache] = None):
         """
         Initialize the knowledge base
         
         Args:
             data_dir: Directory containing data files
+            query_cache: Query/result cache; defaults to the process-wide shared cache
+            store_dir: Memory-mapped embedding store shared between processes;
+                defaults to Config.EMBEDDING_STORE_DIR (None disables it)
+            answer_cache: Answers built from this knowledge base, dropped with the
+                version they came from; defaults to the process-wide shared cache
         """
         self.data_dir = Path(data_dir)
-        self.knowledge_data = {}
-        self.embeddings = {}
-        self.texts = []
-        self.metadata = []
+        self.retrieval_mode = Config.RETRIEVAL_MODE
+        self.latency = LatencyTracker()
+        self._snapshot: Optional[IndexSnapshot] = None
+        self._write_lock = threading.RLock()
+        self._watcher = None
         
-        # Initialize sentence transformer
-        try:
-            self.sentence_model = SentenceTransformer('all-MiniLM-L6-v2')
-        except Exception as e:
-            logger.error(f"Failed to load sentence transformer: {e}")
-            self.sentence_model = None
+        # The embedding model is loaded on first semantic search (or by
+        # load_model_in_background); keyword search works until then
+        self.model_name = Config.EMBEDDING_MODEL
+        self.embedding_backend = Config.EMBEDDING_BACKEND
+        # Caches, stores and versions are keyed by the vector space, not only the model name
+        self.embedding_id = embedding_identifier(self.embedding_backend, self.model_name)
+        self.embedder: Optional[EmbeddingBackend] = None
+        self._model_loaded = False
+        self._background_load = threading.Event()
+        
+        # Persistent embedding cache, namespaced per data directory
+        self.namespace = hashlib.sha1(str(self.data_dir.resolve()).encode('utf-8')).hexdigest()[:12]
+        self.embedding_cache = EmbeddingCache(Config.EMBEDDING_CACHE_DIR, self.embedding_id, self.namespace)
+        
+        store_dir = store_dir if store_dir is not None else Config.EMBEDDING_STORE_DIR
+        self.store_dir = Path(store_dir) / self.namespace if store_dir is not None else None
+        # Streamed data is always embedded into a store so it never has to fit in memory
+        self.ingest_dir = self.store_dir or Path(Config.INGEST_STORE_DIR) / self.namespace
+        
+        # Query embeddings and results are cached per knowledge base version
+        if query_cache is None:
+            query_cache = get_shared_query_cache(Config.QUERY_CACHE_SIZE, Config.QUERY_CACHE_TTL)
+        self.query_cache = query_cache
+        if answer_cache is None:
+            answer_cache = get_shared_answer_cache(Config.ANSWER_CACHE_SIZE, Config.ANSWER_CACHE_MAX_BYTES,
+                                                   Config.ANSWER_CACHE_MIN_SIMILARITY)
+        self.answer_cache = answer_cache
         
         # Load all data
-        self._load_data()
-        self._create_embeddings()
+        self._swap_snapshot(self._build_snapshot(self._load_data()))
+    
+    @property
+    def knowledge_data(self) -> Dict[str, Any]:
+        return self._snapshot.knowledge_data
+    
+    @property
+    def version(self) -> str:
+        return self._snapshot.version
     
-    def _load_data(self):
+    @property
+    def texts(self) -> List[str]:
+        return self._snapshot.texts
+    
+    @property
+    def metadata(self) -> List[Dict]:
+        return self._snapshot.metadata
+    
+    @property
+    def embeddings(self) -> np.ndarray:
+        return self._snapshot.embeddings
+    
+    @property
+    def lexical_index(self) -> BM25Index:
+        return self._snapshot.lexical_index
+    
+    @property
+    def vector_index(self) -> Optional[VectorIndex]:
+        return self._snapshot.vector_index
+    
+    def _load_data(self) -> Dict[str, Any]:
         """Load all data files from the data directory"""
         try:
-            # Load college info
-            college_info_path = self.data_dir / "college_info.json"
-            if college_info_path.exists():
-                with open(college_info_path, 'r', encoding='utf-8') as f:
-                    self.knowledge_data['college_info'] = json.load(f)
-            else:
-                self.knowledge_data['college_info'] = self._get_default_college_info()
-            
-            # Load FAQs
-            faqs_path = self.data_dir / "faqs.json"
-            if faqs_path.exists():
-                with open(faqs_path, 'r', encoding='utf-8') as f:
-                    self.knowledge_data['faqs'] = json.load(f)
-            else:
-                self.knowledge_data['faqs'] = self._get_default_faqs()
-            
-            # Load programs
-            programs_path = self.data_dir / "programs.json"
-            if programs_path.exists():
-                with open(programs_path, 'r', encoding='utf-8') as f:
-                    self.knowledge_data['programs'] = json.load(f)
-            else:
-                self.knowledge_data['programs'] = self._get_default_programs()
-            
+            knowledge_data = {data_type: self._read_data_file(data_type) for data_type in self.DATA_FILES}
             logger.info("Knowledge base data loaded successfully")
+            return knowledge_data
             
         except Exception as e:
             logger.error(f"Error loading data: {e}")
-            self._load_default_data()
+            return self._load_default_data()
+    
+    def data_path(self, data_type: str) -> Path:
+        """File a category is read from; a .jsonl export takes precedence over the .json file"""
+        path = self.data_dir / self.DATA_FILES[data_type]
+        jsonl_path = path.with_suffix('.jsonl')
+        if data_type in self.STREAMED_SECTIONS and jsonl_path.exists():
+            return jsonl_path
+        return path
+    
+    def _read_data_file(self, data_type: str) -> Dict[str, Any]:
+        """Read one data file, falling back to the built-in defaults if it is missing"""
+        path = self.data_path(data_type)
+        if path.exists():
+            stat = path.stat()
+            if data_type in self.STREAMED_SECTIONS and (path.suffix == '.jsonl' or
+                                                        stat.st_size >= Config.STREAM_MIN_FILE_BYTES):
+                # The signature changes the knowledge base version when the file changes
+                return {self.STREAM_KEY: {'path': str(path), 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}}
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        
+        defaults = {
+            'college_info': self._get_default_college_info,
+            'faqs': self._get_default_faqs,
+            'programs': self._get_default_programs
+        }
+        return defaults[data_type]()
     
     def _get_default_college_info(self):
         """Get default college information"""
@@ -150,142 +311,785 @@ class KnowledgeBase:
             ]
         }
     
-    def _load_default_data(self):
+    def _load_default_data(self) -> Dict[str, Any]:
         """Load default data if files are missing"""
-        self.knowledge_data = {
+        return {
             'college_info': self._get_default_college_info(),
             'faqs': self._get_default_faqs(),
             'programs': self._get_default_programs()
         }
     
-    def _create_embeddings(self):
-        """Create embeddings for all text data"""
-        if not self.sentence_model:
-            logger.warning("Sentence model not available, using simple text matching")
-            return
+    @staticmethod
+    def _entry_id(entry_type: str, key: str) -> str:
+        """Stable identifier of an entry: its type plus its normalized question or name"""
+        normalized_key = re.sub(r'\s+', ' ', key.strip().lower())
+        return f"{entry_type}:{normalized_key}"
+    
+    def _iter_section(self, data: Dict[str, Any], entry_type: str) -> Iterator[Dict]:
+        """Records of an entry type's section, streamed from disk when the section is streamed"""
+        section, key_field, _ = self._entry_section(entry_type)
+        # Upserted records are kept in memory next to a streamed source
+        records = data.get(section, [])
+        source = data.get(self.STREAM_KEY)
+        if source is not None:
+            hidden = set(data.get(self.DELETED_KEY, []))
+            hidden.update(self._entry_id(entry_type, record[key_field]) for record in records)
+            for record in iter_records(Path(source['path']), section):
+                if self._entry_id(entry_type, record[key_field]) not in hidden:
+                    yield record
+        yield from records
+    
+    def _in_stream(self, data: Dict[str, Any], entry_type: str, entry_id: str) -> bool:
+        """Check whether the streamed source of a section holds a record with this id"""
+        section, key_field, _ = self._entry_section(entry_type)
+        source = data.get(self.STREAM_KEY)
+        if source is None:
+            return False
+        return any(self._entry_id(entry_type, record[key_field]) == entry_id
+                   for record in iter_records(Path(source['path']), section))
+    
+    def _iter_entries(self, knowledge_data: Dict[str, Any]) -> Iterator[Tuple[str, str, Dict]]:
+        """Flatten the loaded data into (entry id, searchable text, metadata), one entry at a time"""
+        seen = set()
         
-        try:
-            # Collect all text for embedding
-            for data_type, data in self.knowledge_data.items():
-                if data_type == 'faqs':
-                    for faq in data.get('faqs', []):
-                        text = f"{faq['question']} {faq['answer']}"
-                        self.texts.append(text)
-                        self.metadata.append({
-                            'type': 'faq',
-                            'question': faq['question'],
-                            'answer': faq['answer'],
-                            'source': 'faqs'
-                        })
+        def entry(entry_id, text, meta):
+            # Keep ids unique when the data contains duplicate questions or names
+            unique_id, n = entry_id, 1
+            while unique_id in seen:
+                n += 1
+                unique_id = f"{entry_id}#{n}"
+            seen.add(unique_id)
+            meta['id'] = unique_id
+            return unique_id, text, meta
+        
+        for data_type, data in knowledge_data.items():
+            if data_type == 'faqs':
+                for faq in self._iter_section(data, 'faq'):
+                    yield entry(self._entry_id('faq', faq['question']), f"{faq['question']} {faq['answer']}", {
+                        'type': 'faq',
+                        'question': faq['question'],
+                        'answer': faq['answer'],
+                        'category': faq.get('category'),
+                        'source': 'faqs'
+                    })
                 
-                elif data_type == 'programs':
-                    for program in data.get('programs', []):
-                        text = f"{program['name']} {program['degree']} {program['description']}"
-                        self.texts.append(text)
-                        self.metadata.append({
+            elif data_type == 'programs':
+                # Every group the program index answers from is embedded too
+                for group, level in PROGRAM_GROUPS.items():
+                    for program in data.get(group, []):
+                        yield entry(self._entry_id('program', program['name']), self._program_text(program), {
                             'type': 'program',
                             'data': program,
-                            'source': 'programs'
+                            'source': 'programs',
+                            'level': level
                         })
                 
-                elif data_type == 'college_info':
-                    # Add general info
-                    general_info = data.get('general_info', {})
-                    text = f"{general_info.get('name', '')} {general_info.get('location', '')} {general_info.get('type', '')}"
-                    self.texts.append(text)
-                    self.metadata.append({
-                        'type': 'general_info',
-                        'data': general_info,
-                        'source': 'college_info'
-                    })
+            elif data_type == 'college_info':
+                # Add general info
+                general_info = data.get('general_info', {})
+                text = f"{general_info.get('name', '')} {general_info.get('location', '')} {general_info.get('type', '')}"
+                yield entry('general_info', text, {
+                    'type': 'general_info',
+                    'data': general_info,
+                    'source': 'college_info'
+                })
+    
+    @staticmethod
+    def _program_text(program: Dict) -> str:
+        """Searchable text of a program record"""
+        degree = program.get('degree') or program.get('type', '')
+        return f"{program['name']} {degree} {program.get('description', '')}"
+    
+    def _collect_entries(self, knowledge_data: Dict[str, Any]) -> Tuple[List[str], List[str], List[Dict]]:
+        """Flatten the loaded data into in-memory entry ids, searchable texts and metadata
+        
+        Streamed data goes through _ingest_to_store instead, so only a batch of it is
+        held at a time.
+        """
+        ids, texts, metadata = [], [], []
+        try:
+            for entry_id, text, meta in self._iter_entries(knowledge_data):
+                ids.append(entry_id)
+                texts.append(text)
+                metadata.append(meta)
             
-            # Create embeddings
-            if self.texts:
-                embeddings = self.sentence_model.encode(self.texts)
-                self.embeddings = embeddings
-                logger.info(f"Created embeddings for {len(self.texts)} text entries")
+        except Exception as e:
+            logger.error(f"Error collecting knowledge entries: {e}")
+        
+        return ids, texts, metadata
+    
+    def _is_streamed(self, knowledge_data: Dict[str, Any]) -> bool:
+        return any(self.STREAM_KEY in knowledge_data.get(section, {}) for section in self.STREAMED_SECTIONS)
+    
+    def _build_snapshot(self, knowledge_data: Dict[str, Any], previous: Optional[IndexSnapshot] = None) -> IndexSnapshot:
+        """Build the searchable state for a version of the knowledge data"""
+        version = self._compute_version(knowledge_data)
+        streamed = self._is_streamed(knowledge_data)
+        store_dir = self.ingest_dir if streamed else self.store_dir
+        
+        # Another process may already have published embeddings for this version
+        if self.embedder and store_dir is not None:
+            store = EmbeddingStore.open(store_dir, version)
+            if store is not None:
+                return self._snapshot_from_store(knowledge_data, store)
+        
+        if self.embedder and streamed:
+            try:
+                self._ingest_to_store(knowledge_data, version, store_dir, previous)
+                store = EmbeddingStore.open(store_dir, version)
+                if store is not None:
+                    return self._snapshot_from_store(knowledge_data, store)
+            except Exception as e:
+                logger.error(f"Error ingesting streamed knowledge data: {e}")
+        
+        if streamed and not self.embedder:
+            # Keyword search reads the entries from a store without vectors until the model loads
+            text_dir = store_dir / self.TEXT_STORE_SUBDIR
+            try:
+                store = EmbeddingStore.open(text_dir, version)
+                if store is None:
+                    self._ingest_to_store(knowledge_data, version, text_dir)
+                    store = EmbeddingStore.open(text_dir, version)
+                if store is not None:
+                    return self._snapshot_from_store(knowledge_data, store)
+            except Exception as e:
+                logger.error(f"Error writing streamed knowledge data to {text_dir}: {e}")
+        
+        ids, texts, metadata = self._collect_entries(knowledge_data)
+        embeddings = np.empty((0, 0), dtype=np.float32)
+        
+        if self.embedder and texts:
+            try:
+                embeddings = self._create_embeddings(texts, previous)
+            except Exception as e:
+                logger.error(f"Error creating embeddings: {e}")
+                embeddings = np.empty((0, 0), dtype=np.float32)
+        
+        snapshot = IndexSnapshot(knowledge_data, version, ids, texts, metadata, embeddings,
+                                 BM25Index(texts), None,
+                                 ProgramIndex(knowledge_data.get('programs', {})))
+        if self.store_dir is not None and len(embeddings) and self.export_store(snapshot) is not None:
+            # Serve full-precision vectors from the memory-mapped store instead of the heap
+            store = EmbeddingStore.open(self.store_dir, version)
+            if store is not None:
+                snapshot.embeddings = store.embeddings
+        
+        if len(snapshot.embeddings):
+            try:
+                snapshot.vector_index = self._build_vector_index(snapshot.embeddings, version)
+                # The index may have moved the vectors to a memory-mapped file
+                snapshot.embeddings = snapshot.vector_index.vectors
+            except Exception as e:
+                logger.error(f"Error building vector index: {e}")
+                snapshot.embeddings = np.empty((0, 0), dtype=np.float32)
+        return snapshot
+    
+    def _snapshot_from_store(self, knowledge_data: Dict[str, Any], store: EmbeddingStore) -> IndexSnapshot:
+        """Snapshot whose entries and vectors are read from a memory-mapped store"""
+        has_vectors = store.embeddings.size > 0
+        return IndexSnapshot(knowledge_data, store.version, store.ids, store.texts, store.metadata,
+                             store.embeddings if has_vectors else np.empty((0, 0), dtype=np.float32),
+                             BM25Index(store.texts),
+                             self._build_vector_index(store.embeddings, store.version) if has_vectors else None,
+                             ProgramIndex(knowledge_data.get('programs', {})))
+    
+    def _ingest_to_store(self, knowledge_data: Dict[str, Any], version: str, store_dir: Path,
+                         previous: Optional[IndexSnapshot] = None) -> Path:
+        """
+        Stream entries through batched embedding into the store
+        
+        Entries are read, embedded and written one batch at a time, so peak memory
+        depends on Config.INGEST_BATCH_SIZE rather than on the number of entries.
+        Vectors of texts already embedded in the previous snapshot are reused.
+        Without an embedding model the store holds the entries only.
+        
+        Args:
+            knowledge_data: Knowledge data with streamed sections
+            version: Knowledge base version
+            store_dir: Store directory to write
+            previous: Snapshot whose vectors may be reused
             
+        Returns:
+            Path of the written store version
+        """
+        previous_rows = {}
+        if previous is not None and len(previous.embeddings):
+            previous_rows = {self._text_key(text): row for row, text in enumerate(previous.texts)}
+        encoded = 0
+        
+        def batches():
+            nonlocal encoded
+            for batch in batched(self._iter_entries(knowledge_data), Config.INGEST_BATCH_SIZE):
+                ids, texts, metadata = (list(column) for column in zip(*batch))
+                if self.embedder is None:
+                    yield ids, texts, metadata, np.empty((len(ids), 0), dtype=np.float32)
+                    continue
+                keys = [self._text_key(text) for text in texts]
+                missing = [text for text, key in zip(texts, keys) if key not in previous_rows]
+                vectors = dict(zip(missing, l2_normalize(self.embedder.encode(missing)))) if missing else {}
+                encoded += len(missing)
+                yield ids, texts, metadata, np.stack([
+                    vectors[text] if text in vectors else previous.embeddings[previous_rows[key]]
+                    for text, key in zip(texts, keys)
+                ])
+        
+        path = EmbeddingStore.write_batches(store_dir, version, self.embedding_id, batches())
+        logger.info(f"Ingested streamed knowledge data into {path} ({encoded} entries encoded)")
+        return path
+    
+    @staticmethod
+    def _text_key(text: str) -> bytes:
+        """Compact key of an entry text for matching it against a previous snapshot"""
+        return hashlib.sha1(text.encode('utf-8')).digest()
+    
+    def export_store(self, snapshot: Optional[IndexSnapshot] = None) -> Optional[Path]:
+        """
+        Write the embeddings and metadata to the memory-mapped store for other processes
+        
+        Args:
+            snapshot: Snapshot to export; defaults to the current one
+            
+        Returns:
+            Path of the written store, or None if it could not be written
+        """
+        snapshot = snapshot or self._snapshot
+        if self.store_dir is None:
+            return None
+        
+        try:
+            return EmbeddingStore.write(self.store_dir, snapshot.version, self.embedding_id, snapshot.ids,
+                                        snapshot.texts, snapshot.metadata, snapshot.embeddings)
         except Exception as e:
-            logger.error(f"Error creating embeddings: {e}")
+            logger.warning(f"Could not write embedding store {self.store_dir}: {e}")
+            return None
+    
+    def _create_embeddings(self, texts: List[str], previous: Optional[IndexSnapshot] = None) -> np.ndarray:
+        """Create normalized embeddings, re-encoding only texts absent from the previous snapshot"""
+        if previous is None or len(previous.embeddings) == 0:
+            # Re-encode only texts missing from the persistent cache
+            embeddings = self.embedding_cache.get_embeddings(texts, self._encode_texts)
+            logger.info(f"Created embeddings for {len(texts)} text entries")
+            # Stored L2-normalized so cosine similarity is a single dot product
+            return l2_normalize(embeddings)
+        
+        previous_rows = {text: row for row, text in enumerate(previous.texts)}
+        changed = list(dict.fromkeys(text for text in texts if text not in previous_rows))
+        new_vectors = {}
+        if changed:
+            encoded = self.embedding_cache.get_embeddings(changed, self._encode_texts, prune=False)
+            new_vectors = dict(zip(changed, l2_normalize(encoded)))
+        
+        logger.info(f"Re-embedded {len(changed)} of {len(texts)} text entries")
+        return np.stack([
+            previous.embeddings[previous_rows[text]] if text in previous_rows else new_vectors[text]
+            for text in texts
+        ])
     
-    def search_similar(self, query: str, top_k: int = 3) -> List[Dict]:
+    def _encode_texts(self, texts: List[str]) -> np.ndarray:
+        """Encode texts; large builds run batched across worker processes and can resume"""
+        if len(texts) < Config.BULK_MIN_TEXTS:
+            return self.embedder.encode(texts)
+        
+        from .bulk_embedder import BulkEmbedder
+        
+        bulk_embedder = BulkEmbedder(self.embedding_backend, self.model_name,
+                                     Path(Config.BULK_CHECKPOINT_DIR) / self.namespace, Config.BULK_BATCH_SIZE,
+                                     Config.BULK_WORKERS, Config.BULK_PROGRESS_INTERVAL)
+        embeddings = bulk_embedder.embed(texts, self.embedder.encode)
+        logger.info(f"Bulk embedding build: {bulk_embedder.last_stats}")
+        return embeddings
+    
+    def _build_vector_index(self, embeddings: np.ndarray, version: str) -> VectorIndex:
+        """Build the nearest-neighbour index; small corpora use exact search"""
+        return build_index(
+            embeddings,
+            backend=Config.ANN_BACKEND,
+            min_entries=Config.ANN_MIN_ENTRIES,
+            index_path=Config.ANN_INDEX_DIR / f"index_{self.namespace}",
+            version=version,
+            nlist=Config.ANN_IVF_NLIST,
+            nprobe=Config.ANN_IVF_NPROBE,
+            m=Config.ANN_HNSW_M,
+            ef_construction=Config.ANN_HNSW_EF_CONSTRUCTION,
+            ef_search=Config.ANN_HNSW_EF_SEARCH,
+            dtype=Config.QUANTIZE_DTYPE,
+            dimensions=Config.QUANTIZE_DIMENSIONS,
+            reduction=Config.QUANTIZE_REDUCTION,
+            rescore_factor=Config.QUANTIZE_RESCORE_FACTOR,
+            recall_sample=Config.ANN_RECALL_SAMPLE
+        )
+    
+    def _compute_version(self, knowledge_data: Dict[str, Any]) -> str:
+        """Content version of the knowledge data for the current model"""
+        digest = hashlib.sha256(self.embedding_id.encode('utf-8'))
+        digest.update(json.dumps(knowledge_data, sort_keys=True, default=str).encode('utf-8'))
+        return digest.hexdigest()[:16]
+    
+    def _swap_snapshot(self, snapshot: IndexSnapshot):
+        """Atomically publish a snapshot and drop cached queries and answers of the previous version"""
+        previous = self._snapshot
+        self._snapshot = snapshot
+        if previous is not None and previous.version != snapshot.version:
+            self.query_cache.invalidate_version(previous.version)
+            self.answer_cache.invalidate_version(previous.version)
+            logger.info(f"Knowledge base updated to version {snapshot.version} ({len(snapshot.texts)} entries)")
+    
+    def _apply_update(self, update_fn) -> bool:
+        """Build a snapshot from updated knowledge data and swap it in; returns True if it changed"""
+        with self._write_lock:
+            current = self._snapshot
+            knowledge_data = update_fn(dict(current.knowledge_data))
+            if self._compute_version(knowledge_data) == current.version:
+                return False
+            self._swap_snapshot(self._build_snapshot(knowledge_data, previous=current))
+            return True
+    
+    def upsert_entry(self, entry_type: str, record: Dict[str, Any]) -> str:
+        """
+        Add or replace a single entry
+        
+        Args:
+            entry_type: 'faq' (matched by question), 'program' (matched by name) or 'general_info'
+            record: The FAQ, program or general info record
+            
+        Returns:
+            Id of the upserted entry
+        """
+        if entry_type == 'general_info':
+            def update(knowledge_data):
+                knowledge_data['college_info'] = {**knowledge_data.get('college_info', {}), 'general_info': record}
+                return knowledge_data
+            self._apply_update(update)
+            return 'general_info'
+        
+        section, key_field, groups = self._entry_section(entry_type)
+        entry_id = self._entry_id(entry_type, record[key_field])
+        
+        def update(knowledge_data):
+            data = dict(knowledge_data.get(section, {}))
+            if entry_id in data.get(self.DELETED_KEY, []):
+                data[self.DELETED_KEY] = [deleted for deleted in data[self.DELETED_KEY] if deleted != entry_id]
+                if not data[self.DELETED_KEY]:
+                    del data[self.DELETED_KEY]
+            # Replace the record in whichever group holds it; new records go to the first group.
+            # A record of a streamed section replaces the streamed record with the same id.
+            for group in groups:
+                records = list(data.get(group, []))
+                positions = [i for i, existing in enumerate(records)
+                             if self._entry_id(entry_type, existing[key_field]) == entry_id]
+                if positions:
+                    records[positions[0]] = record
+                    data[group] = records
+                    break
+            else:
+                data[groups[0]] = list(data.get(groups[0], [])) + [record]
+            knowledge_data[section] = data
+            return knowledge_data
+        
+        self._apply_update(update)
+        return entry_id
+    
+    def delete_entry(self, entry_id: str) -> bool:
+        """
+        Delete a FAQ or program by id
+        
+        Args:
+            entry_id: Id as returned by upsert_entry or found in result metadata
+            
+        Returns:
+            True if an entry was removed
+        """
+        entry_type = entry_id.split(':', 1)[0]
+        if entry_type not in ('faq', 'program'):
+            return False
+        section, key_field, groups = self._entry_section(entry_type)
+        base_id = entry_id.split('#', 1)[0]
+        
+        def update(knowledge_data):
+            data = dict(knowledge_data.get(section, {}))
+            for group in groups:
+                if group in data:
+                    data[group] = [record for record in data[group]
+                                   if self._entry_id(entry_type, record[key_field]) != base_id]
+            # Streamed records cannot be removed from their file, so they are hidden
+            deleted = data.get(self.DELETED_KEY, [])
+            if base_id not in deleted and self._in_stream(data, entry_type, base_id):
+                data[self.DELETED_KEY] = sorted(deleted + [base_id])
+            knowledge_data[section] = data
+            return knowledge_data
+        
+        return self._apply_update(update)
+    
+    @staticmethod
+    def _entry_section(entry_type: str) -> Tuple[str, str, List[str]]:
+        """Data section, key field and record groups of an entry type"""
+        sections = {'faq': ('faqs', 'question', ['faqs']), 'program': ('programs', 'name', list(PROGRAM_GROUPS))}
+        if entry_type not in sections:
+            raise ValueError(f"Unsupported entry type: {entry_type}")
+        return sections[entry_type]
+    
+    def reload_data(self, data_types: Optional[List[str]] = None, raise_errors: bool = False) -> bool:
+        """
+        Re-read data files and re-embed only entries that changed
+        
+        Args:
+            data_types: Categories to reload (keys of DATA_FILES); defaults to all
+            raise_errors: Raise a failed reload instead of logging it and returning False
+            
+        Returns:
+            True if the knowledge base changed
+        """
+        def update(knowledge_data):
+            for data_type in data_types or self.DATA_FILES:
+                knowledge_data[data_type] = self._read_data_file(data_type)
+            return knowledge_data
+        
+        try:
+            return self._apply_update(update)
+        except Exception as e:
+            if raise_errors:
+                raise
+            # Keep serving the current snapshot, e.g. when a file is caught mid-write
+            logger.error(f"Error reloading knowledge data: {e}")
+            return False
+    
+    def start_watching(self, interval: float = Config.DATA_WATCH_INTERVAL):
+        """Start a background thread that reloads data files when they change"""
+        from .data_watcher import DataFileWatcher
+        
+        with self._write_lock:
+            if self._watcher is None:
+                self._watcher = DataFileWatcher(self, interval)
+                self._watcher.start()
+    
+    def stop_watching(self):
+        """Stop the data file watcher"""
+        with self._write_lock:
+            if self._watcher is not None:
+                self._watcher.stop()
+                self._watcher = None
+    
+    def _load_model(self):
+        """Load the embedding backend, then embed the current entries"""
+        with self._write_lock:
+            if self._model_loaded:
+                return
+            
+            try:
+                self.embedder = get_shared_embedder(self.embedding_backend, self.model_name)
+                self._swap_snapshot(self._build_snapshot(self._snapshot.knowledge_data, previous=self._snapshot))
+            except Exception as e:
+                logger.error(f"Failed to load {self.embedding_backend} embedding backend: {e}")
+                logger.warning("Embedding model not available, using BM25 keyword search")
+            finally:
+                self._model_loaded = True
+    
+    def _ensure_model(self) -> bool:
+        """Load the model on first use; returns False while it is unavailable"""
+        if self._model_loaded:
+            return self.embedder is not None
+        if self._background_load.is_set():
+            # Serve keyword results instead of waiting for the background load
+            return False
+        self._load_model()
+        return self.embedder is not None
+    
+    def load_model_in_background(self):
+        """Start loading the embedding model in a daemon thread"""
+        if self._model_loaded or self._background_load.is_set():
+            return
+        
+        def load():
+            try:
+                self._load_model()
+            finally:
+                self._background_load.clear()
+        
+        self._background_load.set()
+        threading.Thread(target=load, name="embedding-model-loader", daemon=True).start()
+    
+    def _encode_query(self, query: str, version: str) -> np.ndarray:
+        """Encode and normalize a query, reusing cached embeddings"""
+        query_embedding = self.query_cache.get_embedding(version, query)
+        if query_embedding is None:
+            query_embedding = l2_normalize(self.embedder.encode([query])[0])
+            self.query_cache.put_embedding(version, query, query_embedding)
+        return query_embedding
+    
+    def embed_query(self, query: str) -> Optional[np.ndarray]:
+        """Normalized query embedding, shared with search through the query cache; None while the model is unavailable"""
+        if not self._ensure_model():
+            return None
+        return self._encode_query(query, self._snapshot.version)
+    
+    def get_intent_classifier(self) -> Optional[IntentClassifier]:
+        """Embedding intent classifier of this knowledge base's model, or None while the model is unavailable"""
+        if not self._ensure_model():
+            return None
+        return get_shared_intent_classifier(self.embedding_id, self.embedder.encode)
+    
+    def classify_intent(self, query: str) -> Optional[str]:
+        """
+        Classify a query by its embedding
+        
+        The query embedding is cached, so a search for the same query reuses it.
+        
+        Args:
+            query: User message
+            
+        Returns:
+            Intent, or None if the model is unavailable or no intent is close enough
+        """
+        try:
+            classifier = self.get_intent_classifier()
+            if classifier is None:
+                return None
+            with self.latency.measure('intent'):
+                intent, _ = classifier.classify(self._encode_query(query, self._snapshot.version))
+            return intent
+        except Exception as e:
+            logger.error(f"Error classifying intent: {e}")
+            return None
+    
+    def search_similar(self, query: str, top_k: int = 3, mode: Optional[str] = None,
+                       filters: Optional[Dict[str, Any]] = None) -> List[Dict]:
         """
         Search for similar content in the knowledge base
         
         Args:
             query: Search query
             top_k: Number of top results to return
+            mode: 'dense', 'lexical' or 'hybrid'; defaults to Config.RETRIEVAL_MODE
+            filters: Metadata field to an allowed value or list of values, e.g.
+                {'type': ['faq', 'program']}; applied before ranking so every
+                returned slot holds a matching entry
             
         Returns:
             List of similar content with metadata
         """
-        if not self.sentence_model or len(self.texts) == 0:
-            return self._simple_text_search(query, top_k)
+        filters = normalize_filters(filters)
+        
+        # Every stage of this search reads the same snapshot, even if a reload swaps it meanwhile
+        snapshot = self._snapshot
+        
+        # Program names and specializations are answered exactly from the program index
+        structured_results = [result for result in self._structured_search(query, top_k, snapshot)
+                              if matches_filters(result['knowledge'], filters)]
+        if not structured_results:
+            return self._ranked_search(query, top_k, snapshot, mode, filters)
+        
+        # The program records answer the named program; the rest of the query, such as
+        # "tuition fees" in "computer science tuition fees", is ranked on its own
+        residual_query = snapshot.program_index.residual_query(query)
+        if not residual_query:
+            return structured_results
+        results = self._ranked_search(residual_query, top_k, snapshot, mode, filters)
+        return self._merge_structured(structured_results, results, top_k)
+    
+    @staticmethod
+    def _merge_structured(structured_results: List[Dict], results: List[Dict], top_k: int) -> List[Dict]:
+        """
+        Interleave exact program hits with ranked results, dropping duplicates
+        
+        A query such as "computer science tuition fees" names a program and also
+        asks about fees, so both kinds of result keep a share of the top_k slots.
+        """
+        merged, seen = [], set()
+        for pair in zip_longest(structured_results, results):
+            for result in pair:
+                if result is None:
+                    continue
+                entry_id = result['knowledge'].get('id', '').split('#', 1)[0]
+                if entry_id not in seen:
+                    seen.add(entry_id)
+                    merged.append(result)
+        return merged[:top_k]
+    
+    def _ranked_search(self, query: str, top_k: int, snapshot: IndexSnapshot, mode: Optional[str],
+                       filters: Optional[Dict[str, Any]]) -> List[Dict]:
+        """Dense, lexical or hybrid ranking of the snapshot's entries"""
+        mode = mode or self.retrieval_mode
+        if mode != 'lexical' and not self._ensure_model():
+            mode = 'lexical'
+        
+        if snapshot.vector_index is None:
+            mode = 'lexical'
+        mask = snapshot.masks.mask(filters)
+        
+        if mode == 'lexical':
+            with self.latency.measure('lexical'):
+                return self._simple_text_search(query, top_k, snapshot, mask)
+        
+        cached_results = self.query_cache.get_results(snapshot.version, query, top_k, mode, filters)
+        if cached_results is not None:
+            return cached_results
         
         try:
-            # Encode the query
-            query_embedding = self.sentence_model.encode([query])
-            
-            # Calculate similarities
-            similarities = cosine_similarity(query_embedding, self.embeddings)[0]
-            
-            # Get top results
-            top_indices = np.argsort(similarities)[::-1][:top_k]
-            
-            results = []
-            for idx in top_indices:
-                if similarities[idx] > 0.1:  # Minimum similarity threshold
-                    results.append({
-                        'text': self.texts[idx],
-                        'knowledge': self.metadata[idx],
-                        'similarity': float(similarities[idx])
-                    })
+            if mode == 'hybrid':
+                results = self._hybrid_search(query, top_k, snapshot, mask)
+            else:
+                results = self._dense_search(query, top_k, snapshot, mask)
             
+            self.query_cache.put_results(snapshot.version, query, top_k, results, mode, filters)
             return results
             
         except Exception as e:
             logger.error(f"Error in similarity search: {e}")
-            return self._simple_text_search(query, top_k)
+            return self._simple_text_search(query, top_k, snapshot, mask)
     
-    def _simple_text_search(self, query: str, top_k: int = 3) -> List[Dict]:
-        """Simple text-based search fallback"""
-        query_lower = query.lower()
+    def _structured_search(self, query: str, top_k: int, snapshot: IndexSnapshot) -> List[Dict]:
+        """Exact program lookup by name and facets"""
+        with self.latency.measure('structured'):
+            programs = snapshot.program_index.lookup(query)
+        
         results = []
+        for program in programs[:top_k]:
+            results.append({
+                'text': f"{program['name']} {program.get('degree', '')} {program.get('description', '')}",
+                'knowledge': {
+                    'type': 'program',
+                    'data': program,
+                    'source': 'programs',
+                    'id': self._entry_id('program', program['name']),
+                    'level': snapshot.program_index.levels.get(normalize_phrase(program['name']))
+                },
+                'similarity': 1.0
+            })
         
-        # Search FAQs
-        for faq in self.knowledge_data.get('faqs', {}).get('faqs', []):
-            if any(word in faq['question'].lower() or word in faq['answer'].lower() 
-                   for word in query_lower.split()):
-                results.append({
-                    'text': f"{faq['question']} {faq['answer']}",
-                    'knowledge': {
-                        'type': 'faq',
-                        'question': faq['question'],
-                        'answer': faq['answer'],
-                        'source': 'faqs'
-                    },
-                    'similarity': 0.8
-                })
+        return results
+    
+    def find_programs(self, **facets: Any) -> List[Dict]:
+        """
+        Get programs matching facet values exactly
+        
+        Args:
+            **facets: name, specialization, degree, level or duration, each a value
+                or list of alternative values
+            
+        Returns:
+            Matching program records
+        """
+        return self._snapshot.program_index.filter(**facets)
+    
+    def _dense_candidates(self, query: str, k: int, snapshot: IndexSnapshot, mask: Optional[np.ndarray] = None):
+        """Nearest allowed entries to the query above the minimum similarity"""
+        with self.latency.measure('encode'):
+            query_embedding = self._encode_query(query, snapshot.version)
+        
+        with self.latency.measure('dense'):
+            indices, scores = snapshot.vector_index.search(query_embedding, k, mask)
+            keep = scores > self.MIN_SIMILARITY
         
-        return results[:top_k]
+        return indices[keep], scores[keep], query_embedding
+    
+    def _dense_search(self, query: str, top_k: int, snapshot: IndexSnapshot,
+                      mask: Optional[np.ndarray] = None) -> List[Dict]:
+        """Embedding similarity search"""
+        top_indices, top_scores, _ = self._dense_candidates(query, top_k, snapshot, mask)
+        
+        results = []
+        for idx, score in zip(top_indices, top_scores):
+            results.append({
+                'text': snapshot.texts[idx],
+                'knowledge': snapshot.metadata[idx],
+                'similarity': float(score)
+            })
+        
+        return results
+    
+    def _hybrid_search(self, query: str, top_k: int, snapshot: IndexSnapshot,
+                       mask: Optional[np.ndarray] = None) -> List[Dict]:
+        """Dense and BM25 search merged with reciprocal rank fusion"""
+        candidates = max(top_k, Config.HYBRID_CANDIDATES)
+        dense_indices, dense_scores, query_embedding = self._dense_candidates(query, candidates, snapshot, mask)
+        
+        with self.latency.measure('lexical'):
+            lexical_hits = snapshot.lexical_index.search(query, candidates, mask)
+        
+        with self.latency.measure('fusion'):
+            fused = reciprocal_rank_fusion(
+                [dense_indices.tolist(), [idx for idx, _, _ in lexical_hits]],
+                [Config.HYBRID_DENSE_WEIGHT, Config.HYBRID_LEXICAL_WEIGHT],
+                Config.HYBRID_RRF_K
+            )
+        
+        dense_similarity = dict(zip(dense_indices.tolist(), dense_scores.tolist()))
+        lexical_similarity = {idx: normalized_score for idx, _, normalized_score in lexical_hits}
+        
+        results = []
+        for idx, fusion_score in fused[:top_k]:
+            if idx not in dense_similarity:
+                dense_similarity[idx] = float(snapshot.embeddings[idx] @ query_embedding)
+            # Report the stronger of the two per-retriever similarities
+            results.append({
+                'text': snapshot.texts[idx],
+                'knowledge': snapshot.metadata[idx],
+                'similarity': max(dense_similarity[idx], lexical_similarity.get(idx, 0.0)),
+                'fusion_score': fusion_score
+            })
+        
+        return results
+    
+    def _simple_text_search(self, query: str, top_k: int = 3, snapshot: Optional[IndexSnapshot] = None,
+                            mask: Optional[np.ndarray] = None) -> List[Dict]:
+        """BM25 keyword search fallback over all entry types, or the allowed ones"""
+        snapshot = snapshot or self._snapshot
+        
+        results = []
+        for idx, score, normalized_score in snapshot.lexical_index.search(query, top_k, mask):
+            results.append({
+                'text': snapshot.texts[idx],
+                'knowledge': snapshot.metadata[idx],
+                'similarity': normalized_score,
+                'score': score
+            })
+        
+        return results
     
     def get_statistics(self) -> Dict[str, int]:
         """Get knowledge base statistics"""
+        counts = self._snapshot.entry_counts()
         stats = {
             'total_entries': len(self.texts),
-            'faqs': len(self.knowledge_data.get('faqs', {}).get('faqs', [])),
-            'programs': len(self.knowledge_data.get('programs', {}).get('programs', [])),
+            'faqs': counts['faq'],
+            'programs': counts['program'],
             'categories': len(self.knowledge_data.keys())
         }
         return stats
     
+    def get_memory_usage(self) -> Dict[str, int]:
+        """Get estimated memory held by the current snapshot, in bytes"""
+        return self._snapshot.memory_usage()
+    
+    def get_cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get query cache hit-rate and eviction statistics"""
+        return self.query_cache.get_stats()
+    
+    def get_retrieval_stats(self) -> Dict[str, Dict[str, float]]:
+        """Get per-retriever latency statistics in milliseconds"""
+        return self.latency.get_stats()
+    
+    def get_index_stats(self) -> Dict[str, Any]:
+        """Get the vector index backend, its memory use and its measured recall"""
+        vector_index = self.vector_index
+        if vector_index is None:
+            return {'backend': None}
+        return {
+            'backend': vector_index.backend,
+            'entries': len(vector_index),
+            'full_precision_bytes': int(self.embeddings.nbytes),
+            'index_bytes': vector_index.memory_bytes,
+            'recall_at_10': vector_index.recall
+        }
+    
     def get_all_faqs(self) -> List[Dict]:
         """Get all FAQs"""
-        return self.knowledge_data.get('faqs', {}).get('faqs', [])
+        return list(self._iter_section(self.knowledge_data.get('faqs', {}), 'faq'))
     
     def get_all_programs(self) -> List[Dict]:
         """Get all programs"""
-        return self.knowledge_data.get('programs', {}).get('programs', [])
+        programs = self.knowledge_data.get('programs', {})
+        return [program for group in PROGRAM_GROUPS for program in programs.get(group, [])]
     
     def get_college_info(self) -> Dict:
         """Get college information"""
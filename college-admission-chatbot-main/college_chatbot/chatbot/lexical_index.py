@@ -0,0 +1,102 @@
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+from .vector_utils import top_k_indices
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset([
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'can', 'do', 'does', 'for', 'from',
+    'how', 'i', 'in', 'is', 'it', 'me', 'my', 'of', 'on', 'or', 'our', 's', 'that', 'the',
+    'there', 'this', 'to', 'was', 'we', 'what', 'when', 'where', 'which', 'who', 'will',
+    'with', 'you', 'your'
+])
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase terms, dropping stopwords"""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+class BM25Index:
+    """Inverted index with Okapi BM25 scoring"""
+    
+    def __init__(self, texts: List[str], k1: float = 1.5, b: float = 0.75):
+        """
+        Build the index
+        
+        Args:
+            texts: Documents to index; result indices refer to positions in this list
+            k1: Term frequency saturation parameter
+            b: Document length normalization parameter
+        """
+        self.k1 = k1
+        self.b = b
+        self.num_docs = len(texts)
+        self.postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self.idf: Dict[str, float] = {}
+        
+        doc_terms = [Counter(tokenize(text)) for text in texts]
+        doc_lengths = np.array([sum(terms.values()) for terms in doc_terms], dtype=np.float32)
+        avg_length = float(doc_lengths.mean()) if self.num_docs and doc_lengths.sum() else 1.0
+        
+        raw_postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        for doc_id, terms in enumerate(doc_terms):
+            for term, tf in terms.items():
+                raw_postings[term].append((doc_id, tf))
+        
+        # BM25 term weights depend only on (term, document), so they are precomputed
+        # and a query only sums the weights in the posting lists of its terms
+        for term, postings in raw_postings.items():
+            doc_ids = np.array([doc_id for doc_id, _ in postings], dtype=np.int64)
+            tfs = np.array([tf for _, tf in postings], dtype=np.float32)
+            df = len(postings)
+            idf = math.log(1.0 + (self.num_docs - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1.0 - self.b + self.b * doc_lengths[doc_ids] / avg_length)
+            weights = idf * tfs * (self.k1 + 1.0) / (tfs + norm)
+            self.postings[term] = (doc_ids, weights.astype(np.float32))
+            self.idf[term] = idf
+    
+    @property
+    def memory_bytes(self) -> int:
+        """Approximate bytes held by the posting lists"""
+        # Roughly 100 bytes of dict, tuple and array overhead per term
+        return sum(doc_ids.nbytes + weights.nbytes + 100 for doc_ids, weights in self.postings.values())
+    
+    def search(self, query: str, top_k: int = 3, mask: Optional[np.ndarray] = None) -> List[Tuple[int, float, float]]:
+        """
+        Search the index
+        
+        Args:
+            query: Search query
+            top_k: Number of top results to return
+            mask: Boolean mask of the documents allowed in the results, or None for all
+            
+        Returns:
+            List of (document index, BM25 score, normalized score in [0, 1]), best first
+        """
+        query_terms = Counter(term for term in tokenize(query) if term in self.postings)
+        if not query_terms:
+            return []
+        
+        doc_id_parts = []
+        weight_parts = []
+        max_score = 0.0
+        for term, count in query_terms.items():
+            doc_ids, weights = self.postings[term]
+            doc_id_parts.append(doc_ids)
+            weight_parts.append(weights * count)
+            max_score += self.idf[term] * (self.k1 + 1.0) * count
+        
+        candidates, inverse = np.unique(np.concatenate(doc_id_parts), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(weight_parts))
+        if mask is not None:
+            allowed = mask[candidates]
+            candidates, scores = candidates[allowed], scores[allowed]
+        
+        top = top_k_indices(scores, top_k)
+        return [
+            (int(candidates[i]), float(scores[i]), float(scores[i] / max_score) if max_score else 0.0)
+            for i in top
+        ]
@@ -1,7 +1,8 @@
 import re
 import json
 import logging
-from typing import List, Dict, Any, Optional
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import List, Dict, Any, Iterator, Optional
 from datetime import datetime
 import sys
 from pathlib import Path
@@ -10,6 +11,8 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
 from config import Config
+from .intent_engine import get_intent_engine
+from .generation import get_generation_scheduler
 
 class LLMHandler:
     """Handles LLM-based response generation for college admission queries"""
@@ -18,28 +21,136 @@ class LLMHandler:
         self.config = Config()
         self.logger = logging.getLogger(__name__)
         self.quick_responses = self.config.QUICK_RESPONSES
-        
-    def get_response(self, prompt: str, conversation_history: List[Dict], relevant_info: List[Dict]) -> str:
-        """Generate a response using rule-based approach with context"""
+        self.intent_engine = get_intent_engine()
+        # Optional generative model shared by all sessions; None answers with rules only
+        self.generator = get_generation_scheduler()
+    
+    def get_response(self, prompt: str, conversation_history: List[Dict], relevant_info: List[Dict],
+                     intent: Optional[str] = None) -> str:
+        """Generate a response with the generative model if enabled, else with rules and context"""
         try:
             # Clean and prepare the prompt
             cleaned_prompt = self._clean_prompt(prompt)
             
-            # Detect intent
-            intent = self._detect_intent(cleaned_prompt)
+            # Detect intent unless the caller already knows it from the user's message
+            if intent is None:
+                intent = self._detect_intent(cleaned_prompt)
             
             # Generate response based on intent and context
             if intent == 'greeting':
                 return self._generate_greeting_response()
-            elif intent in self.quick_responses:
-                return self._generate_contextual_response(intent, cleaned_prompt, relevant_info)
-            else:
-                return self._generate_general_response(cleaned_prompt, relevant_info)
-                
+            
+            generated = self._generate_with_model(prompt)
+            if generated:
+                return generated
+            
+            return self._rule_based_response(intent, cleaned_prompt, relevant_info)
+            
         except Exception as e:
             self.logger.error(f"Error in get_response: {str(e)}")
             return self.config.ERROR_RESPONSE
     
+    def _rule_based_response(self, intent: str, cleaned_prompt: str, relevant_info: List[Dict]) -> str:
+        if intent in self.quick_responses:
+            return self._generate_contextual_response(intent, cleaned_prompt, relevant_info)
+        return self._generate_general_response(cleaned_prompt, relevant_info)
+    
+    def _accept_generated(self, generated: str) -> bool:
+        """Completions shorter than MIN_RESPONSE_LENGTH are replaced by the rule-based response"""
+        return len(generated.strip()) >= self.config.MIN_RESPONSE_LENGTH
+    
+    def _generate_with_model(self, prompt: str) -> Optional[str]:
+        """Completion of the generative model, or None if it is disabled, failed or too short"""
+        if self.generator is None:
+            return None
+        future = self.generator.submit(prompt)
+        try:
+            generated = future.result(timeout=self.config.GENERATION_TIMEOUT)
+        except FutureTimeoutError:
+            # A request still queued is dropped instead of being generated for nobody
+            future.cancel()
+            self.logger.warning("Generation timed out, using the rule-based response")
+            return None
+        except Exception as e:
+            self.logger.error(f"Generation failed, using the rule-based response: {e}")
+            return None
+        
+        return generated if self._accept_generated(generated) else None
+    
+    def stream_response(self, prompt: str, conversation_history: List[Dict], relevant_info: List[Dict],
+                        timeout: Optional[float] = None, intent: Optional[str] = None,
+                        degraded: Optional[List[str]] = None) -> Iterator[str]:
+        """
+        Generate a response as a stream of chunks
+        
+        A generative model's completion is streamed while it decodes, so the first
+        chunk does not wait for the whole response; that first chunk is at least
+        Config.GENERIC_RESPONSE_LENGTH long unless the completion is shorter.
+        Rule-based answers are built at once and yielded as one chunk.
+        
+        Args:
+            prompt: Prompt to answer
+            conversation_history: Recent messages
+            relevant_info: Relevant information from the knowledge base
+            timeout: Seconds left for this request; a completion that shows nothing in
+                time is replaced by the rule-based response
+            intent: Intent of the user's message (see detect_intent); detected from the
+                prompt if None, so pass it when the prompt carries retrieved context
+            degraded: 'generate' is appended to it when the timeout cut the completion
+                off or replaced it, so the answer is known to be incomplete
+            
+        Yields:
+            Response chunks
+        """
+        try:
+            cleaned_prompt = self._clean_prompt(prompt)
+            if intent is None:
+                intent = self._detect_intent(cleaned_prompt)
+            
+            if intent == 'greeting':
+                yield self._generate_greeting_response()
+                return
+            
+            if self.generator is not None and (timeout is None or timeout > 0):
+                shown = yield from self._stream_generated(prompt, timeout, degraded)
+                if shown:
+                    return
+            
+            yield self._rule_based_response(intent, cleaned_prompt, relevant_info)
+            
+        except Exception as e:
+            self.logger.error(f"Error in stream_response: {str(e)}")
+            yield self.config.ERROR_RESPONSE
+    
+    def _stream_generated(self, prompt: str, timeout: Optional[float], degraded: Optional[List[str]] = None):
+        """Stream the model's completion; returns whether anything was yielded"""
+        timeout = min(timeout, self.config.GENERATION_TIMEOUT) if timeout is not None else self.config.GENERATION_TIMEOUT
+        head, shown = '', False
+        try:
+            for piece in self.generator.stream(prompt, timeout):
+                if shown:
+                    yield piece
+                    continue
+                # The start is held back until it is long enough to be accepted and judged generic or not
+                head += piece
+                if self._accept_generated(head) and len(head.strip()) >= self.config.GENERIC_RESPONSE_LENGTH:
+                    shown = True
+                    yield head.lstrip()
+            if not shown and self._accept_generated(head):
+                # A complete but short completion
+                shown = True
+                yield head.lstrip()
+        except TimeoutError:
+            if degraded is not None:
+                degraded.append('generate')
+            if shown:
+                self.logger.warning("Generation stream cut off at the request deadline")
+            else:
+                self.logger.warning("Generation missed the request deadline, using the rule-based response")
+        except Exception as e:
+            self.logger.error(f"Generation failed: {e}")
+        return shown
+    
     def get_quick_response(self, intent: str) -> Optional[str]:
         """Get a quick response for a specific intent"""
         return self.quick_responses.get(intent)
@@ -52,19 +163,35 @@ class LLMHandler:
         cleaned = re.sub(r'[^\w\s\?\!\.]', '', cleaned)
         return cleaned
     
+    def detect_intent(self, user_message: str, intent: Optional[str] = None) -> str:
+        """
+        Intent to answer a user message with
+        
+        Args:
+            user_message: The user's message, without retrieved context
+            intent: Intent already detected for the message, e.g. by the response pipeline
+            
+        Returns:
+            The given intent, or the detected one if None; a general message that
+            greets is answered with a greeting
+        """
+        cleaned_message = self._clean_prompt(user_message)
+        if intent is None:
+            return self._detect_intent(cleaned_message)
+        if intent == 'general' and 'greeting' in self.intent_engine.match(cleaned_message):
+            return 'greeting'
+        return intent
+    
     def _detect_intent(self, prompt: str) -> str:
         """Detect the intent of the user's message"""
-        # Check for greeting patterns
-        greeting_patterns = ['hello', 'hi', 'hey', 'good morning', 'good afternoon', 'good evening']
-        if any(pattern in prompt for pattern in greeting_patterns):
-            return 'greeting'
+        intent_scores = self.intent_engine.match(prompt)
         
-        # Check for specific intents
-        for intent, keywords in self.config.INTENTS.items():
-            if any(keyword in prompt for keyword in keywords):
-                return intent
+        # A question with a quick answer wins over a greeting in the same message
+        intent = self.intent_engine.best(intent_scores, candidates=self.quick_responses, default='general')
+        if intent == 'general' and 'greeting' in intent_scores:
+            return 'greeting'
         
-        return 'general'
+        return intent
     
     def _generate_greeting_response(self) -> str:
         """Generate a personalized greeting response"""
@@ -0,0 +1,127 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+
+# Canonical filters: sorted (field, sorted allowed values) pairs, usable as a cache key
+Filters = Tuple[Tuple[str, Tuple[Any, ...]], ...]
+
+# Fields masked when a snapshot is built; other fields are masked on first use
+PRECOMPUTED_FIELDS = ('type', 'source')
+
+def metadata_values(meta: Dict[str, Any], field: str) -> List[Any]:
+    """Values of a field in entry metadata, falling back to the wrapped record (e.g. a program)"""
+    value = meta.get(field)
+    if value is None and isinstance(meta.get('data'), dict):
+        value = meta['data'].get(field)
+    if value is None:
+        return []
+    values = value if isinstance(value, (list, tuple)) else [value]
+    return [item for item in values if isinstance(item, (str, int, float, bool))]
+
+def normalize_filters(filters: Optional[Dict[str, Any]]) -> Optional[Filters]:
+    """
+    Canonicalize filters
+    
+    Args:
+        filters: Field to an allowed value or list of allowed values, e.g.
+            {'type': ['faq', 'program'], 'category': 'Fees'}
+        
+    Returns:
+        Canonical filters, or None if there are none
+    """
+    if not filters:
+        return None
+    normalized = []
+    for field, values in filters.items():
+        if isinstance(values, (str, int, float, bool)):
+            values = [values]
+        normalized.append((field, tuple(sorted(set(values), key=str))))
+    return tuple(sorted(normalized))
+
+def matches_filters(meta: Dict[str, Any], filters: Optional[Filters]) -> bool:
+    """Check one entry against canonical filters: all fields must match one of their values"""
+    if filters is None:
+        return True
+    return all(set(metadata_values(meta, field)) & set(values) for field, values in filters)
+
+class MetadataMasks:
+    """Boolean masks over the entries of a snapshot
+    
+    Rows of each (field, value) are indexed once; the mask of every filter is
+    built from them on first use and cached, so a filtered search costs one
+    lookup whatever the filter selects.
+    """
+    
+    MAX_COMBINED = 64
+    
+    def __init__(self, metadata: Sequence[Dict[str, Any]], fields: Iterable[str] = PRECOMPUTED_FIELDS):
+        """
+        Index the precomputed fields and build a mask for each of their values
+        
+        Args:
+            metadata: Entry metadata in index order
+            fields: Fields to mask now
+        """
+        self._metadata = metadata
+        self._count = len(metadata)
+        # Field -> value -> rows holding the value
+        self._fields: Dict[str, Dict[Any, np.ndarray]] = {}
+        self._combined: Dict[Filters, np.ndarray] = {}
+        self._precomputed: Dict[Filters, np.ndarray] = {}
+        
+        fields = list(fields)
+        self._index_fields(fields)
+        for field in fields:
+            for value in self._fields[field]:
+                self._precomputed[((field, (value,)),)] = self._build_mask(((field, (value,)),))
+    
+    def _index_fields(self, fields: Iterable[str]):
+        """Build the masks of several fields in one pass over the metadata"""
+        fields = [field for field in fields if field not in self._fields]
+        if not fields:
+            return
+        positions: Dict[str, Dict[Any, List[int]]] = {field: {} for field in fields}
+        for row, meta in enumerate(self._metadata):
+            for field in fields:
+                for value in metadata_values(meta, field):
+                    positions[field].setdefault(value, []).append(row)
+        
+        for field, value_rows in positions.items():
+            self._fields[field] = {value: np.asarray(rows, dtype=np.int64) for value, rows in value_rows.items()}
+    
+    def _build_mask(self, filters: Filters) -> np.ndarray:
+        combined = np.ones(self._count, dtype=bool)
+        for field, values in filters:
+            field_mask = np.zeros(self._count, dtype=bool)
+            for value in values:
+                rows = self._fields[field].get(value)
+                if rows is not None:
+                    field_mask[rows] = True
+            combined &= field_mask
+        return combined
+    
+    def mask(self, filters: Optional[Filters]) -> Optional[np.ndarray]:
+        """
+        Combined mask of canonical filters
+        
+        Args:
+            filters: Canonical filters from normalize_filters
+            
+        Returns:
+            Boolean mask of the entries passing every field, or None without filters
+        """
+        if filters is None:
+            return None
+        combined = self._precomputed.get(filters)
+        if combined is None:
+            combined = self._combined.get(filters)
+        if combined is not None:
+            return combined
+        
+        self._index_fields(field for field, _ in filters)
+        combined = self._build_mask(filters)
+        
+        # Callers reuse the same few filters, so combined masks are kept
+        if len(self._combined) >= self.MAX_COMBINED:
+            self._combined.clear()
+        self._combined[filters] = combined
+        return combined
@@ -0,0 +1,292 @@
+import asyncio
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import logging
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config import Config
+from .retrieval import LatencyTracker
+from .answer_cache import SemanticAnswerCache, get_shared_answer_cache
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Intents answered directly by their quick response
+QUICK_INTENTS = ('admission_requirements', 'deadlines', 'programs', 'contact', 'fees')
+# Answers that change with the time of day, e.g. "Good morning", are never cached
+UNCACHED_INTENTS = ('greeting',)
+
+class StageTimeout(Exception):
+    """A pipeline stage could not finish within the request deadline"""
+
+class ResponsePipeline:
+    """Answers messages with a deadline shared by every stage
+    
+    Intent classification, retrieval and response generation each get the
+    time left on the request. A stage that runs out is abandoned and the answer
+    degrades: the keyword intent replaces the embedding one, retrieval is
+    skipped, and the quick response or intent template replaces generation.
+    prepare runs the stages up to retrieval; stream then generates and formats
+    the response chunk by chunk within the time left.
+    Blocking stages run on a shared thread pool, so an abandoned stage never
+    holds the caller's event loop, and a process-wide semaphore bounds how
+    many requests are in flight across sessions; a request holds its slot
+    from retrieval until its stream has finished generating. A question close enough to
+    one already answered skips retrieval and generation through the semantic
+    answer cache.
+    """
+    
+    def __init__(self, llm_handler, response_handler, build_prompt: Callable[[str, str, List[Dict]], str],
+                 deadline: float = Config.RESPONSE_DEADLINE,
+                 max_concurrency: int = Config.MAX_CONCURRENT_REQUESTS,
+                 reserve: float = Config.RESPONSE_RESERVE,
+                 answer_cache: Optional[SemanticAnswerCache] = None):
+        """
+        Initialize the pipeline
+        
+        Args:
+            llm_handler: Generates responses
+            response_handler: Detects keyword intents and formats responses
+            build_prompt: Builds the generation prompt from (message, intent, relevant info)
+            deadline: Seconds a request may take in total
+            max_concurrency: Requests processed at once; others wait within their deadline
+            reserve: Seconds kept back from every stage for formatting the answer
+            answer_cache: Cache of formatted answers; defaults to the process-wide shared cache
+        """
+        self.llm_handler = llm_handler
+        self.response_handler = response_handler
+        self.build_prompt = build_prompt
+        self.deadline = deadline
+        self.reserve = reserve
+        # A thread semaphore works across the event loops of different sessions
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        # Not the loop's default executor: asyncio.run would wait for abandoned stages on exit
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency * 2, thread_name_prefix="pipeline-stage")
+        if answer_cache is None:
+            answer_cache = get_shared_answer_cache(Config.ANSWER_CACHE_SIZE, Config.ANSWER_CACHE_MAX_BYTES,
+                                                   Config.ANSWER_CACHE_MIN_SIMILARITY)
+        self.answer_cache = answer_cache
+        self.latency = LatencyTracker()
+        self._degraded: Counter = Counter()
+        self._stats = {'requests': 0, 'degraded_requests': 0}
+        self._stats_lock = threading.Lock()
+    
+    async def _run_stage(self, name: str, timeout: float, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking stage on the pool, abandoning it when the timeout passes"""
+        if timeout <= 0:
+            raise StageTimeout(name)
+        loop = asyncio.get_running_loop()
+        try:
+            with self.latency.measure(name):
+                return await asyncio.wait_for(loop.run_in_executor(self._executor, partial(fn, *args, **kwargs)), timeout)
+        except asyncio.TimeoutError:
+            raise StageTimeout(name)
+    
+    async def _acquire_slot(self, timeout: float) -> bool:
+        """Wait for a free slot, at most timeout seconds"""
+        if self._slots.acquire(blocking=False):
+            return True
+        if timeout <= 0:
+            return False
+        loop = asyncio.get_running_loop()
+        # Not abandoned like other stages: the acquire returns by itself, and a slot it takes must be released
+        with self.latency.measure('queue'):
+            return await loop.run_in_executor(self._executor, partial(self._slots.acquire, timeout=timeout))
+    
+    async def prepare(self, user_message: str, knowledge_base, deadline: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Run the intent and retrieval stages of a request
+        
+        The request keeps its concurrency slot for generation, so every prepared
+        request must be streamed (or its stream closed) to release it.
+        
+        Args:
+            user_message: User's message
+            knowledge_base: Knowledge base answering it
+            deadline: Seconds for this request; defaults to the pipeline deadline
+            
+        Returns:
+            Dict with intent, relevant_info, kb_version, the list of degraded stages
+            and expires, when the request's deadline passes; on a cache hit, answer
+            holds the formatted answer and retrieval is skipped
+        """
+        started = time.monotonic()
+        expires = started + (deadline if deadline is not None else self.deadline)
+        
+        degraded: List[str] = []
+        # Keyword intent is instant and the fallback of every later stage
+        intent = self.response_handler.detect_intent(user_message)
+        result = {'intent': intent, 'relevant_info': [], 'kb_version': None, 'degraded': degraded,
+                  'answer': None, 'query': user_message, 'embedding': None, 'started': started,
+                  'expires': expires}
+        
+        def remaining() -> float:
+            return self._remaining(result)
+        
+        if not await self._acquire_slot(remaining()):
+            degraded.append('queue')
+        else:
+            result['slot'] = True
+            try:
+                await self._retrieve(result, user_message, knowledge_base, remaining)
+            except BaseException:
+                self._release(result)
+                raise
+            # A cached answer needs no generation
+            if result['answer'] is not None:
+                self._release(result)
+        return result
+    
+    def _release(self, result: Dict[str, Any]):
+        """Give back the concurrency slot of a request, if it still holds one"""
+        if result.pop('slot', False):
+            self._slots.release()
+    
+    def _remaining(self, result: Dict[str, Any]) -> float:
+        """Seconds a prepared request has left for its next stage"""
+        return result['expires'] - time.monotonic() - self.reserve
+    
+    async def _retrieve(self, result: Dict[str, Any], user_message: str, knowledge_base,
+                        remaining: Callable[[], float]):
+        degraded = result['degraded']
+        try:
+            # Detect intent from the query embedding (reused by the search)
+            classified = await self._run_stage('intent', remaining(), knowledge_base.classify_intent, user_message)
+            if classified:
+                result['intent'] = classified
+        except StageTimeout:
+            degraded.append('intent')
+        intent = result['intent']
+        
+        # Read before searching: a reload during the search then caches under the old, unused version
+        result['kb_version'] = knowledge_base.version
+        try:
+            # Usually already encoded by the intent stage, so this is a query cache hit
+            result['embedding'] = await self._run_stage('cache', remaining(), knowledge_base.embed_query, user_message)
+        except StageTimeout:
+            degraded.append('cache')
+        
+        result['answer'] = self.answer_cache.lookup(result['kb_version'], intent, user_message, result['embedding'])
+        if result['answer'] is not None:
+            return
+        
+        try:
+            # Only FAQs and programs are used to answer, so other entries are filtered out up front
+            result['relevant_info'] = await self._run_stage(
+                'search', remaining(), knowledge_base.search_similar, user_message, top_k=3,
+                filters={'type': ['faq', 'program']})
+        except StageTimeout:
+            degraded.append('search')
+    
+    def stream(self, result: Dict[str, Any], conversation_history: List[Dict]) -> Iterator[str]:
+        """
+        Generate and format the answer of a prepared request, chunk by chunk
+        
+        Generated chunks are formatted as they are decoded, and generation is
+        bounded by the time the request has left. The answer is cached once the
+        stream is complete, unless a stage was degraded, e.g. generation was cut
+        off at the deadline. The request's concurrency slot is released when the
+        stream finishes or is closed.
+        
+        Args:
+            result: Result of prepare
+            conversation_history: Recent messages
+            
+        Yields:
+            Formatted answer chunks
+        """
+        try:
+            if result['answer'] is not None:
+                yield result['answer']
+                return
+            
+            parts = []
+            chunks = self._response_chunks(result, conversation_history)
+            for part in self.response_handler.stream_format(chunks, result['intent'], result['relevant_info'],
+                                                            result['kb_version']):
+                parts.append(part)
+                yield part
+            self.remember(result, ''.join(parts))
+        finally:
+            self._release(result)
+            self._record(result['degraded'])
+    
+    def _response_chunks(self, result: Dict[str, Any], conversation_history: List[Dict]):
+        """Unformatted response: the quick response, the streamed generation or, past the deadline, the fallback"""
+        intent = result['intent']
+        
+        # Handle specific intents with direct responses
+        if intent in QUICK_INTENTS:
+            quick_response = self.llm_handler.get_quick_response(intent)
+            if quick_response:
+                return [quick_response]
+        
+        remaining = self._remaining(result)
+        if remaining <= 0:
+            result['degraded'].append('generate')
+            return [self._fallback_response(intent)]
+        prompt = self.build_prompt(result['query'], intent, result['relevant_info'])
+        # The prompt carries retrieved context, so the handler answers the intent of the message itself
+        llm_intent = self.llm_handler.detect_intent(result['query'], intent)
+        result['answer_intent'] = llm_intent
+        return self.latency.measure_stream('generate', self.llm_handler.stream_response(
+            prompt, conversation_history, result['relevant_info'], timeout=remaining, intent=llm_intent,
+            degraded=result['degraded']))
+    
+    def remember(self, result: Dict[str, Any], answer: str):
+        """
+        Cache the formatted answer of a prepared request
+        
+        Answers from a cache hit or with a degraded stage are not cached, so a
+        slow moment never pins a fallback or cut-off answer; neither are answers
+        that depend on the time of day (UNCACHED_INTENTS).
+        
+        Args:
+            result: Result of prepare
+            answer: The formatted answer shown for it
+        """
+        if result['answer'] is not None or result['degraded'] or result['embedding'] is None:
+            return
+        if result.get('answer_intent', result['intent']) in UNCACHED_INTENTS:
+            return
+        latency_ms = (time.monotonic() - result['started']) * 1000.0
+        self.answer_cache.store(result['kb_version'], result['intent'], result['query'], result['embedding'],
+                                answer, latency_ms)
+    
+    def _fallback_response(self, intent: str) -> str:
+        """Quick response of the intent, else its template"""
+        return self.llm_handler.get_quick_response(intent) or self.response_handler.get_fallback_response(intent)
+    
+    def _record(self, degraded: List[str]):
+        with self._stats_lock:
+            self._stats['requests'] += 1
+            if degraded:
+                self._stats['degraded_requests'] += 1
+            self._degraded.update(degraded)
+    
+    async def answer(self, user_message: str, knowledge_base, conversation_history: List[Dict],
+                     deadline: Optional[float] = None) -> str:
+        """Answer a message within the deadline and format the response"""
+        result = await self.prepare(user_message, knowledge_base, deadline)
+        # Generation blocks while it streams, so the whole answer is collected on the pool
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: ''.join(self.stream(result, conversation_history)))
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get request counts, how often each stage was degraded, stage latencies and answer cache statistics"""
+        with self._stats_lock:
+            return {
+                **self._stats,
+                'degraded_stages': dict(self._degraded),
+                'latency': self.latency.get_stats(),
+                'answer_cache': self.answer_cache.get_stats()
+            }
@@ -0,0 +1,202 @@
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Program groups in programs.json and the study level they represent
+PROGRAM_GROUPS = {
+    'programs': 'undergraduate',
+    'graduate': 'graduate',
+    'doctoral': 'doctoral',
+    'certificate_programs': 'certificate'
+}
+
+LEVEL_ALIASES = {
+    'undergraduate': ['undergraduate', 'bachelor', 'bachelors'],
+    'graduate': ['graduate', 'master', 'masters', 'postgraduate'],
+    'doctoral': ['doctoral', 'doctorate', 'phd'],
+    'certificate': ['certificate', 'certificates', 'certification']
+}
+
+# Name and specialization matches identify programs; the other facets only narrow them
+ENTITY_FACETS = ('name', 'specialization')
+
+# Words that may surround program names in a query that only asks which programs exist
+LOOKUP_FILLER_WORDS = {
+    'a', 'about', 'all', 'an', 'and', 'any', 'are', 'available', 'can', 'course', 'courses',
+    'degree', 'degrees', 'details', 'do', 'does', 'for', 'have', 'i', 'in', 'info', 'information',
+    'is', 'list', 'me', 'of', 'offer', 'offered', 'on', 'or', 'please', 'program', 'programs',
+    'show', 'study', 'tell', 'the', 'there', 'what', 'which', 'with', 'you'
+}
+
+def normalize_phrase(text: str) -> str:
+    """Lowercase a phrase and reduce it to space-separated alphanumeric tokens"""
+    return ' '.join(TOKEN_PATTERN.findall(text.lower()))
+
+class ProgramIndex:
+    """Exact name and facet indexes over programs.json, answering lookups with dict/set operations"""
+    
+    def __init__(self, programs_data: Dict[str, Any]):
+        """
+        Build the indexes
+        
+        Args:
+            programs_data: Parsed programs.json
+        """
+        self.levels: Dict[str, str] = {}
+        self.by_name: Dict[str, Dict] = {}
+        self.facets: Dict[str, Dict[str, Set[str]]] = {
+            'name': {}, 'specialization': {}, 'degree': {}, 'level': {}, 'duration': {}
+        }
+        # Query phrase -> (facet, value) pairs it selects
+        self._phrases: Dict[str, List[Tuple[str, str]]] = {}
+        
+        for group, level in PROGRAM_GROUPS.items():
+            for program in programs_data.get(group, []):
+                if 'name' in program:
+                    self._add_program(program, level)
+        
+        for level, aliases in LEVEL_ALIASES.items():
+            for alias in aliases:
+                self._add_phrase(alias, 'level', level)
+        
+        self.max_phrase_words = max((len(phrase.split()) for phrase in self._phrases), default=0)
+    
+    def _add_phrase(self, phrase: str, facet: str, value: str):
+        phrase = normalize_phrase(phrase)
+        if phrase and (facet, value) not in self._phrases.get(phrase, []):
+            self._phrases.setdefault(phrase, []).append((facet, value))
+    
+    def _add_to_facet(self, facet: str, value: str, key: str):
+        self.facets[facet].setdefault(normalize_phrase(value), set()).add(key)
+    
+    def _add_program(self, program: Dict, level: str):
+        key = normalize_phrase(program['name'])
+        self.levels[key] = level
+        self.by_name[key] = program
+        
+        # A name such as "Master of Business Administration (MBA)" is also found by
+        # its parenthesized abbreviation and by the name without it
+        aliases = [program['name']]
+        abbreviation = re.search(r'\(([^)]*)\)', program['name'])
+        if abbreviation:
+            aliases.append(abbreviation.group(1))
+            aliases.append(re.sub(r'\s*\([^)]*\)', '', program['name']))
+        for alias in aliases:
+            self._add_to_facet('name', alias, key)
+            self._add_phrase(alias, 'name', normalize_phrase(alias))
+        
+        for specialization in program.get('specializations', []):
+            self._add_to_facet('specialization', specialization, key)
+            self._add_phrase(specialization, 'specialization', normalize_phrase(specialization))
+        
+        degree = program.get('degree') or program.get('type')
+        if degree:
+            self._add_to_facet('degree', degree, key)
+            self._add_phrase(degree, 'degree', normalize_phrase(degree))
+        
+        if program.get('duration'):
+            self._add_to_facet('duration', program['duration'], key)
+            self._add_phrase(program['duration'], 'duration', normalize_phrase(program['duration']))
+        
+        self.facets['level'].setdefault(level, set()).add(key)
+    
+    def match_facets(self, query: str) -> Dict[str, Set[str]]:
+        """
+        Find facet values mentioned in a query
+        
+        Scans the query's n-grams longest first, so the cost depends on the query
+        length rather than the number of programs.
+        
+        Args:
+            query: User query
+            
+        Returns:
+            Mapping of facet name to the matched values
+        """
+        return self._scan(query)[0]
+    
+    def _scan(self, query: str) -> Tuple[Dict[str, Set[str]], List[str]]:
+        """Matched facet values of a query and its tokens outside any matched phrase"""
+        tokens = TOKEN_PATTERN.findall(query.lower())
+        matched: Dict[str, Set[str]] = {}
+        unmatched: List[str] = []
+        position = 0
+        while position < len(tokens):
+            for length in range(min(self.max_phrase_words, len(tokens) - position), 0, -1):
+                phrase = ' '.join(tokens[position:position + length])
+                if phrase in self._phrases:
+                    for facet, value in self._phrases[phrase]:
+                        matched.setdefault(facet, set()).add(value)
+                    position += length
+                    break
+            else:
+                unmatched.append(tokens[position])
+                position += 1
+        return matched, unmatched
+    
+    def is_pure_lookup(self, query: str) -> bool:
+        """
+        Check whether a query asks for programs and nothing else
+        
+        "Computer Science program" is a pure lookup; "Computer Science tuition fees"
+        also asks about something the program records do not answer.
+        
+        Args:
+            query: User query
+            
+        Returns:
+            True if the query names a program or specialization and its other words
+            are only facets or filler
+        """
+        matched, _ = self._scan(query)
+        return any(facet in matched for facet in ENTITY_FACETS) and not self.residual_query(query)
+    
+    def residual_query(self, query: str) -> str:
+        """
+        The part of a query left after removing program facets and filler words
+        
+        Args:
+            query: User query
+            
+        Returns:
+            Remaining words, e.g. "tuition fees" for "Computer Science tuition fees"
+        """
+        _, unmatched = self._scan(query)
+        return ' '.join(token for token in unmatched if token not in LOOKUP_FILLER_WORDS)
+    
+    def filter(self, **facets: Any) -> List[Dict]:
+        """
+        Get programs matching all given facets
+        
+        Args:
+            **facets: Facet name to a value or list of values, e.g. specialization="Cybersecurity"
+                or level=["graduate", "doctoral"]; values within a facet are alternatives
+            
+        Returns:
+            Matching program records
+        """
+        keys: Optional[Set[str]] = None
+        for facet, values in facets.items():
+            if isinstance(values, str):
+                values = [values]
+            index = self.facets.get(facet, {})
+            selected = set().union(*(index.get(normalize_phrase(value), set()) for value in values))
+            keys = selected if keys is None else keys & selected
+        return [self.by_name[key] for key in sorted(keys or ())]
+    
+    def lookup(self, query: str) -> List[Dict]:
+        """
+        Answer an entity or facet query exactly
+        
+        Args:
+            query: User query
+            
+        Returns:
+            Matching program records, or an empty list if the query names no program
+            or specialization
+        """
+        matched = self.match_facets(query)
+        if not any(facet in matched for facet in ENTITY_FACETS):
+            return []
+        return self.filter(**{facet: sorted(values) for facet, values in matched.items()})
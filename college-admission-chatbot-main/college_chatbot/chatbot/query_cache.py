@@ -0,0 +1,158 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+def normalize_query(query: str) -> str:
+    """Normalize a query so near-identical typed text shares a cache entry"""
+    normalized = re.sub(r'\s+', ' ', query.strip().lower())
+    return normalized.rstrip('?!. ')
+
+class LRUCache:
+    """Thread-safe bounded LRU cache with optional time-to-live"""
+    
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None):
+        """
+        Initialize the cache
+        
+        Args:
+            max_size: Maximum number of entries kept
+            ttl: Seconds an entry stays valid, or None for no expiry
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a value, marking it as most recently used"""
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                self.misses += 1
+                return default
+            
+            stored_at, value = item
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def put(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entries when full"""
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+    
+    def discard_where(self, predicate) -> int:
+        """Remove all entries whose key matches predicate; returns the count removed"""
+        with self._lock:
+            stale = [key for key in self._data if predicate(key)]
+            for key in stale:
+                del self._data[key]
+            return len(stale)
+    
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._data.clear()
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit-rate and eviction statistics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
+
+class QueryCache:
+    """Caches query embeddings and search results, keyed by knowledge base version"""
+    
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None):
+        """
+        Initialize the query cache
+        
+        Args:
+            max_size: Maximum entries in each of the embedding and result caches
+            ttl: Seconds an entry stays valid, or None for no expiry
+        """
+        self.embeddings = LRUCache(max_size, ttl)
+        self.results = LRUCache(max_size, ttl)
+    
+    def get_embedding(self, version: str, query: str) -> Any:
+        """Get a cached query embedding"""
+        return self.embeddings.get((version, normalize_query(query)))
+    
+    def put_embedding(self, version: str, query: str, embedding: Any):
+        """Cache a query embedding"""
+        self.embeddings.put((version, normalize_query(query)), embedding)
+    
+    def get_results(self, version: str, query: str, top_k: int, *extra: Hashable) -> Optional[List[Dict]]:
+        """Get cached search results; returns a new list so callers may modify it"""
+        results = self.results.get((version, normalize_query(query), top_k) + extra)
+        return list(results) if results is not None else None
+    
+    def put_results(self, version: str, query: str, top_k: int, results: List[Dict], *extra: Hashable):
+        """Cache search results"""
+        self.results.put((version, normalize_query(query), top_k) + extra, list(results))
+    
+    def invalidate_version(self, version: str) -> int:
+        """Drop all entries cached for a knowledge base version"""
+        removed = 0
+        for cache in (self.embeddings, self.results):
+            removed += cache.discard_where(lambda key: key[0] == version)
+        if removed:
+            logger.info(f"Invalidated {removed} cached queries for knowledge base version {version}")
+        return removed
+    
+    def clear(self):
+        """Remove all cached queries"""
+        self.embeddings.clear()
+        self.results.clear()
+    
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get statistics for the embedding and result caches"""
+        return {
+            'embeddings': self.embeddings.get_stats(),
+            'results': self.results.get_stats()
+        }
+
+_shared_query_cache: Optional[QueryCache] = None
+_shared_lock = threading.Lock()
+
+def get_shared_query_cache(max_size: int = 1024, ttl: Optional[float] = None) -> QueryCache:
+    """Get the process-wide query cache shared by all sessions"""
+    global _shared_query_cache
+    with _shared_lock:
+        if _shared_query_cache is None:
+            _shared_query_cache = QueryCache(max_size, ttl)
+        return _shared_query_cache
@@ -1,7 +1,17 @@
 import re
-from typing import List, Dict, Any, Optional
+import sys
+from pathlib import Path
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 import logging
 
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config import Config
+from .intent_engine import get_intent_engine
+from .query_cache import LRUCache
+from .retrieval import LatencyTracker
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -9,34 +19,24 @@ logger = logging.getLogger(__name__)
 class ResponseHandler:
     """Handles response processing and formatting for the College Admission Chatbot"""
     
+    SUGGESTIONS = {
+        'admission_requirements': '• Application deadlines\n• Available programs\n• Tuition fees',
+        'deadlines': '• Admission requirements\n• Application process\n• Contact information',
+        'programs': '• Admission requirements\n• Tuition fees\n• Application deadlines',
+        'fees': '• Financial aid options\n• Payment plans\n• Scholarship opportunities',
+        'contact': '• Campus visit scheduling\n• Virtual tour options\n• Application status check',
+        'general': '• Admission requirements\n• Available programs\n• Application deadlines\n• Tuition fees'
+    }
+    
+    # Relevant entries shown under a response
+    MAX_RELEVANT_INFO = 2
+    
+    UNHELPFUL_MARKERS = ("I don't know", "I'm not sure", "Feel free to ask")
+    
     def __init__(self):
         """Initialize the response handler"""
-        self.intent_keywords = {
-            'admission_requirements': [
-                'requirements', 'eligibility', 'criteria', 'qualify', 'admit', 
-                'application', 'documents', 'needed', 'required'
-            ],
-            'deadlines': [
-                'deadline', 'last date', 'application date', 'closing date', 
-                'when to apply', 'due date', 'submit by'
-            ],
-            'programs': [
-                'courses', 'programs', 'departments', 'majors', 'degrees', 
-                'studies', 'subjects', 'fields', 'disciplines'
-            ],
-            'fees': [
-                'fees', 'cost', 'tuition', 'expenses', 'payment', 'scholarship',
-                'financial aid', 'money', 'price', 'affordable'
-            ],
-            'contact': [
-                'contact', 'phone', 'email', 'address', 'office', 'reach',
-                'call', 'visit', 'location'
-            ],
-            'general': [
-                'hello', 'hi', 'help', 'about', 'information', 'tell me',
-                'what is', 'how', 'where'
-            ]
-        }
+        # Keyword vocabulary shared with the LLM handler, compiled once
+        self.intent_engine = get_intent_engine()
         
         # Response templates
         self.response_templates = {
@@ -143,6 +143,33 @@ Contact our financial aid office for personalized information!
 We're here to help you with your admission journey!
             """
         }
+        
+        # Formatted responses keyed by their inputs; see format_response
+        self.render_cache = LRUCache(Config.RENDER_CACHE_SIZE)
+        self.templates_version = 0
+        self._build_static_blocks()
+        
+        # Time to first chunk and total time of streamed responses
+        self.latency = LatencyTracker()
+    
+    def _build_static_blocks(self):
+        """Prebuild the suggestion blocks appended to responses"""
+        self._suggestion_blocks = {
+            intent: f"\n\n💡 **You might also want to know:**\n{suggestions}"
+            for intent, suggestions in self.SUGGESTIONS.items()
+        }
+    
+    def update_templates(self, templates: Dict[str, str]):
+        """
+        Replace or add response templates, invalidating formatted responses
+        
+        Args:
+            templates: Intent to template text
+        """
+        self.response_templates.update(templates)
+        self.templates_version += 1
+        self._build_static_blocks()
+        self.render_cache.clear()
     
     def detect_intent(self, user_message: str) -> str:
         """
@@ -154,25 +181,32 @@ We're here to help you with your admission journey!
         Returns:
             Detected intent category
         """
-        user_message_lower = user_message.lower()
+        # One pass counts the keyword matches of every intent
+        intent_scores = self.intent_engine.match(user_message)
         
-        # Count keyword matches for each intent
-        intent_scores = {}
-        
-        for intent, keywords in self.intent_keywords.items():
-            score = 0
-            for keyword in keywords:
-                if keyword in user_message_lower:
-                    score += 1
-            intent_scores[intent] = score
+        # Greetings have no template of their own and are answered as general questions
+        if 'greeting' in intent_scores:
+            intent_scores['general'] = intent_scores.get('general', 0) + intent_scores.pop('greeting')
         
         # Return the intent with highest score
-        if max(intent_scores.values()) > 0:
-            return max(intent_scores, key=intent_scores.get)
-        
-        return 'general'
+        return self.intent_engine.best(intent_scores, default='general')
+    
+    def _render_key(self, response: str, intent: str, relevant_info: Optional[List[Dict]],
+                    kb_version: Optional[str]) -> Optional[Tuple]:
+        """Cache key of a formatted response, or None if the inputs cannot be identified"""
+        entry_ids = []
+        for info in (relevant_info or [])[:self.MAX_RELEVANT_INFO]:
+            entry_id = info.get('knowledge', {}).get('id')
+            if entry_id is None:
+                return None
+            entry_ids.append(entry_id)
+        # An entry keeps its id when its answer is edited, so the version is needed to tell them apart
+        if entry_ids and kb_version is None:
+            return None
+        return (intent, response, tuple(entry_ids), kb_version if entry_ids else None, self.templates_version)
     
-    def format_response(self, response: str, intent: str, relevant_info: List[Dict] = None) -> str:
+    def format_response(self, response: str, intent: str, relevant_info: List[Dict] = None,
+                        kb_version: Optional[str] = None) -> str:
         """
         Format the response based on intent and relevant information
         
@@ -180,50 +214,125 @@ We're here to help you with your admission journey!
             response: Raw response from LLM
             intent: Detected intent
             relevant_info: Relevant information from knowledge base
+            kb_version: Version of the knowledge base relevant_info came from; the
+                response is only cached when it is given (or there is no relevant info)
             
         Returns:
             Formatted response
         """
+        key = self._render_key(response, intent, relevant_info, kb_version)
+        if key is not None:
+            cached = self.render_cache.get(key)
+            if cached is not None:
+                return cached
+        
         try:
-            # Use template if available and response is too generic
-            if intent in self.response_templates and (
-                len(response) < 50 or 
-                "I don't know" in response or 
-                "I'm not sure" in response or
-                "Feel free to ask" in response
-            ):
-                base_response = self.response_templates[intent]
-            else:
-                base_response = response
-            
-            # Add relevant information from knowledge base
-            if relevant_info:
-                additional_info = self._extract_relevant_info(relevant_info, intent)
-                if additional_info:
-                    base_response += f"\n\n📌 **Additional Information:**\n{additional_info}"
-            
-            # Add helpful suggestions
-            suggestions = self._get_helpful_suggestions(intent)
-            if suggestions:
-                base_response += f"\n\n💡 **You might also want to know:**\n{suggestions}"
-            
-            return base_response
+            formatted = ''.join(self._render_stages([response], intent, relevant_info))
+        except Exception as e:
+            logger.error(f"Error formatting response: {e}")
+            return self.get_fallback_response(intent)
+        
+        if key is not None:
+            self.render_cache.put(key, formatted)
+        return formatted
+    
+    def stream_format(self, chunks: Iterable[str], intent: str, relevant_info: List[Dict] = None,
+                      kb_version: Optional[str] = None) -> Iterator[str]:
+        """
+        Format a streamed response stage by stage
+        
+        The response body is passed through as it arrives, followed by the
+        additional-information and suggestion blocks; the joined output equals
+        format_response, with which it shares the render cache.
+        
+        Args:
+            chunks: Raw response chunks
+            intent: Detected intent
+            relevant_info: Relevant information from knowledge base
+            kb_version: Version of the knowledge base relevant_info came from
             
+        Yields:
+            Formatted response chunks
+        """
+        # Only a response given in full (e.g. a quick response) is known up front to key the cache
+        key = None
+        if isinstance(chunks, (list, tuple)):
+            key = self._render_key(''.join(chunks), intent, relevant_info, kb_version)
+        if key is not None:
+            cached = self.render_cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+        
+        parts = []
+        try:
+            for part in self._render_stages(chunks, intent, relevant_info):
+                parts.append(part)
+                yield part
         except Exception as e:
             logger.error(f"Error formatting response: {e}")
-            return self._get_fallback_response(intent)
+            # Chunks already shown cannot be taken back
+            if not parts:
+                yield self.get_fallback_response(intent)
+            return
+        
+        if key is not None:
+            self.render_cache.put(key, ''.join(parts))
+    
+    def _is_generic(self, response_start: str) -> bool:
+        return len(response_start) < Config.GENERIC_RESPONSE_LENGTH or any(marker in response_start for marker in self.UNHELPFUL_MARKERS)
+    
+    def _render_stages(self, chunks: Iterable[str], intent: str, relevant_info: Optional[List[Dict]]) -> Iterator[str]:
+        """Yield the body, additional-information and suggestion blocks of a formatted response"""
+        # The first chunk decides: a response given in full, or the head a generated stream holds back
+        chunks = iter(chunks)
+        head = next(chunks, '')
+        
+        # Use template if available and response is too generic
+        if intent in self.response_templates and self._is_generic(head):
+            self._close(chunks)
+            yield self.response_templates[intent]
+        elif not self.validate_response_quality(head):
+            # Nothing of a response failing the quality check is shown
+            self._close(chunks)
+            yield self.get_fallback_response(intent)
+            return
+        else:
+            if head:
+                yield head
+            for chunk in chunks:
+                if chunk:
+                    yield chunk
+        
+        # Add relevant information from knowledge base
+        if relevant_info:
+            additional_info = self._extract_relevant_info(relevant_info, intent)
+            if additional_info:
+                yield f"\n\n📌 **Additional Information:**\n{additional_info}"
+        
+        # Add helpful suggestions
+        suggestions = self._suggestion_blocks.get(intent, '')
+        if suggestions:
+            yield suggestions
+    
+    @staticmethod
+    def _close(chunks: Iterator[str]):
+        """Stop a replaced response stream, e.g. so its generation is cancelled"""
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
     
     def _extract_relevant_info(self, relevant_info: List[Dict], intent: str) -> str:
         """Extract and format relevant information"""
         info_parts = []
         
-        for info in relevant_info[:2]:  # Use top 2 relevant pieces
+        for info in relevant_info[:self.MAX_RELEVANT_INFO]:
             knowledge = info.get('knowledge', {})
             
             if knowledge.get('type') == 'faq':
                 info_parts.append(f"• **Q:** {knowledge.get('question', '')}")
                 info_parts.append(f"  **A:** {knowledge.get('answer', '')}")
-            
+                
             elif knowledge.get('type') == 'program':
                 program_data = knowledge.get('data', {})
                 info_parts.append(f"• **{program_data.get('name', '')}** ({program_data.get('degree', '')})")
@@ -233,16 +342,7 @@ We're here to help you with your admission journey!
     
     def _get_helpful_suggestions(self, intent: str) -> str:
         """Get helpful suggestions based on intent"""
-        suggestions = {
-            'admission_requirements': '• Application deadlines\n• Available programs\n• Tuition fees',
-            'deadlines': '• Admission requirements\n• Application process\n• Contact information',
-            'programs': '• Admission requirements\n• Tuition fees\n• Application deadlines',
-            'fees': '• Financial aid options\n• Payment plans\n• Scholarship opportunities',
-            'contact': '• Campus visit scheduling\n• Virtual tour options\n• Application status check',
-            'general': '• Admission requirements\n• Available programs\n• Application deadlines\n• Tuition fees'
-        }
-        
-        return suggestions.get(intent, '')
+        return self.SUGGESTIONS.get(intent, '')
     
     def validate_response_quality(self, response: str) -> bool:
         """
@@ -268,7 +368,7 @@ We're here to help you with your admission journey!
         
         response_lower = response.lower()
         for phrase in unhelpful_phrases:
-            if phrase in response_lower:
+            if phrase.lower() in response_lower:
                 return False
         
         return True
@@ -0,0 +1,95 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], weights: Sequence[float], k: int = 60) -> List[Tuple[int, float]]:
+    """
+    Merge ranked result lists with weighted reciprocal rank fusion
+    
+    Args:
+        rankings: One list of document indices per retriever, best first
+        weights: Fusion weight of each retriever
+        k: Rank offset; larger values flatten the contribution of top ranks
+        
+    Returns:
+        List of (document index, fused score), best first
+    """
+    fused: Dict[int, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + weight / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+class LatencyTracker:
+    """Thread-safe per-stage latency statistics"""
+    
+    def __init__(self):
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+    
+    def record(self, stage: str, seconds: float):
+        """Record one timing for a stage"""
+        with self._lock:
+            stats = self._stats.setdefault(stage, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'last_ms': 0.0})
+            ms = seconds * 1000.0
+            stats['count'] += 1
+            stats['total_ms'] += ms
+            stats['max_ms'] = max(stats['max_ms'], ms)
+            stats['last_ms'] = ms
+    
+    @contextmanager
+    def measure(self, stage: str):
+        """Context manager timing the enclosed block as a stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+    
+    def measure_stream(self, stage: str, chunks: Iterable[str]) -> Iterator[str]:
+        """
+        Pass a stream through, timing it as two stages
+        
+        Timing starts at this call, so the stream should be wrapped as the
+        request starts; '<stage>_first_chunk' is the time to first token and
+        '<stage>_total' the time until the stream is exhausted.
+        
+        Args:
+            stage: Stage name prefix
+            chunks: Stream to time
+            
+        Returns:
+            The same chunks
+        """
+        start = time.perf_counter()
+        
+        def timed():
+            first = True
+            try:
+                for chunk in chunks:
+                    if first:
+                        self.record(f"{stage}_first_chunk", time.perf_counter() - start)
+                        first = False
+                    yield chunk
+            finally:
+                # A consumer that stops early stops the wrapped stream too
+                close = getattr(chunks, 'close', None)
+                if close is not None:
+                    close()
+            self.record(f"{stage}_total", time.perf_counter() - start)
+        
+        return timed()
+    
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """Get count, mean, max and last latency in milliseconds per stage"""
+        with self._lock:
+            return {
+                stage: {
+                    'count': stats['count'],
+                    'mean_ms': stats['total_ms'] / stats['count'],
+                    'max_ms': stats['max_ms'],
+                    'last_ms': stats['last_ms']
+                }
+                for stage, stats in self._stats.items()
+            }
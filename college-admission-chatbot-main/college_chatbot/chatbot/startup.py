@@ -0,0 +1,65 @@
+"""Startup time checks: run `python -m chatbot.startup` from the app directory"""
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config import Config
+
+APP_DIR = Path(__file__).parent.parent
+
+def _time_in_fresh_interpreter(statement: str) -> float:
+    """
+    Time a statement in new interpreters so imports are measured cold
+    
+    The fastest of Config.STARTUP_MEASURE_RUNS runs is returned, so scheduler and
+    disk-cache noise does not fail a budget.
+    
+    Returns:
+        Elapsed milliseconds
+    """
+    return min(_time_once(statement) for _ in range(max(1, Config.STARTUP_MEASURE_RUNS)))
+
+def _time_once(statement: str) -> float:
+    code = (
+        "import time\n"
+        "start = time.perf_counter()\n"
+        f"{statement}\n"
+        "print((time.perf_counter() - start) * 1000)\n"
+    )
+    output = subprocess.run([sys.executable, "-c", code], cwd=APP_DIR, capture_output=True,
+                            text=True, check=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+def measure_import_times() -> Dict[str, float]:
+    """Cold import time in milliseconds of each module with a budget"""
+    return {
+        module: _time_in_fresh_interpreter(f"import {module}")
+        for module in Config.IMPORT_TIME_BUDGETS_MS
+    }
+
+def measure_quick_answer_time() -> float:
+    """Milliseconds from a cold start to a quick intent answer, including imports"""
+    return _time_in_fresh_interpreter(
+        "from chatbot.llm_handler import LLMHandler\n"
+        "LLMHandler().get_quick_response('deadlines')"
+    )
+
+def check_startup_budgets() -> bool:
+    """Print measured startup times against their budgets; returns True if all are within budget"""
+    within_budget = True
+    rows = [(f"import {module}", elapsed, Config.IMPORT_TIME_BUDGETS_MS[module])
+            for module, elapsed in measure_import_times().items()]
+    rows.append(("quick answer", measure_quick_answer_time(), Config.QUICK_ANSWER_BUDGET_MS))
+    
+    for name, elapsed, budget in rows:
+        ok = elapsed <= budget
+        within_budget = within_budget and ok
+        print(f"{'OK  ' if ok else 'OVER'} {name:<36} {elapsed:8.1f} ms (budget {budget} ms)")
+    
+    return within_budget
+
+if __name__ == "__main__":
+    sys.exit(0 if check_startup_budgets() else 1)
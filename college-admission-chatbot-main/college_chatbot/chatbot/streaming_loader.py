@@ -0,0 +1,141 @@
+import json
+from itertools import islice
+from pathlib import Path
+from typing import Any, Iterable, Iterator, List, Optional, TextIO
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class _ChunkReader:
+    """Buffered reader that decodes JSON values from a text stream chunk by chunk"""
+    
+    WHITESPACE = ' \t\r\n'
+    DELIMITERS = WHITESPACE + ',:]}'
+    
+    def __init__(self, f: TextIO, chunk_size: int):
+        self._f = f
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+    
+    def _fill(self) -> bool:
+        """Read another chunk, dropping the consumed prefix; returns False at end of file"""
+        if self._eof:
+            return False
+        chunk = self._f.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+    
+    def peek(self) -> str:
+        """Next non-whitespace character, or '' at end of file"""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in self.WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ''
+    
+    def expect(self, char: str):
+        """Consume the next non-whitespace character, which must be char"""
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} but found {found or 'end of file'!r}")
+        self._pos += 1
+    
+    def decode(self) -> Any:
+        """Decode the next JSON value, reading more chunks until it is complete"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+                # A value is complete once a delimiter follows it; "4" may still become "4.5e3"
+                if self._eof or (end < len(self._buffer) and self._buffer[end] in self.DELIMITERS):
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            self._fill()
+    
+    def seek_key(self, key: str) -> bool:
+        """Move to the value of a top-level object key; returns False if the key is absent"""
+        self.expect('{')
+        while self.peek() not in ('}', ''):
+            name = self.decode()
+            self.expect(':')
+            if name == key:
+                return True
+            # Other sections are decoded and discarded one at a time
+            self.decode()
+            if self.peek() == ',':
+                self._pos += 1
+        return False
+
+def iter_json_array(path: Path, key: Optional[str] = None, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """
+    Yield the items of a JSON array one at a time without parsing the whole file
+    
+    Args:
+        path: JSON file holding an array, or an object with the array under key
+        key: Top-level key of the array, or None if the file is the array itself
+        chunk_size: Characters read per chunk
+        
+    Yields:
+        Decoded array items
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        reader = _ChunkReader(f, chunk_size)
+        if key is not None and not reader.seek_key(key):
+            return
+        reader.expect('[')
+        while reader.peek() != ']':
+            yield reader.decode()
+            if reader.peek() == ',':
+                reader.expect(',')
+            elif reader.peek() != ']':
+                raise ValueError(f"Expected ',' or ']' in {path}")
+
+def iter_jsonl(path: Path) -> Iterator[Any]:
+    """
+    Yield the records of a JSON Lines file, skipping blank and invalid lines
+    
+    Args:
+        path: JSONL file with one JSON value per line
+        
+    Yields:
+        Decoded records
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.warning(f"Skipping invalid line {line_number} of {path}: {e}")
+
+def iter_records(path: Path, key: Optional[str] = None) -> Iterator[Any]:
+    """Stream records from a .jsonl file or from the array under key in a .json file"""
+    path = Path(path)
+    if path.suffix == '.jsonl':
+        return iter_jsonl(path)
+    return iter_json_array(path, key)
+
+def batched(items: Iterable[Any], batch_size: int) -> Iterator[List[Any]]:
+    """Group an iterable into lists of at most batch_size items"""
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
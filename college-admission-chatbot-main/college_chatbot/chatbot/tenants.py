@@ -0,0 +1,180 @@
+import re
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import logging
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config import Config
+from .knowledge_base import KnowledgeBase
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TENANT_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]+$")
+
+class TenantManager:
+    """Serves the knowledge bases of several colleges from one process
+    
+    Tenants share the embedding model and the query cache. A tenant's knowledge
+    base is loaded on first access, and the least recently used ones are evicted
+    once their estimated memory exceeds the budget. Embeddings stay in each
+    tenant's on-disk store, so a returning tenant attaches to them without
+    re-encoding.
+    """
+    
+    def __init__(self, tenants_dir: Optional[str] = None, memory_budget_mb: float = Config.TENANT_MEMORY_BUDGET_MB,
+                 store_dir: Optional[str] = None, watch: bool = False):
+        """
+        Initialize the manager
+        
+        Args:
+            tenants_dir: Directory with one data directory per tenant; defaults to Config.TENANTS_DIR
+            memory_budget_mb: Estimated memory all loaded tenants may use together
+            store_dir: Root of the tenants' embedding stores; defaults to Config.TENANT_STORE_DIR
+            watch: Hot-reload each loaded tenant's data files
+        """
+        tenants_dir = tenants_dir if tenants_dir is not None else Config.TENANTS_DIR
+        self.tenants_dir = Path(tenants_dir) if tenants_dir is not None else None
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.store_dir = Path(store_dir if store_dir is not None else Config.TENANT_STORE_DIR)
+        self.watch = watch
+        self._data_dirs: Dict[str, Path] = {}
+        self._loaded: "OrderedDict[str, KnowledgeBase]" = OrderedDict()
+        # Tenants being loaded; other requests for the same tenant wait on its future
+        self._loading: Dict[str, Future] = {}
+        self._lock = threading.RLock()
+        self._stats = {'loads': 0, 'hits': 0, 'evictions': 0}
+    
+    def register(self, tenant_id: str, data_dir: str):
+        """Add a tenant whose data directory is outside tenants_dir"""
+        if not TENANT_ID_PATTERN.match(tenant_id):
+            raise ValueError(f"Invalid tenant id: {tenant_id}")
+        with self._lock:
+            self._data_dirs[tenant_id] = Path(data_dir)
+    
+    def tenant_ids(self) -> List[str]:
+        """Ids of all known tenants, loaded or not"""
+        tenant_ids = set(self._data_dirs)
+        if self.tenants_dir is not None and self.tenants_dir.is_dir():
+            tenant_ids.update(path.name for path in self.tenants_dir.iterdir()
+                              if path.is_dir() and TENANT_ID_PATTERN.match(path.name))
+        return sorted(tenant_ids)
+    
+    def _data_dir(self, tenant_id: str) -> Path:
+        if tenant_id in self._data_dirs:
+            return self._data_dirs[tenant_id]
+        # The id pattern keeps tenant ids from reaching outside tenants_dir
+        if self.tenants_dir is not None and TENANT_ID_PATTERN.match(tenant_id):
+            data_dir = self.tenants_dir / tenant_id
+            if data_dir.is_dir():
+                return data_dir
+        raise KeyError(f"Unknown tenant: {tenant_id}")
+    
+    def get(self, tenant_id: str) -> KnowledgeBase:
+        """
+        Get a tenant's knowledge base, loading it if needed
+        
+        Args:
+            tenant_id: Tenant id (name of its data directory)
+            
+        Returns:
+            The tenant's knowledge base
+            
+        Raises:
+            KeyError: If the tenant is unknown
+        """
+        with self._lock:
+            knowledge_base = self._loaded.get(tenant_id)
+            if knowledge_base is not None:
+                self._loaded.move_to_end(tenant_id)
+                self._stats['hits'] += 1
+                # Usage grows once a tenant's embeddings are built, so the budget is checked on every access
+                self._enforce_budget(keep=tenant_id)
+                return knowledge_base
+            
+            future = self._loading.get(tenant_id)
+            if future is None:
+                data_dir = self._data_dir(tenant_id)
+                future = self._loading[tenant_id] = Future()
+                loader = True
+            else:
+                loader = False
+        
+        if not loader:
+            # Another request is loading this tenant; raises its error if the load failed
+            return future.result()
+        
+        # Building a knowledge base reads the tenant's data, so it runs outside the
+        # manager lock and requests for other tenants are not held up
+        try:
+            knowledge_base = self._load(tenant_id, data_dir)
+        except Exception as e:
+            with self._lock:
+                self._loading.pop(tenant_id, None)
+            future.set_exception(e)
+            raise
+        
+        with self._lock:
+            self._loaded[tenant_id] = knowledge_base
+            self._loading.pop(tenant_id, None)
+            self._stats['loads'] += 1
+            self._enforce_budget(keep=tenant_id)
+        future.set_result(knowledge_base)
+        return knowledge_base
+    
+    def _load(self, tenant_id: str, data_dir: Path) -> KnowledgeBase:
+        knowledge_base = KnowledgeBase(str(data_dir), store_dir=str(self.store_dir / tenant_id))
+        if self.watch:
+            knowledge_base.start_watching()
+        # Keyword search answers until the tenant's embeddings are ready
+        knowledge_base.load_model_in_background()
+        logger.info(f"Loaded tenant {tenant_id} from {data_dir}")
+        return knowledge_base
+    
+    def _enforce_budget(self, keep: Optional[str] = None):
+        """Evict least recently used tenants until the loaded ones fit the budget"""
+        usage = {tenant_id: knowledge_base.get_memory_usage()['total']
+                 for tenant_id, knowledge_base in self._loaded.items()}
+        total = sum(usage.values())
+        for tenant_id in list(self._loaded):
+            if total <= self.memory_budget:
+                break
+            if tenant_id != keep:
+                total -= usage[tenant_id]
+                self._evict(tenant_id)
+    
+    def _evict(self, tenant_id: str):
+        knowledge_base = self._loaded.pop(tenant_id)
+        knowledge_base.stop_watching()
+        # Sessions still holding the knowledge base keep working; the cached queries are dropped
+        knowledge_base.query_cache.invalidate_version(knowledge_base.version)
+        self._stats['evictions'] += 1
+        logger.info(f"Evicted tenant {tenant_id}")
+    
+    def evict(self, tenant_id: str) -> bool:
+        """Unload a tenant; returns True if it was loaded"""
+        with self._lock:
+            if tenant_id not in self._loaded:
+                return False
+            self._evict(tenant_id)
+            return True
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get load, hit and eviction counts and the memory used by each loaded tenant"""
+        with self._lock:
+            memory = {tenant_id: knowledge_base.get_memory_usage()['total']
+                      for tenant_id, knowledge_base in self._loaded.items()}
+            return {
+                **self._stats,
+                'loaded': list(self._loaded),
+                'memory_bytes': memory,
+                'total_memory_bytes': sum(memory.values()),
+                'memory_budget_bytes': self.memory_budget
+            }
@@ -0,0 +1,37 @@
+import numpy as np
+
+def l2_normalize(vectors: np.ndarray) -> np.ndarray:
+    """
+    L2-normalize vectors row-wise as float32
+    
+    Args:
+        vectors: 1-D vector or 2-D matrix of vectors
+        
+    Returns:
+        Normalized float32 copy; zero vectors are left as zeros
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, np.float32(1e-12))
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Get indices of the k highest scores, best first
+    
+    Uses argpartition so only the selected k entries are sorted.
+    
+    Args:
+        scores: 1-D array of scores
+        k: Number of indices to return
+        
+    Returns:
+        Indices of the top k scores in descending score order
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < len(scores):
+        candidates = np.argpartition(scores, -k)[-k:]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(scores[candidates])[::-1]]
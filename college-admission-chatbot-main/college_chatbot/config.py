@@ -24,25 +24,157 @@ class Config:
     MAX_TOKENS = 150
     TEMPERATURE = 0.7
     TOP_P = 0.9
+    # Optional generative model behind LLMHandler.get_response: None (rule-based answers only),
+    # "transformers" (MODEL_NAME on CPU, loaded on first use) or "stub" (tiny local model for tests)
+    GENERATION_BACKEND = None
+    GENERATION_MAX_BATCH = 8  # concurrent requests generated together
+    GENERATION_MAX_WAIT_MS = 20  # how long a request waits for others to join its batch
+    GENERATION_TIMEOUT = 30  # seconds before the rule-based answer is used instead
+    
+    # Request deadline shared by intent detection, retrieval and generation; a stage that
+    # would overrun it is abandoned and the answer falls back to the quick response or template
+    RESPONSE_DEADLINE = 10.0  # seconds
+    RESPONSE_RESERVE = 0.05  # seconds kept back for formatting the answer
+    MAX_CONCURRENT_REQUESTS = 16  # requests answered at once across sessions
     
     # Knowledge Base Configuration
     EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+    # "sentence-transformers", "int8" (dynamically quantized for CPU), "onnx" (needs
+    # optimum and onnxruntime) or "hashing" (offline, no download; for tests)
+    EMBEDDING_BACKEND = "sentence-transformers"
     SIMILARITY_THRESHOLD = 0.3
-    MAX_CONTEXT_LENGTH = 1000
+    MAX_CONTEXT_LENGTH = 1000  # tokens of a generation prompt, retrieved context included
+    # Tokenizer counting prompt tokens, loaded on first use when transformers is installed;
+    # None, or a tokenizer that fails to load, estimates counts from word lengths instead
+    TOKENIZER_NAME = MODEL_NAME
+    EMBEDDING_CACHE_DIR = BASE_DIR / ".cache" / "embeddings"
+    # Memory-mapped embedding store shared by worker processes, e.g. BASE_DIR / ".cache" / "store"
+    EMBEDDING_STORE_DIR = None
+    # FAQs from faqs.jsonl, or a faqs.json of at least this size, are streamed in
+    # batches into a store (EMBEDDING_STORE_DIR, else INGEST_STORE_DIR)
+    STREAM_MIN_FILE_BYTES = 8 * 1024 * 1024
+    INGEST_BATCH_SIZE = 256
+    INGEST_STORE_DIR = BASE_DIR / ".cache" / "stores"
+    
+    # Builds encoding at least BULK_MIN_TEXTS texts run in batches across worker
+    # processes, checkpointing each batch so an interrupted build resumes
+    BULK_MIN_TEXTS = 2000
+    BULK_BATCH_SIZE = 512
+    BULK_WORKERS = None  # None for one per CPU core; 1 encodes in-process
+    BULK_CHECKPOINT_DIR = BASE_DIR / ".cache" / "bulk_checkpoints"
+    BULK_PROGRESS_INTERVAL = 5.0  # seconds between throughput/ETA log lines
+    
+    # Multi-tenant hosting: one data directory per college under TENANTS_DIR, chosen
+    # with the ?college=<name> URL parameter; None serves DATA_DIR only
+    TENANTS_DIR = None
+    TENANT_MEMORY_BUDGET_MB = 512  # least recently used tenants are evicted above this
+    TENANT_STORE_DIR = BASE_DIR / ".cache" / "tenant_stores"
+    QUERY_CACHE_SIZE = 1024
+    QUERY_CACHE_TTL = 3600  # seconds
+    RENDER_CACHE_SIZE = 256  # formatted responses kept by ResponseHandler
+    # Semantic answer cache shared by all sessions
+    ANSWER_CACHE_SIZE = 512
+    # Cosine similarity at or above which a question reuses a cached answer; strict,
+    # since questions about different programs or fees often embed close together
+    ANSWER_CACHE_MIN_SIMILARITY = 0.95
+    ANSWER_CACHE_MAX_BYTES = 8 * 1024 * 1024
+    
+    # Retrieval Configuration
+    RETRIEVAL_MODE = "hybrid"  # "dense", "lexical" or "hybrid"
+    HYBRID_CANDIDATES = 20  # results taken from each retriever before fusion
+    HYBRID_DENSE_WEIGHT = 1.0
+    HYBRID_LEXICAL_WEIGHT = 1.0
+    HYBRID_RRF_K = 60
+    
+    # Approximate nearest-neighbour index; corpora below ANN_MIN_ENTRIES use exact search
+    ANN_BACKEND = "auto"  # "exact", "ivf", "hnsw" (needs faiss-cpu), "quantized" or "auto"
+    ANN_MIN_ENTRIES = 5000
+    ANN_INDEX_DIR = BASE_DIR / ".cache" / "indexes"
+    ANN_IVF_NLIST = None  # defaults to 4 * sqrt(corpus size)
+    ANN_IVF_NPROBE = 8  # lists scanned per query: higher is slower with better recall
+    ANN_HNSW_M = 32
+    ANN_HNSW_EF_CONSTRUCTION = 200
+    ANN_HNSW_EF_SEARCH = 64  # higher is slower with better recall
+    ANN_RECALL_SAMPLE = 200  # queries used to report recall@10 when an index is built, 0 to skip
+    
+    # Quantized backend: first pass over compact codes, candidates rescored at full precision
+    QUANTIZE_DTYPE = "float32"  # "float32" (fastest scan), "int8" (4x smaller) or "float16" (2x smaller, slowest scan)
+    QUANTIZE_DIMENSIONS = 96  # dimensions kept in the codes, None for all; fewer scan faster
+    QUANTIZE_REDUCTION = "pca"  # "pca" or "truncate"
+    QUANTIZE_RESCORE_FACTOR = 4  # candidates rescored per requested result
+    
+    # Seconds between checks of the data files for changes
+    DATA_WATCH_INTERVAL = 2.0
     
     # Response Configuration
     MAX_RESPONSE_LENGTH = 500
     MIN_RESPONSE_LENGTH = 20
+    # Shorter responses are generic and replaced by the intent's template; a streamed
+    # completion is held back until this long so its first chunk decides
+    GENERIC_RESPONSE_LENGTH = 50
     
-    # Intent Categories
+    # Intent Categories, shared by every intent detector (see chatbot/intent_engine.py)
     INTENTS = {
-        'admission_requirements': ['requirements', 'eligibility', 'criteria', 'qualify', 'admit'],
-        'deadlines': ['deadline', 'last date', 'application date', 'closing date', 'when to apply'],
-        'programs': ['courses', 'programs', 'departments', 'majors', 'degrees', 'studies'],
-        'fees': ['fees', 'cost', 'tuition', 'expenses', 'payment', 'scholarship'],
-        'contact': ['contact', 'phone', 'email', 'address', 'office', 'reach'],
-        'general': ['hello', 'hi', 'help', 'about', 'information']
+        'admission_requirements': ['requirements', 'requirement', 'eligibility', 'eligible', 'criteria', 'qualify',
+                                   'admit', 'application', 'documents', 'needed', 'required'],
+        'deadlines': ['deadline', 'deadlines', 'last date', 'application date', 'closing date', 'when to apply',
+                      'due date', 'submit by'],
+        'programs': ['courses', 'course', 'programs', 'program', 'departments', 'majors', 'degrees', 'studies',
+                     'subjects', 'fields', 'disciplines'],
+        'fees': ['fees', 'fee', 'cost', 'tuition', 'expenses', 'payment', 'scholarship', 'scholarships',
+                 'financial aid', 'money', 'price', 'affordable'],
+        'contact': ['contact', 'phone', 'email', 'address', 'office', 'reach', 'call', 'visit', 'location'],
+        'greeting': ['hello', 'hi', 'hey', 'good morning', 'good afternoon', 'good evening'],
+        'general': ['help', 'about', 'information', 'tell me', 'what is', 'how', 'where']
+    }
+    
+    # Embedding intent classifier: labeled seed phrases per intent, averaged into centroids;
+    # below INTENT_MIN_SIMILARITY the keyword detector decides
+    INTENT_SEEDS = {
+        'admission_requirements': [
+            "What are the admission requirements?",
+            "Am I eligible to apply?",
+            "Which documents do I need to submit?",
+            "What grades or entrance exam scores are required?",
+            "What do I need to get admitted?"
+        ],
+        'deadlines': [
+            "When is the application deadline?",
+            "What is the last date to apply?",
+            "When does the semester start?",
+            "Is it too late to submit my application?",
+            "When do applications close for fall?"
+        ],
+        'programs': [
+            "What programs do you offer?",
+            "Which courses and majors are available?",
+            "Do you have a computer science degree?",
+            "How long is the MBA program?",
+            "What can I study at this college?"
+        ],
+        'fees': [
+            "How much is the tuition fee?",
+            "What does it cost to study here?",
+            "Are scholarships or financial aid available?",
+            "How do I pay my fees?",
+            "Is there an application fee?"
+        ],
+        'contact': [
+            "How can I contact the admission office?",
+            "What is your phone number or email?",
+            "Where is the campus located?",
+            "Can I visit the campus?",
+            "What are the office hours?"
+        ],
+        'general': [
+            "Hello",
+            "What can you help me with?",
+            "Tell me about the college",
+            "Thank you",
+            "I have a question"
+        ]
     }
+    INTENT_MIN_SIMILARITY = 0.35
     
     # Quick Response Templates
     QUICK_RESPONSES = {
@@ -60,6 +192,17 @@ class Config:
     
     ERROR_RESPONSE = "I apologize, but I'm experiencing technical difficulties. Please try asking your question again, or contact our admission office directly for assistance."
     
+    # Startup budgets checked by `python -m chatbot.startup`, about 1.5x the measured times
+    # (llm_handler ~40 ms, response_handler ~32 ms, knowledge_base ~145 ms, quick answer ~42 ms)
+    IMPORT_TIME_BUDGETS_MS = {
+        'chatbot': 5,
+        'chatbot.llm_handler': 60,
+        'chatbot.response_handler': 50,
+        'chatbot.knowledge_base': 220
+    }
+    QUICK_ANSWER_BUDGET_MS = 65
+    STARTUP_MEASURE_RUNS = 5  # Best of this many cold runs is compared to the budget
+    
     # Logging Configuration
     LOG_LEVEL = "INFO"
     LOG_FILE = BASE_DIR / "app.log"
@@ -0,0 +1,86 @@
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from chatbot.ann_index import ExactIndex, IVFIndex
+from chatbot.vector_utils import l2_normalize
+
+class GatherCountingArray(np.ndarray):
+    """Vectors that count row gathers, i.e. indexing with an array of rows"""
+    
+    gathers = 0
+    
+    def __getitem__(self, key):
+        if isinstance(key, np.ndarray):
+            GatherCountingArray.gathers += 1
+        return super().__getitem__(key)
+
+def make_vectors(count: int, dimension: int = 64, seed: int = 0) -> np.ndarray:
+    return l2_normalize(np.random.default_rng(seed).standard_normal((count, dimension)).astype(np.float32))
+
+def best_time_ms(fn, runs: int = 7) -> float:
+    fn()
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return min(times)
+
+def test_filtered_search_matches_brute_force():
+    vectors = make_vectors(2000)
+    query = vectors[0]
+    mask = np.random.default_rng(1).random(len(vectors)) < 0.9
+    
+    indices, scores = ExactIndex(vectors).search(query, 10, mask)
+    
+    allowed = np.flatnonzero(mask)
+    expected = allowed[np.argsort(vectors[allowed] @ query)[::-1][:10]]
+    assert indices.tolist() == expected.tolist()
+    assert np.all(mask[indices])
+    assert np.all(np.diff(scores) <= 0)
+
+def test_filtered_search_returns_only_allowed_rows_when_fewer_than_k():
+    vectors = make_vectors(1000)
+    mask = np.zeros(len(vectors), dtype=bool)
+    mask[[3, 500, 999]] = True
+    
+    indices, scores = ExactIndex(vectors).search(vectors[0], 10, mask)
+    
+    assert sorted(indices.tolist()) == [3, 500, 999]
+    assert np.all(np.isfinite(scores))
+
+def test_wide_mask_scores_in_place_without_gathering_rows():
+    vectors = make_vectors(5000).view(GatherCountingArray)
+    mask = np.random.default_rng(2).random(len(vectors)) < 0.9
+    
+    GatherCountingArray.gathers = 0
+    ExactIndex(vectors).search(np.asarray(vectors[0]), 10, mask)
+    
+    assert GatherCountingArray.gathers == 0
+
+def test_wide_mask_search_is_about_as_fast_as_unfiltered():
+    vectors = make_vectors(100000)
+    query = vectors[0]
+    mask = np.random.default_rng(3).random(len(vectors)) < 0.9
+    index = ExactIndex(vectors)
+    
+    unfiltered = best_time_ms(lambda: index.search(query, 10))
+    filtered = best_time_ms(lambda: index.search(query, 10, mask))
+    
+    # A gather of the allowed rows took about 4x the unfiltered time
+    assert filtered < 2 * unfiltered + 1
+
+def test_ivf_falls_back_to_exact_filtered_search():
+    vectors = make_vectors(6000)
+    mask = np.zeros(len(vectors), dtype=bool)
+    mask[::7] = True
+    
+    indices, _ = IVFIndex(vectors, nprobe=1).search(vectors[0], 10, mask)
+    
+    assert len(indices) == 10
+    assert np.all(mask[indices])
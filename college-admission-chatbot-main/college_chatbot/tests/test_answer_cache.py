@@ -0,0 +1,68 @@
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from chatbot.answer_cache import SemanticAnswerCache
+from chatbot.knowledge_base import KnowledgeBase
+from chatbot.query_cache import QueryCache
+from config import Config
+
+def _unit(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+def test_related_but_different_questions_do_not_share_an_answer():
+    cache = SemanticAnswerCache(min_similarity=Config.ANSWER_CACHE_MIN_SIMILARITY)
+    cache.store('v1', 'fees', "What are the tuition fees for computer science?", _unit([1.0, 0.0, 0.0]),
+                "Computer science tuition is $10,000.", 100.0)
+    
+    # Similarity 0.8: close in embedding space, but a different program
+    other = _unit([0.8, 0.6, 0.0])
+    assert cache.lookup('v1', 'fees', "What are the tuition fees for mechanical engineering?", other) is None
+
+def test_paraphrase_reuses_the_answer():
+    cache = SemanticAnswerCache(min_similarity=Config.ANSWER_CACHE_MIN_SIMILARITY)
+    cache.store('v1', 'fees', "What are the tuition fees for computer science?", _unit([1.0, 0.0, 0.0]),
+                "Computer science tuition is $10,000.", 100.0)
+    
+    paraphrase = _unit([0.99, 0.1, 0.0])
+    assert cache.lookup('v1', 'fees', "How much is computer science tuition?", paraphrase) is not None
+    assert cache.lookup('v1', 'fees', "what are the tuition fees for computer science", None) is not None
+    assert cache.lookup('v2', 'fees', "How much is computer science tuition?", paraphrase) is None
+
+def _at_similarity(similarity):
+    """Unit vector with the given cosine similarity to [1, 0, 0]"""
+    return _unit([similarity, np.sqrt(1.0 - similarity ** 2), 0.0])
+
+def test_only_the_strict_threshold_reuses_answers():
+    cache = SemanticAnswerCache(min_similarity=Config.ANSWER_CACHE_MIN_SIMILARITY)
+    cache.store('v1', 'fees', "What are the tuition fees?", _unit([1.0, 0.0, 0.0]), "Tuition is $10,000.", 100.0)
+    
+    # Close enough for retrieval (cosine distance within SIMILARITY_THRESHOLD), not for reuse
+    loose = (1.0 - Config.SIMILARITY_THRESHOLD + Config.ANSWER_CACHE_MIN_SIMILARITY) / 2
+    assert 1.0 - loose <= Config.SIMILARITY_THRESHOLD
+    assert cache.lookup('v1', 'fees', "What are the housing fees?", _at_similarity(loose)) is None
+    
+    strict = (Config.ANSWER_CACHE_MIN_SIMILARITY + 1.0) / 2
+    assert cache.lookup('v1', 'fees', "How much is tuition?", _at_similarity(strict)) == "Tuition is $10,000."
+
+def test_knowledge_base_update_drops_answers_of_the_old_version(tmp_path):
+    (tmp_path / 'faqs.json').write_text(json.dumps({'faqs': [
+        {'category': 'fees', 'question': "What are the tuition fees?", 'answer': "Tuition is $10,000."}]}),
+        encoding='utf-8')
+    cache = SemanticAnswerCache()
+    knowledge_base = KnowledgeBase(str(tmp_path), query_cache=QueryCache(), answer_cache=cache)
+    old_version = knowledge_base.version
+    cache.store(old_version, 'fees', "What are the tuition fees?", _unit([1.0, 0.0, 0.0]),
+                "Tuition is $10,000.", 100.0)
+    
+    knowledge_base.upsert_entry('faq', {'category': 'fees', 'question': "What are the tuition fees?",
+                                        'answer': "Tuition is $12,000."})
+    
+    assert knowledge_base.version != old_version
+    assert cache.get_stats()['entries'] == 0
+    assert cache.lookup(old_version, 'fees', "What are the tuition fees?", None) is None
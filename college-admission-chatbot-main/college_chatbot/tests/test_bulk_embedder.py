@@ -0,0 +1,78 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from chatbot.bulk_embedder import BulkEmbedder
+from chatbot.embedders import HashingBackend
+
+TEXTS = [f"Question {index} about admission and tuition fees" for index in range(10)]
+
+class _CountingEncoder:
+    """Hashing encoder recording the batches it encodes, failing after a given number"""
+    
+    def __init__(self, fail_after=None):
+        self.backend = HashingBackend()
+        self.batches = []
+        self.fail_after = fail_after
+    
+    def __call__(self, texts):
+        if self.fail_after is not None and len(self.batches) >= self.fail_after:
+            raise RuntimeError("build interrupted")
+        self.batches.append(list(texts))
+        return self.backend.encode(texts)
+
+def _embedder(tmp_path, **options):
+    return BulkEmbedder('hashing', 'hashing', tmp_path / 'checkpoints', batch_size=4, workers=1, **options)
+
+def test_interrupted_build_resumes_from_checkpoints(tmp_path):
+    interrupted = _CountingEncoder(fail_after=2)
+    with pytest.raises(RuntimeError):
+        _embedder(tmp_path).embed(TEXTS, interrupted)
+    
+    resumed = _CountingEncoder()
+    embedder = _embedder(tmp_path)
+    vectors = embedder.embed(TEXTS, resumed)
+    
+    assert resumed.batches == [TEXTS[8:]]
+    assert embedder.last_stats['resumed'] == 8 and embedder.last_stats['encoded'] == 2
+    np.testing.assert_array_equal(vectors, HashingBackend().encode(TEXTS))
+    # A finished build removes its checkpoints
+    assert list((tmp_path / 'checkpoints').iterdir()) == []
+
+def test_checkpoints_of_other_texts_are_not_reused(tmp_path):
+    with pytest.raises(RuntimeError):
+        _embedder(tmp_path).embed(TEXTS, _CountingEncoder(fail_after=1))
+    
+    encoder = _CountingEncoder()
+    changed = TEXTS[:-1] + ["A different last question"]
+    vectors = _embedder(tmp_path).embed(changed, encoder)
+    
+    assert len(encoder.batches) == 3
+    np.testing.assert_array_equal(vectors, HashingBackend().encode(changed))
+
+def test_truncated_checkpoint_is_encoded_again(tmp_path):
+    embedder = _embedder(tmp_path)
+    with pytest.raises(RuntimeError):
+        embedder.embed(TEXTS, _CountingEncoder(fail_after=2))
+    job_dir = embedder._job_dir(TEXTS)
+    np.save(job_dir / 'batch_000001.npy', np.zeros((1, 3), dtype=np.float32))
+    
+    encoder = _CountingEncoder()
+    vectors = embedder.embed(TEXTS, encoder)
+    
+    assert encoder.batches == [TEXTS[4:8], TEXTS[8:]]
+    np.testing.assert_array_equal(vectors, HashingBackend().encode(TEXTS))
+
+def test_empty_input_returns_an_empty_matrix(tmp_path):
+    assert _embedder(tmp_path).embed([], _CountingEncoder()).shape == (0, 0)
+
+def test_worker_processes_match_in_process_encoding(tmp_path):
+    embedder = BulkEmbedder('hashing', 'hashing', tmp_path / 'checkpoints', batch_size=4, workers=2)
+    
+    vectors = embedder.embed(TEXTS)
+    
+    np.testing.assert_array_equal(vectors, HashingBackend().encode(TEXTS))
@@ -0,0 +1,59 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from chatbot.context_assembler import ContextAssembler, approximate_token_count, load_token_counter
+from config import Config
+
+def _faq(entry_id, question, answer):
+    return {'knowledge': {'type': 'faq', 'id': entry_id, 'question': question, 'answer': answer}}
+
+def test_long_header_is_cut_to_the_budget():
+    assembler = ContextAssembler(token_counter=approximate_token_count)
+    header = "Question about college admissions: " + "please tell me more " * 200 + "\n\n"
+    footer = "\nPlease provide a helpful, friendly response."
+    
+    prompt = assembler.build_prompt(header, [_faq('faq_1', "When is the deadline?", "March 1.")], footer,
+                                    max_tokens=100)
+    
+    assert assembler.count_tokens(prompt) <= 100
+    assert prompt.startswith("Question about college admissions: please")
+    assert prompt.endswith(footer)
+
+def test_footer_over_budget_raises():
+    assembler = ContextAssembler(token_counter=approximate_token_count)
+    
+    with pytest.raises(ValueError):
+        assembler.build_prompt("Question: fees?\n\n", [], "instruction " * 50, max_tokens=20)
+
+def test_context_fills_what_header_and_footer_leave():
+    assembler = ContextAssembler(token_counter=approximate_token_count)
+    relevant_info = [_faq(f'faq_{i}', f"Question {i} about fees?", "Tuition is listed per program.") for i in range(20)]
+    
+    prompt = assembler.build_prompt("Question: fees?\n\n", relevant_info, "\nAnswer briefly.", max_tokens=60)
+    
+    assert "Relevant information" in prompt
+    assert assembler.count_tokens(prompt) <= 60
+
+def test_token_counter_without_tokenizer_is_the_estimate(monkeypatch):
+    monkeypatch.setattr(Config, 'TOKENIZER_NAME', None)
+    
+    assert load_token_counter() is approximate_token_count
+
+def test_token_counter_is_loaded_once_up_front(monkeypatch):
+    loads = []
+    
+    def load():
+        loads.append(True)
+        return approximate_token_count
+    
+    monkeypatch.setattr('chatbot.context_assembler.load_token_counter', load)
+    assembler = ContextAssembler()
+    
+    assembler.load_token_counter()
+    assembler.build_prompt("Question: fees?\n\n", [], "\nAnswer briefly.")
+    
+    assert loads == [True]
@@ -0,0 +1,37 @@
+import json
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from chatbot.data_watcher import DataFileWatcher
+from chatbot.knowledge_base import KnowledgeBase
+from chatbot.query_cache import QueryCache
+
+def _write_faqs(data_dir, questions):
+    faqs = [{'category': 'admission', 'question': question, 'answer': f"Answer to {question}"} for question in questions]
+    (data_dir / 'faqs.json').write_text(json.dumps({'faqs': faqs}), encoding='utf-8')
+
+def test_failed_reload_is_retried_on_the_next_check(tmp_path, monkeypatch):
+    _write_faqs(tmp_path, ["When is the deadline?"])
+    knowledge_base = KnowledgeBase(str(tmp_path), query_cache=QueryCache())
+    watcher = DataFileWatcher(knowledge_base)
+    _write_faqs(tmp_path, ["When is the deadline?", "Is housing available?"])
+    
+    # The first read fails, e.g. the file was caught mid-write; the file does not change again
+    read_data_file = knowledge_base._read_data_file
+    failures = []
+    
+    def flaky_read(data_type):
+        if not failures:
+            failures.append(data_type)
+            raise ValueError("Expecting value: line 1 column 11")
+        return read_data_file(data_type)
+    
+    monkeypatch.setattr(knowledge_base, '_read_data_file', flaky_read)
+    assert watcher.check() is False
+    assert len(knowledge_base.get_all_faqs()) == 1
+    
+    assert watcher.check() is True
+    assert len(knowledge_base.get_all_faqs()) == 2
+    assert watcher.check() is False
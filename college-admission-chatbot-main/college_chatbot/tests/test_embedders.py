@@ -0,0 +1,50 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from chatbot.embedders import HashingBackend, create_embedding_backend, embedding_identifier
+
+def _cosine(first, second):
+    return float(first @ second / (np.linalg.norm(first) * np.linalg.norm(second)))
+
+def test_hashing_vectors_are_deterministic_across_processes():
+    texts = ["What are the tuition fees?", "When is the application deadline?"]
+    script = ("import json, sys; sys.path.append('.'); from chatbot.embedders import HashingBackend; "
+              f"print(json.dumps(HashingBackend().encode({texts!r}).tolist()))")
+    
+    other_process = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True,
+                                   cwd=Path(__file__).parent.parent)
+    
+    vectors = HashingBackend().encode(texts)
+    assert vectors.shape == (2, HashingBackend.DIMENSION) and vectors.dtype == np.float32
+    np.testing.assert_array_equal(vectors, np.array(json.loads(other_process.stdout), dtype=np.float32))
+
+def test_similar_wording_gives_closer_vectors():
+    question, paraphrase, unrelated = HashingBackend().encode([
+        "What are the tuition fees for computer science?",
+        "computer science tuition fees",
+        "Is campus housing available for first year students?"
+    ])
+    
+    assert _cosine(question, paraphrase) > 0.5 > _cosine(question, unrelated)
+
+def test_case_punctuation_and_repetition_are_damped():
+    backend = HashingBackend()
+    plain, shouted, repeated = backend.encode(["tuition fees", "TUITION, fees!", "tuition tuition tuition fees"])
+    
+    np.testing.assert_array_equal(plain, shouted)
+    assert np.abs(repeated).max() < 3
+    assert not backend.encode([""]).any()
+
+def test_backends_are_identified_by_their_vector_space():
+    assert embedding_identifier('hashing', 'all-MiniLM-L6-v2') == embedding_identifier('hashing', 'other')
+    assert embedding_identifier('onnx', 'all-MiniLM-L6-v2') != embedding_identifier('int8', 'all-MiniLM-L6-v2')
+    assert isinstance(create_embedding_backend('hashing', 'all-MiniLM-L6-v2'), HashingBackend)
+    with pytest.raises(ValueError):
+        create_embedding_backend('word2vec', 'all-MiniLM-L6-v2')
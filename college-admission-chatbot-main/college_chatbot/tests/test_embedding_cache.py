@@ -0,0 +1,73 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from chatbot.embedding_cache import EmbeddingCache
+
+class CountingEncoder:
+    """Encodes each text as [length, word count, 1] and records what it was asked to encode"""
+    
+    def __init__(self, dimension=3):
+        self.dimension = dimension
+        self.calls = []
+    
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return np.array([[len(text), len(text.split())] + [1.0] * (self.dimension - 2) for text in texts],
+                        dtype=np.float32)
+
+TEXTS = ["When is the deadline?", "What are the tuition fees?", "Is housing available?"]
+
+def test_cached_entries_are_not_encoded_again(tmp_path):
+    encoder = CountingEncoder()
+    first = EmbeddingCache(tmp_path, "model").get_embeddings(TEXTS, encoder)
+    
+    # A new process reads the cache from disk and only encodes the new text
+    cache = EmbeddingCache(tmp_path, "model")
+    second = cache.get_embeddings(TEXTS + ["Do you offer scholarships?"], encoder)
+    
+    assert encoder.calls == [TEXTS, ["Do you offer scholarships?"]]
+    np.testing.assert_array_equal(second[:3], first)
+    assert (cache.hits, cache.misses) == (3, 1)
+
+def test_cache_is_keyed_by_model_and_namespace(tmp_path):
+    encoder = CountingEncoder()
+    EmbeddingCache(tmp_path, "model").get_embeddings(TEXTS, encoder)
+    
+    EmbeddingCache(tmp_path, "other-model").get_embeddings(TEXTS, encoder)
+    EmbeddingCache(tmp_path, "model", namespace="other-college").get_embeddings(TEXTS, encoder)
+    
+    assert encoder.calls == [TEXTS, TEXTS, TEXTS]
+
+def test_removed_texts_are_pruned(tmp_path):
+    encoder = CountingEncoder()
+    EmbeddingCache(tmp_path, "model").get_embeddings(TEXTS, encoder)
+    EmbeddingCache(tmp_path, "model").get_embeddings(TEXTS[:1], encoder)
+    
+    EmbeddingCache(tmp_path, "model").get_embeddings(TEXTS, encoder)
+    
+    assert encoder.calls[-1] == TEXTS[1:]
+
+def test_corrupt_cache_is_discarded(tmp_path):
+    cache = EmbeddingCache(tmp_path, "model")
+    cache.cache_path.write_bytes(b"not a numpy archive")
+    encoder = CountingEncoder()
+    
+    embeddings = cache.get_embeddings(TEXTS, encoder)
+    
+    assert embeddings.shape == (3, 3)
+    assert encoder.calls == [TEXTS]
+    assert EmbeddingCache(tmp_path, "model").get_embeddings(TEXTS, encoder).shape == (3, 3)
+    assert len(encoder.calls) == 1
+
+def test_changed_dimension_rebuilds_the_cache(tmp_path):
+    EmbeddingCache(tmp_path, "model").get_embeddings(TEXTS, CountingEncoder(dimension=3))
+    encoder = CountingEncoder(dimension=4)
+    
+    embeddings = EmbeddingCache(tmp_path, "model").get_embeddings(TEXTS + ["Is there a library?"], encoder)
+    
+    assert embeddings.shape == (4, 4)
+    assert encoder.calls[-1] == TEXTS + ["Is there a library?"]
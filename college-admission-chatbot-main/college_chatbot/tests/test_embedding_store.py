@@ -0,0 +1,81 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from chatbot.embedding_store import EmbeddingStore
+
+def _entries(count, dimension=4, offset=0):
+    ids = [f"faq:question {offset + i}" for i in range(count)]
+    texts = [f"Question {offset + i}? Answer with ünïcode {offset + i}." for i in range(count)]
+    metadata = [{'type': 'faq', 'id': entry_id, 'category': 'fees'} for entry_id in ids]
+    embeddings = np.random.default_rng(offset).standard_normal((count, dimension)).astype(np.float32)
+    return ids, texts, metadata, embeddings
+
+def test_written_store_opens_memory_mapped(tmp_path):
+    ids, texts, metadata, embeddings = _entries(5)
+    EmbeddingStore.write(tmp_path, 'v1', 'model', ids, texts, metadata, embeddings)
+    
+    store = EmbeddingStore.open(tmp_path, 'v1')
+    
+    assert isinstance(store.embeddings, np.memmap)
+    np.testing.assert_array_equal(store.embeddings, embeddings)
+    assert list(store.ids) == ids
+    assert store.texts[1] == texts[1]
+    assert store.metadata[-1] == metadata[-1]
+    assert store.texts[1:3] == texts[1:3]
+    with pytest.raises(IndexError):
+        store.records[5]
+
+def test_batches_are_appended_in_order(tmp_path):
+    first, second = _entries(3), _entries(2, offset=3)
+    EmbeddingStore.write_batches(tmp_path, 'v1', 'model', [first, second])
+    
+    store = EmbeddingStore.open(tmp_path)
+    
+    assert list(store.ids) == first[0] + second[0]
+    np.testing.assert_array_equal(store.embeddings, np.vstack([first[3], second[3]]))
+
+def test_publishing_a_version_replaces_the_current_one(tmp_path):
+    EmbeddingStore.write(tmp_path, 'v1', 'model', *_entries(3))
+    old = EmbeddingStore.open(tmp_path, 'v1')
+    
+    EmbeddingStore.write(tmp_path, 'v2', 'model', *_entries(4, offset=10))
+    
+    assert EmbeddingStore.open(tmp_path, 'v1') is None
+    assert len(EmbeddingStore.open(tmp_path, 'v2').ids) == 4
+    assert (tmp_path / 'CURRENT').read_text(encoding='utf-8') == 'v2'
+    assert sorted(path.name for path in tmp_path.iterdir() if path.is_dir()) == ['v2']
+    # A reader of the old version keeps its mapped pages
+    assert len(old.ids) == 3
+
+def test_failed_write_leaves_the_current_store(tmp_path):
+    EmbeddingStore.write(tmp_path, 'v1', 'model', *_entries(3))
+    
+    with pytest.raises(ValueError):
+        EmbeddingStore.write_batches(tmp_path, 'v2', 'model', [_entries(2), _entries(2, dimension=8)])
+    
+    assert EmbeddingStore.open(tmp_path).version == 'v1'
+    assert not [path for path in tmp_path.iterdir() if path.name.startswith('.')]
+
+def test_missing_or_corrupt_store_does_not_open(tmp_path):
+    assert EmbeddingStore.open(tmp_path) is None
+    
+    EmbeddingStore.write(tmp_path, 'v1', 'model', *_entries(2))
+    (tmp_path / 'v1' / 'manifest.json').write_text('{"format_version": 1}', encoding='utf-8')
+    assert EmbeddingStore.open(tmp_path) is None
+    
+    (tmp_path / 'v1' / 'manifest.json').write_text('not json', encoding='utf-8')
+    assert EmbeddingStore.open(tmp_path) is None
+
+def test_text_only_store_has_no_vectors(tmp_path):
+    ids, texts, metadata, _ = _entries(3)
+    EmbeddingStore.write(tmp_path, 'v1', 'model', ids, texts, metadata, np.empty((3, 0), np.float32))
+    
+    store = EmbeddingStore.open(tmp_path)
+    
+    assert store.embeddings.shape == (0, 0)
+    assert list(store.texts) == texts
@@ -0,0 +1,92 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from chatbot.generation import BatchScheduler, StubGenerationBackend
+
+def _scheduler(**backend_options):
+    return BatchScheduler(lambda: StubGenerationBackend(**backend_options), max_batch_size=4, max_wait_ms=50,
+                          max_new_tokens=10)
+
+def _wait_for(condition, timeout=5.0):
+    expires = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < expires
+        time.sleep(0.005)
+
+def test_concurrent_requests_are_batched_together():
+    scheduler = _scheduler(batch_latency=0.05)
+    futures = [scheduler.submit(f"Question {index}") for index in range(4)]
+    
+    outputs = [future.result(timeout=5) for future in futures]
+    scheduler.close()
+    
+    assert [output.split(')')[0] for output in outputs] == [f"Thanks for your question (Question {index}"
+                                                             for index in range(4)]
+    stats = scheduler.get_stats()
+    assert stats['requests'] == 4
+    assert stats['batches'] == 1
+    assert stats['batch_size_histogram'] == {4: 1}
+    assert stats['queue_depth_histogram'] == {'4-7': 1}
+    assert stats['mean_batch_size'] == 4.0
+
+def test_streams_keep_the_order_of_each_completion():
+    scheduler = _scheduler(token_latency=0.001)
+    results = {}
+    
+    def consume(index):
+        results[index] = list(scheduler.stream(f"Question {index}", timeout=5))
+    
+    threads = [threading.Thread(target=consume, args=(index,)) for index in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    scheduler.close()
+    
+    for index, pieces in results.items():
+        assert len(pieces) > 1
+        assert ''.join(pieces).strip() == (f"Thanks for your question (Question {index}). "
+                                           f"Our admission office can give you the details.")
+
+def test_timed_out_stream_stops_its_running_request():
+    scheduler = _scheduler(token_latency=0.1)
+    stream = scheduler.stream("Slow question", timeout=0.15)
+    
+    with pytest.raises(TimeoutError):
+        list(stream)
+    
+    # Dropped at the next decode step instead of decoding all ten steps
+    _wait_for(lambda: scheduler.get_stats()['cancelled'] == 1)
+    assert scheduler.get_stats()['latency']['batch']['last_ms'] < 600
+    scheduler.close()
+
+def test_closed_stream_stops_its_running_request():
+    scheduler = _scheduler(token_latency=0.1)
+    stream = scheduler.stream("Question nobody waits for", timeout=5)
+    
+    assert next(stream)
+    stream.close()
+    
+    _wait_for(lambda: scheduler.get_stats()['cancelled'] == 1)
+    scheduler.close()
+
+def test_cancelled_queued_request_is_never_generated():
+    scheduler = _scheduler(batch_latency=0.1)
+    running = scheduler.submit("First question")
+    _wait_for(lambda: running.running())
+    queued = scheduler.submit("Second question")
+    
+    assert queued.cancel()
+    running.result(timeout=5)
+    scheduler.close()
+    _wait_for(lambda: scheduler.get_stats()['cancelled'] == 1)
+    
+    stats = scheduler.get_stats()
+    assert stats['requests'] == 1
+    assert stats['batches'] == 1
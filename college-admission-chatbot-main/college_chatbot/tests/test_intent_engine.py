@@ -0,0 +1,71 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from chatbot.intent_engine import IntentEngine, get_intent_engine
+from chatbot.llm_handler import LLMHandler
+from chatbot.response_handler import ResponseHandler
+
+@pytest.mark.parametrize("question, intent", [
+    ("What is the application deadline?", "deadlines"),
+    ("When is the last date to apply?", "deadlines"),
+    ("What are the admission requirements?", "admission_requirements"),
+    ("Which documents are needed for the application?", "admission_requirements"),
+    ("Is there an application fee?", "fees"),
+    ("How much are the tuition fees?", "fees"),
+    ("What programs do you offer?", "programs"),
+    ("How can I contact the admission office?", "contact"),
+    ("Tell me about the college", "general"),
+])
+def test_detect_intent(question, intent):
+    assert get_intent_engine().detect(question) == intent
+    assert ResponseHandler().detect_intent(question) == intent
+
+def test_quick_answer_intent_of_application_deadline():
+    assert LLMHandler()._detect_intent("what is the application deadline?") == "deadlines"
+
+def test_shared_words_weigh_less_than_specific_ones():
+    engine = IntentEngine({
+        'requirements': ['application', 'documents'],
+        'deadlines': ['deadline', 'application date'],
+    })
+    
+    scores = engine.match("application deadline")
+    
+    assert scores['requirements'] < scores['deadlines']
+    assert engine.detect("application date") == 'deadlines'
+    assert engine.detect("application documents") == 'requirements'
+
+CONTEXT_PROMPT = ("Question about college admissions: {message}\n\nRelevant information:\n\n"
+                  "FAQ: How do I contact admissions? - Email the admission office or call us.\n"
+                  "FAQ: What are the tuition fees? - Tuition and fees vary by program.\n"
+                  "\nPlease provide a helpful, friendly response about this topic.")
+
+@pytest.mark.parametrize("message, pipeline_intent, intent", [
+    ("hello", "general", "greeting"),
+    ("Tell me about the college", "general", "general"),
+    ("What is the application deadline?", "deadlines", "deadlines"),
+])
+def test_llm_intent_comes_from_the_message_not_the_context(message, pipeline_intent, intent):
+    handler = LLMHandler()
+    
+    assert handler.detect_intent(message, pipeline_intent) == intent
+    assert handler.detect_intent(message) == intent
+
+def test_retrieved_context_does_not_decide_the_answer():
+    handler = LLMHandler()
+    handler.generator = None
+    relevant_info = [{'knowledge': {'type': 'faq', 'question': "How do I contact admissions?",
+                                    'answer': "Email the admission office or call us."}}]
+    
+    greeting = ''.join(handler.stream_response(CONTEXT_PROMPT.format(message="hello"), [], relevant_info,
+                                               intent=handler.detect_intent("hello", "general")))
+    general = ''.join(handler.stream_response(CONTEXT_PROMPT.format(message="Tell me about the college"), [],
+                                              relevant_info, intent="general"))
+    
+    assert "College Admission Assistant" in greeting
+    assert handler.quick_responses['fees'] not in general
+    assert handler.quick_responses['contact'] not in general
@@ -0,0 +1,111 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config import Config
+from chatbot.answer_cache import SemanticAnswerCache
+from chatbot.knowledge_base import KnowledgeBase
+from chatbot.query_cache import QueryCache
+
+FAQS = [
+    {'category': 'fees', 'question': "What are the tuition fees?", 'answer': "Tuition is $10,000 per year."},
+    {'category': 'admission', 'question': "When is the application deadline?", 'answer': "January 15."},
+]
+PROGRAMS = {
+    'programs': [{'name': "Computer Science", 'degree': "Bachelor of Science", 'duration': "4 years",
+                  'description': "Programming and algorithms."}],
+    'graduate': [{'name': "Data Science", 'degree': "Master of Science", 'duration': "2 years",
+                  'description': "Statistics and machine learning."}],
+}
+
+def _write(data_dir, name, data):
+    (data_dir / name).write_text(json.dumps(data), encoding='utf-8')
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'EMBEDDING_BACKEND', 'hashing')
+    monkeypatch.setattr(Config, 'EMBEDDING_CACHE_DIR', tmp_path / 'embeddings')
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    _write(data_dir, 'faqs.json', {'faqs': FAQS})
+    _write(data_dir, 'programs.json', PROGRAMS)
+    return data_dir
+
+def _knowledge_base(data_dir):
+    knowledge_base = KnowledgeBase(str(data_dir), query_cache=QueryCache(), answer_cache=SemanticAnswerCache())
+    knowledge_base.embed_query("warm up")
+    return knowledge_base
+
+def _answers(knowledge_base):
+    return {faq['question']: faq['answer'] for faq in knowledge_base.get_all_faqs()}
+
+def test_upsert_adds_and_replaces_entries(data_dir):
+    knowledge_base = _knowledge_base(data_dir)
+    
+    added = knowledge_base.upsert_entry('faq', {'category': 'campus', 'question': "Is housing available?",
+                                                'answer': "Yes, for first year students."})
+    replaced = knowledge_base.upsert_entry('faq', {'category': 'fees', 'question': "What are the tuition fees?",
+                                                   'answer': "Tuition is $12,000 per year."})
+    
+    assert (added, replaced) == ("faq:is housing available?", "faq:what are the tuition fees?")
+    assert _answers(knowledge_base)["What are the tuition fees?"] == "Tuition is $12,000 per year."
+    assert len(knowledge_base.get_all_faqs()) == 3
+    top = knowledge_base.search_similar("Is housing available?", top_k=1, mode='dense')[0]
+    assert top['knowledge']['id'] == added
+
+def test_upsert_of_an_unchanged_entry_keeps_the_version(data_dir):
+    knowledge_base = _knowledge_base(data_dir)
+    version = knowledge_base.version
+    
+    knowledge_base.upsert_entry('faq', dict(FAQS[0]))
+    
+    assert knowledge_base.version == version
+
+def test_program_upsert_and_delete_find_every_group(data_dir):
+    knowledge_base = _knowledge_base(data_dir)
+    
+    knowledge_base.upsert_entry('program', {**PROGRAMS['graduate'][0], 'duration': "18 months"})
+    
+    programs = knowledge_base.knowledge_data['programs']
+    assert [program['duration'] for program in programs['graduate']] == ["18 months"]
+    assert len(programs['programs']) == 1
+    
+    assert knowledge_base.delete_entry("program:data science") is True
+    assert [program['name'] for program in knowledge_base.get_all_programs()] == ["Computer Science"]
+
+def test_delete_removes_entries_from_search(data_dir):
+    knowledge_base = _knowledge_base(data_dir)
+    
+    assert knowledge_base.delete_entry("faq:what are the tuition fees?") is True
+    assert knowledge_base.delete_entry("faq:what are the tuition fees?") is False
+    assert knowledge_base.delete_entry("general_info") is False
+    
+    for query in ("What are the tuition fees?", "tuition fees application deadline"):
+        ids = [result['knowledge']['id'] for result in knowledge_base.search_similar(query, top_k=5)]
+        assert "faq:what are the tuition fees?" not in ids
+    assert [faq['question'] for faq in knowledge_base.get_all_faqs()] == ["When is the application deadline?"]
+
+def test_reload_picks_up_edited_files(data_dir):
+    knowledge_base = _knowledge_base(data_dir)
+    _write(data_dir, 'faqs.json', {'faqs': FAQS[:1]})
+    
+    assert knowledge_base.reload_data(['faqs']) is True
+    assert list(_answers(knowledge_base)) == ["What are the tuition fees?"]
+    assert knowledge_base.reload_data(['faqs']) is False
+
+def test_failed_mid_write_reload_keeps_serving_the_current_data(data_dir):
+    knowledge_base = _knowledge_base(data_dir)
+    version = knowledge_base.version
+    (data_dir / 'faqs.json').write_text('{"faqs": [{"category": "fees", "quest', encoding='utf-8')
+    
+    assert knowledge_base.reload_data(['faqs']) is False
+    with pytest.raises(ValueError):
+        knowledge_base.reload_data(['faqs'], raise_errors=True)
+    
+    assert knowledge_base.version == version
+    assert _answers(knowledge_base) == {faq['question']: faq['answer'] for faq in FAQS}
+    assert knowledge_base.search_similar("application deadline", top_k=1)[0]['knowledge']['answer'] == "January 15."
@@ -0,0 +1,70 @@
+import math
+import sys
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from chatbot.lexical_index import BM25Index, tokenize
+
+DOCS = [
+    "Tuition fees for undergraduate programs are listed per semester.",
+    "The application deadline for fall admission is January 15.",
+    "Scholarships reduce tuition for students with strong grades.",
+    "Campus housing is available for first year students.",
+    "Fees fees fees: every fee is explained by the bursar.",
+]
+
+def reference_scores(docs, query, k1=1.5, b=0.75):
+    """Textbook Okapi BM25, one document at a time"""
+    doc_terms = [Counter(tokenize(doc)) for doc in docs]
+    avg_length = sum(sum(terms.values()) for terms in doc_terms) / len(docs)
+    scores = []
+    for terms in doc_terms:
+        length = sum(terms.values())
+        score = 0.0
+        for term in tokenize(query):
+            df = sum(1 for other in doc_terms if term in other)
+            if not df or term not in terms:
+                continue
+            idf = math.log(1.0 + (len(docs) - df + 0.5) / (df + 0.5))
+            tf = terms[term]
+            score += idf * tf * (k1 + 1.0) / (tf + k1 * (1.0 - b + b * length / avg_length))
+        scores.append(score)
+    return scores
+
+@pytest.mark.parametrize("query", ["tuition fees", "application deadline", "students housing", "fees"])
+def test_scores_match_textbook_bm25(query):
+    index = BM25Index(DOCS)
+    expected = reference_scores(DOCS, query)
+    
+    results = index.search(query, top_k=len(DOCS))
+    
+    assert [doc_id for doc_id, _, _ in results] == sorted(
+        (doc_id for doc_id, score in enumerate(expected) if score > 0), key=lambda doc_id: -expected[doc_id])
+    for doc_id, score, normalized in results:
+        assert score == pytest.approx(expected[doc_id], rel=1e-5)
+        assert 0.0 < normalized <= 1.0
+
+def test_rare_terms_outweigh_common_ones():
+    index = BM25Index(DOCS)
+    
+    # "scholarships" appears once, "students" twice
+    assert index.search("scholarships students", top_k=1)[0][0] == 2
+
+def test_stopwords_and_unknown_terms_match_nothing():
+    index = BM25Index(DOCS)
+    
+    assert index.search("what is the") == []
+    assert index.search("xylophone") == []
+
+def test_mask_limits_results_to_allowed_documents():
+    index = BM25Index(DOCS)
+    mask = np.array([False, False, True, True, True])
+    
+    results = index.search("tuition fees", top_k=5, mask=mask)
+    
+    assert {doc_id for doc_id, _, _ in results} == {2, 4}
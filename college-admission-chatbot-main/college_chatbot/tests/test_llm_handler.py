@@ -0,0 +1,57 @@
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from chatbot.generation import BatchScheduler, StubGenerationBackend
+from chatbot.llm_handler import LLMHandler
+from chatbot.response_handler import ResponseHandler
+
+PROMPT = "Describe the student clubs on campus"
+RELEVANT_INFO = [{'text': "The campus has over 100 student clubs.", 'similarity': 0.9,
+                  'knowledge': {'type': 'faq', 'id': 'faq:clubs', 'question': "Are there student clubs?",
+                                'answer': "The campus has over 100 student clubs."}}]
+
+def _handler(token_latency=0.0, enabled=True):
+    llm_handler = LLMHandler()
+    llm_handler.generator = None
+    if enabled:
+        llm_handler.generator = BatchScheduler(lambda: StubGenerationBackend(token_latency=token_latency),
+                                               max_new_tokens=10)
+    return llm_handler
+
+def test_streamed_answer_is_shown_while_it_decodes():
+    llm_handler = _handler(token_latency=0.2)
+    
+    started = time.monotonic()
+    stream = ResponseHandler().stream_format(llm_handler.stream_response(PROMPT, [], RELEVANT_INFO, intent='general'),
+                                             'general', RELEVANT_INFO, 'v1')
+    first = next(stream)
+    first_chunk_at = time.monotonic() - started
+    rest = ''.join(stream)
+    total = time.monotonic() - started
+    
+    assert first.startswith("Thanks for your question (Describe the student clubs")
+    assert first_chunk_at < total / 2 + 0.2
+    assert "admission office can give you the details." in first + rest
+    assert ''.join(llm_handler.stream_response(PROMPT, [], RELEVANT_INFO, intent='general')) == \
+        llm_handler.get_response(PROMPT, [], RELEVANT_INFO, intent='general')
+
+def test_missed_deadline_falls_back_to_the_rule_based_answer():
+    llm_handler = _handler(token_latency=0.2)
+    degraded = []
+    
+    chunks = list(llm_handler.stream_response(PROMPT, [], RELEVANT_INFO, timeout=0.3, intent='general',
+                                              degraded=degraded))
+    
+    assert len(chunks) == 1
+    assert chunks[0] == _handler(enabled=False)._rule_based_response('general', PROMPT.lower(), RELEVANT_INFO)
+    assert degraded == ['generate']
+
+def test_greeting_and_rule_based_answers_are_yielded_whole():
+    llm_handler = _handler(enabled=False)
+    
+    assert len(list(llm_handler.stream_response("hello there", [], [], intent='greeting'))) == 1
+    chunks = list(llm_handler.stream_response(PROMPT, [], RELEVANT_INFO, intent='general'))
+    assert chunks == [llm_handler.get_response(PROMPT, [], RELEVANT_INFO, intent='general')]
@@ -0,0 +1,57 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from chatbot.metadata_filter import MetadataMasks, matches_filters, normalize_filters
+
+METADATA = [
+    {'type': 'faq', 'source': 'faqs', 'category': 'fees'},
+    {'type': 'faq', 'source': 'faqs', 'category': 'admission'},
+    {'type': 'program', 'source': 'programs', 'level': 'graduate',
+     'data': {'name': "Data Science", 'specializations': ["Machine Learning", "Statistics"]}},
+    {'type': 'program', 'source': 'programs', 'level': 'undergraduate',
+     'data': {'name': "Computer Science", 'specializations': ["Machine Learning"]}},
+]
+
+def test_filters_are_canonical():
+    assert normalize_filters(None) is None
+    assert normalize_filters({}) is None
+    assert normalize_filters({'type': 'faq'}) == (('type', ('faq',)),)
+    assert normalize_filters({'type': ['program', 'faq', 'faq'], 'category': 'fees'}) == \
+        normalize_filters({'category': ['fees'], 'type': ['faq', 'program']})
+
+def test_entries_match_any_value_of_every_field():
+    filters = normalize_filters({'type': ['faq', 'program'], 'specializations': "Statistics"})
+    
+    assert [matches_filters(meta, filters) for meta in METADATA] == [False, False, True, False]
+    assert matches_filters(METADATA[0], None)
+
+def test_masks_match_the_per_entry_check():
+    masks = MetadataMasks(METADATA)
+    
+    for filters in ({'type': 'faq'}, {'type': ['faq', 'program'], 'category': 'fees'},
+                    {'specializations': "Machine Learning", 'level': 'graduate'}, {'type': 'news'}):
+        canonical = normalize_filters(filters)
+        expected = [matches_filters(meta, canonical) for meta in METADATA]
+        np.testing.assert_array_equal(masks.mask(canonical), expected)
+    
+    assert masks.mask(None) is None
+
+def test_masks_are_reused_and_bounded():
+    masks = MetadataMasks(METADATA)
+    filters = normalize_filters({'type': 'program', 'level': 'graduate'})
+    
+    assert masks.mask(filters) is masks.mask(filters)
+    assert masks.mask(normalize_filters({'type': 'faq'})) is masks.mask(normalize_filters({'type': ['faq']}))
+    
+    for index in range(MetadataMasks.MAX_COMBINED + 1):
+        masks.mask(normalize_filters({'category': f"category {index}"}))
+    assert len(masks._combined) <= MetadataMasks.MAX_COMBINED
+
+def test_empty_metadata_has_empty_masks():
+    masks = MetadataMasks([])
+    
+    assert masks.mask(normalize_filters({'type': 'faq'})).shape == (0,)
@@ -0,0 +1,100 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config import Config
+from chatbot.answer_cache import SemanticAnswerCache
+from chatbot.generation import BatchScheduler, StubGenerationBackend
+from chatbot.knowledge_base import KnowledgeBase
+from chatbot.llm_handler import LLMHandler
+from chatbot.pipeline import ResponsePipeline
+from chatbot.query_cache import QueryCache
+from chatbot.response_handler import ResponseHandler
+
+QUESTION = "Describe the student clubs on campus"
+
+@pytest.fixture
+def knowledge_base(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'EMBEDDING_BACKEND', 'hashing')
+    monkeypatch.setattr(Config, 'EMBEDDING_CACHE_DIR', tmp_path / 'embeddings')
+    return KnowledgeBase(str(Config.DATA_DIR), query_cache=QueryCache())
+
+def _pipeline(token_latency=0.0, **options):
+    llm_handler = LLMHandler()
+    # 18 words, one per decode step: about 0.11 s per step at token_latency 0.2
+    llm_handler.generator = BatchScheduler(lambda: StubGenerationBackend(token_latency=token_latency),
+                                           max_new_tokens=10)
+    return ResponsePipeline(llm_handler, ResponseHandler(), lambda message, intent, relevant_info: message,
+                            answer_cache=SemanticAnswerCache(), **options)
+
+def test_first_chunk_streams_before_generation_completes(knowledge_base):
+    pipeline = _pipeline(token_latency=0.2)
+    result = asyncio.run(pipeline.prepare(QUESTION, knowledge_base))
+    assert result['intent'] == 'general'
+    
+    started = time.monotonic()
+    stream = pipeline.stream(result, [])
+    first = next(stream)
+    first_chunk_at = time.monotonic() - started
+    rest = ''.join(stream)
+    total = time.monotonic() - started
+    
+    assert first.startswith("Thanks for your question")
+    assert first_chunk_at < total / 2 + 0.2
+    assert "admission office can give you the details." in rest
+    assert pipeline.answer_cache.get_stats()['entries'] == 1
+    
+    cached = asyncio.run(pipeline.prepare(QUESTION, knowledge_base))
+    assert cached['answer'] == first + rest
+
+def test_generation_cut_off_at_the_deadline_is_not_cached(knowledge_base):
+    pipeline = _pipeline(token_latency=0.2)
+    result = asyncio.run(pipeline.prepare(QUESTION, knowledge_base, deadline=1.4))
+    
+    answer = ''.join(pipeline.stream(result, []))
+    
+    assert answer.startswith("Thanks for your question")
+    assert "give you the details." not in answer
+    assert 'generate' in result['degraded']
+    assert pipeline.answer_cache.get_stats()['entries'] == 0
+    assert pipeline.get_stats()['degraded_stages'] == {'generate': 1}
+
+def test_slot_is_held_until_the_stream_finishes(knowledge_base):
+    pipeline = _pipeline(max_concurrency=1)
+    first = asyncio.run(pipeline.prepare(QUESTION, knowledge_base))
+    
+    waiting = asyncio.run(pipeline.prepare("Is there a library on campus?", knowledge_base, deadline=0.2))
+    assert waiting['degraded'] == ['queue']
+    
+    ''.join(pipeline.stream(first, []))
+    ''.join(pipeline.stream(waiting, []))
+    after = asyncio.run(pipeline.prepare("Is there a library on campus?", knowledge_base, deadline=2.0))
+    assert after['degraded'] == []
+    ''.join(pipeline.stream(after, []))
+
+def test_closed_stream_releases_its_slot(knowledge_base):
+    pipeline = _pipeline(token_latency=0.2, max_concurrency=1)
+    result = asyncio.run(pipeline.prepare(QUESTION, knowledge_base))
+    
+    stream = pipeline.stream(result, [])
+    next(stream)
+    stream.close()
+    
+    after = asyncio.run(pipeline.prepare("Is there a library on campus?", knowledge_base, deadline=2.0))
+    assert after['degraded'] == []
+    ''.join(pipeline.stream(after, []))
+
+def test_greetings_are_not_cached(knowledge_base):
+    pipeline = _pipeline()
+    result = asyncio.run(pipeline.prepare("hello", knowledge_base))
+    
+    answer = ''.join(pipeline.stream(result, []))
+    
+    assert "College Admission Assistant" in answer
+    assert result['degraded'] == []
+    assert pipeline.answer_cache.get_stats()['entries'] == 0
@@ -0,0 +1,89 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config import Config
+from chatbot.answer_cache import SemanticAnswerCache
+from chatbot.knowledge_base import KnowledgeBase
+from chatbot.program_index import ProgramIndex
+from chatbot.query_cache import QueryCache
+
+PROGRAMS = {
+    'programs': [{'name': "Computer Science", 'degree': "Bachelor of Science", 'duration': "4 years",
+                  'specializations': ["Artificial Intelligence", "Cybersecurity"]}],
+    'graduate': [{'name': "Master of Business Administration (MBA)", 'degree': "Master of Business Administration",
+                  'duration': "2 years", 'specializations': ["Finance", "Cybersecurity"]}],
+    'certificate_programs': [{'name': "Data Analytics Certificate", 'type': "Professional Certificate",
+                              'duration': "6 months"}],
+}
+
+@pytest.fixture
+def program_index():
+    return ProgramIndex(PROGRAMS)
+
+def _names(programs):
+    return [program['name'] for program in programs]
+
+def test_names_and_abbreviations_are_matched(program_index):
+    assert program_index.match_facets("Tell me about computer science") == {'name': {'computer science'}}
+    assert _names(program_index.lookup("What is the MBA?")) == ["Master of Business Administration (MBA)"]
+    assert _names(program_index.lookup("master of business administration")) == [
+        "Master of Business Administration (MBA)"]
+
+def test_facets_narrow_a_specialization(program_index):
+    assert _names(program_index.lookup("cybersecurity programs")) == [
+        "Computer Science", "Master of Business Administration (MBA)"]
+    assert _names(program_index.lookup("graduate cybersecurity programs")) == [
+        "Master of Business Administration (MBA)"]
+    assert _names(program_index.filter(level=['undergraduate', 'certificate'])) == [
+        "Computer Science", "Data Analytics Certificate"]
+    assert _names(program_index.filter(duration="6 months")) == ["Data Analytics Certificate"]
+
+def test_facets_alone_do_not_answer_a_lookup(program_index):
+    assert program_index.match_facets("graduate programs") == {'level': {'graduate'}}
+    assert program_index.lookup("graduate programs") == []
+    assert not program_index.is_pure_lookup("graduate programs")
+
+def test_residual_query_keeps_the_other_question(program_index):
+    assert program_index.is_pure_lookup("Which computer science programs do you offer?")
+    assert not program_index.is_pure_lookup("computer science tuition fees")
+    assert program_index.residual_query("computer science tuition fees") == "tuition fees"
+
+@pytest.fixture
+def knowledge_base(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'EMBEDDING_BACKEND', 'hashing')
+    monkeypatch.setattr(Config, 'EMBEDDING_CACHE_DIR', tmp_path / 'embeddings')
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    faqs = [{'category': 'fees', 'question': "What are the tuition fees?", 'answer': "Tuition is $10,000 per year."}]
+    (data_dir / 'faqs.json').write_text(json.dumps({'faqs': faqs}), encoding='utf-8')
+    (data_dir / 'programs.json').write_text(json.dumps(PROGRAMS), encoding='utf-8')
+    knowledge_base = KnowledgeBase(str(data_dir), query_cache=QueryCache(), answer_cache=SemanticAnswerCache())
+    knowledge_base.embed_query("warm up")
+    return knowledge_base
+
+def test_search_answers_program_names_exactly(knowledge_base):
+    results = knowledge_base.search_similar("Tell me about the MBA", top_k=3)
+    
+    assert [result['knowledge']['data']['name'] for result in results] == [
+        "Master of Business Administration (MBA)"]
+    assert results[0]['similarity'] == 1.0
+    assert results[0]['knowledge']['level'] == 'graduate'
+
+def test_search_ranks_the_rest_of_the_query(knowledge_base):
+    results = knowledge_base.search_similar("computer science tuition fees", top_k=3)
+    
+    assert results[0]['knowledge']['data']['name'] == "Computer Science"
+    assert any(result['knowledge']['type'] == 'faq' for result in results[1:])
+
+def test_find_programs_filters_the_current_snapshot(knowledge_base):
+    assert _names(knowledge_base.find_programs(specialization="Finance")) == [
+        "Master of Business Administration (MBA)"]
+    
+    knowledge_base.delete_entry("program:master of business administration (mba)")
+    
+    assert knowledge_base.find_programs(specialization="Finance") == []
@@ -0,0 +1,92 @@
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config import Config
+from chatbot.answer_cache import SemanticAnswerCache
+from chatbot.knowledge_base import KnowledgeBase
+from chatbot.query_cache import LRUCache, QueryCache, normalize_query
+
+def test_typed_variants_share_an_entry():
+    cache = QueryCache()
+    cache.put_embedding('v1', "  When is the DEADLINE? ", [1.0])
+    
+    assert normalize_query("When  is the deadline?!") == "when is the deadline"
+    assert cache.get_embedding('v1', "when is the deadline") == [1.0]
+    assert cache.get_embedding('v2', "when is the deadline") is None
+
+def test_results_are_keyed_by_version_top_k_and_extras():
+    cache = QueryCache()
+    cache.put_results('v1', "fees", 3, [{'id': 1}], 'hybrid')
+    
+    assert cache.get_results('v1', "fees", 3, 'hybrid') == [{'id': 1}]
+    assert cache.get_results('v1', "fees", 5, 'hybrid') is None
+    assert cache.get_results('v1', "fees", 3, 'dense') is None
+    
+    # Callers get their own list
+    cache.get_results('v1', "fees", 3, 'hybrid').append({'id': 2})
+    assert cache.get_results('v1', "fees", 3, 'hybrid') == [{'id': 1}]
+
+def test_invalidating_a_version_keeps_the_others():
+    cache = QueryCache()
+    cache.put_embedding('v1', "fees", [1.0])
+    cache.put_results('v1', "fees", 3, [])
+    cache.put_results('v2', "fees", 3, [])
+    
+    assert cache.invalidate_version('v1') == 2
+    assert cache.get_results('v1', "fees", 3) is None
+    assert cache.get_results('v2', "fees", 3) == []
+
+def test_lru_evicts_the_least_recently_used_and_expires_entries():
+    cache = LRUCache(max_size=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+    
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+    assert cache.get_stats()['evictions'] == 1
+    
+    expiring = LRUCache(ttl=0.01)
+    expiring.put('a', 1)
+    time.sleep(0.02)
+    assert expiring.get('a') is None
+    assert expiring.get_stats()['expirations'] == 1
+
+@pytest.fixture
+def knowledge_base(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'EMBEDDING_BACKEND', 'hashing')
+    monkeypatch.setattr(Config, 'EMBEDDING_CACHE_DIR', tmp_path / 'embeddings')
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    (data_dir / 'faqs.json').write_text(json.dumps({'faqs': [
+        {'category': 'fees', 'question': "What are the tuition fees?", 'answer': "Tuition is $10,000 per year."},
+        {'category': 'admission', 'question': "When is the application deadline?", 'answer': "January 15."}]}),
+        encoding='utf-8')
+    return KnowledgeBase(str(data_dir), query_cache=QueryCache(), answer_cache=SemanticAnswerCache())
+
+def test_search_results_are_cached_until_the_knowledge_base_changes(knowledge_base):
+    # Load the embedding model, so both searches rank densely
+    knowledge_base.embed_query("warm up")
+    
+    first = knowledge_base.search_similar("tuition fees", mode='dense')
+    second = knowledge_base.search_similar("Tuition fees?", mode='dense')
+    
+    assert second == first
+    assert knowledge_base.query_cache.results.get_stats()['hits'] == 1
+    old_version = knowledge_base.version
+    
+    knowledge_base.upsert_entry('faq', {'category': 'fees', 'question': "What are the tuition fees?",
+                                        'answer': "Tuition is $12,000 per year."})
+    
+    assert knowledge_base.version != old_version
+    assert knowledge_base.query_cache.get_results(old_version, "tuition fees", 3, 'dense', None) is None
+    answers = [result['knowledge'].get('answer') for result in knowledge_base.search_similar("tuition fees", mode='dense')]
+    assert "Tuition is $12,000 per year." in answers
+    assert "Tuition is $10,000 per year." not in answers
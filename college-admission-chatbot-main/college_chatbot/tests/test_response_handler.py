@@ -0,0 +1,86 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from chatbot.response_handler import ResponseHandler
+
+HEAD = "Our computer science program offers small classes and research projects "
+
+def test_first_streamed_chunk_is_shown_before_the_rest_is_generated():
+    pulled = []
+    
+    def generated():
+        for chunk in [HEAD, "with faculty ", "mentors."]:
+            pulled.append(chunk)
+            yield chunk
+    
+    stream = ResponseHandler().stream_format(generated(), 'programs')
+    
+    assert next(stream) == HEAD
+    assert pulled == [HEAD]
+    assert ''.join(stream).startswith("with faculty mentors.")
+
+def test_template_replacing_a_generic_stream_closes_it():
+    closed = []
+    
+    def generated():
+        try:
+            yield "Feel free to ask about anything!"
+            yield " More text nobody reads."
+        finally:
+            closed.append(True)
+    
+    handler = ResponseHandler()
+    answer = ''.join(handler.stream_format(generated(), 'deadlines'))
+    
+    assert answer.startswith(handler.response_templates['deadlines'])
+    assert "nobody reads" not in answer
+    assert closed == [True]
+
+def test_streamed_and_whole_responses_format_alike():
+    handler = ResponseHandler()
+    response = HEAD + "with faculty mentors."
+    
+    streamed = ''.join(handler.stream_format(iter([HEAD, "with faculty mentors."]), 'programs'))
+    
+    assert streamed == handler.format_response(response, 'programs')
+
+def _info(entry_id):
+    return {'text': "Tuition is $10,000 per year.", 'similarity': 0.9,
+            'knowledge': {'type': 'faq', 'id': entry_id, 'data': {'answer': "Tuition is $10,000 per year."}}}
+
+def test_render_key_identifies_every_input():
+    handler = ResponseHandler()
+    key = handler._render_key(HEAD, 'fees', [_info('faq:fees')], 'v1')
+    
+    assert key == handler._render_key(HEAD, 'fees', [_info('faq:fees')], 'v1')
+    assert key != handler._render_key(HEAD, 'programs', [_info('faq:fees')], 'v1')
+    assert key != handler._render_key(HEAD, 'fees', [_info('faq:housing')], 'v1')
+    assert key != handler._render_key(HEAD, 'fees', [_info('faq:fees')], 'v2')
+    assert handler._render_key(HEAD, 'fees', None, 'v1') == handler._render_key(HEAD, 'fees', None, 'v2')
+
+def test_unidentified_inputs_are_not_cached():
+    handler = ResponseHandler()
+    
+    assert handler._render_key(HEAD, 'fees', [_info('faq:fees')], None) is None
+    assert handler._render_key(HEAD, 'fees', [{'text': "No id", 'knowledge': {}}], 'v1') is None
+    
+    handler.format_response(HEAD, 'fees', [_info('faq:fees')])
+    assert len(handler.render_cache) == 0
+
+def test_repeated_response_is_rendered_once(monkeypatch):
+    handler = ResponseHandler()
+    renders = []
+    render_stages = handler._render_stages
+    monkeypatch.setattr(handler, '_render_stages', lambda *args: renders.append(args) or render_stages(*args))
+    
+    first = handler.format_response(HEAD, 'fees', [_info('faq:fees')], 'v1')
+    assert handler.format_response(HEAD, 'fees', [_info('faq:fees')], 'v1') == first
+    assert ''.join(handler.stream_format([HEAD], 'fees', [_info('faq:fees')], 'v1')) == first
+    assert len(renders) == 1
+    
+    handler.format_response(HEAD, 'fees', [_info('faq:fees')], 'v2')
+    handler.update_templates({'fees': "Fees are listed on the tuition page."})
+    handler.format_response(HEAD, 'fees', [_info('faq:fees')], 'v1')
+    assert len(renders) == 3
@@ -0,0 +1,41 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from chatbot.retrieval import LatencyTracker, reciprocal_rank_fusion
+
+def test_fused_scores_sum_weighted_reciprocal_ranks():
+    fused = dict(reciprocal_rank_fusion([[3, 1, 2], [1, 4]], [1.0, 2.0], k=60))
+    
+    assert fused[1] == pytest.approx(1.0 / 62 + 2.0 / 61)
+    assert fused[3] == pytest.approx(1.0 / 61)
+    assert fused[4] == pytest.approx(2.0 / 62)
+    assert fused[2] == pytest.approx(1.0 / 63)
+
+def test_documents_found_by_both_retrievers_rank_first():
+    dense = [7, 3, 9, 1]
+    lexical = [5, 1, 3, 8]
+    
+    ranking = [doc_id for doc_id, _ in reciprocal_rank_fusion([dense, lexical], [1.0, 1.0])]
+    
+    assert ranking[:2] == [3, 1]
+    assert set(ranking) == {1, 3, 5, 7, 8, 9}
+
+def test_weights_shift_the_ranking():
+    dense = [1, 2]
+    lexical = [2, 1]
+    
+    assert reciprocal_rank_fusion([dense, lexical], [2.0, 1.0])[0][0] == 1
+    assert reciprocal_rank_fusion([dense, lexical], [1.0, 2.0])[0][0] == 2
+
+def test_latency_tracker_times_a_stream():
+    tracker = LatencyTracker()
+    
+    assert list(tracker.measure_stream('generate', iter(["a", "b"]))) == ["a", "b"]
+    
+    stats = tracker.get_stats()
+    assert stats['generate_first_chunk']['count'] == 1
+    assert stats['generate_total']['count'] == 1
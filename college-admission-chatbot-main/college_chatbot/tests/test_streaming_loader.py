@@ -0,0 +1,64 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from chatbot.streaming_loader import batched, iter_json_array, iter_jsonl, iter_records
+
+RECORDS = [
+    {'question': "What are the tuition fees?", 'answer': "$10,000 per year, or \"about\" €9,000.", 'rank': 4.5e3},
+    {'question': "Is there housing?", 'answer': "Yes [first year], {see below}.", 'tags': [1, 2, [3]]},
+    {'question': "Deadline?", 'answer': None, 'rank': 15},
+]
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 64, 1 << 16])
+def test_array_items_span_chunk_boundaries(tmp_path, chunk_size):
+    path = tmp_path / 'faqs.json'
+    path.write_text(json.dumps(RECORDS, indent=2, ensure_ascii=False), encoding='utf-8')
+    
+    assert list(iter_json_array(path, chunk_size=chunk_size)) == RECORDS
+
+@pytest.mark.parametrize('chunk_size', [1, 5, 1 << 16])
+def test_keyed_array_skips_other_sections(tmp_path, chunk_size):
+    path = tmp_path / 'programs.json'
+    data = {'meta': {'note': "not [the] array", 'items': [9, 9]}, 'graduate': RECORDS[:1], 'programs': RECORDS,
+            'after': [0]}
+    path.write_text(json.dumps(data), encoding='utf-8')
+    
+    assert list(iter_json_array(path, 'programs', chunk_size=chunk_size)) == RECORDS
+    assert list(iter_json_array(path, 'missing', chunk_size=chunk_size)) == []
+
+def test_numbers_are_not_cut_at_a_chunk_boundary(tmp_path):
+    path = tmp_path / 'numbers.json'
+    path.write_text('[12345, 4.5e3,-7]', encoding='utf-8')
+    
+    assert list(iter_json_array(path, chunk_size=2)) == [12345, 4.5e3, -7]
+
+def test_truncated_array_raises(tmp_path):
+    path = tmp_path / 'faqs.json'
+    path.write_text(json.dumps(RECORDS)[:-20], encoding='utf-8')
+    
+    with pytest.raises(ValueError):
+        list(iter_json_array(path, chunk_size=8))
+
+def test_jsonl_skips_blank_and_invalid_lines(tmp_path):
+    path = tmp_path / 'faqs.jsonl'
+    lines = [json.dumps(RECORDS[0]), '', '{"question": broken', json.dumps(RECORDS[1])]
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    
+    assert list(iter_jsonl(path)) == RECORDS[:2]
+    assert list(iter_records(path, 'ignored')) == RECORDS[:2]
+
+def test_records_are_read_lazily_in_batches(tmp_path):
+    path = tmp_path / 'faqs.json'
+    path.write_text(json.dumps({'faqs': RECORDS}), encoding='utf-8')
+    
+    records = iter_records(path, 'faqs')
+    
+    assert next(records) == RECORDS[0]
+    assert list(batched(records, 1)) == [[RECORDS[1]], [RECORDS[2]]]
+    assert list(batched(RECORDS, 2)) == [RECORDS[:2], RECORDS[2:]]
+    assert list(batched([], 2)) == []
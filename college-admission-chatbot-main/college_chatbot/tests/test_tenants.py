@@ -0,0 +1,138 @@
+import json
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config import Config
+from chatbot.query_cache import QueryCache
+from chatbot.tenants import TenantManager
+
+MB = 1024 * 1024
+
+class _FakeKnowledgeBase:
+    """Stands in for a loaded knowledge base with a fixed memory estimate"""
+    
+    def __init__(self, tenant_id, size_mb):
+        self.tenant_id = tenant_id
+        self.size = int(size_mb * MB)
+        self.version = tenant_id
+        self.query_cache = QueryCache()
+        self.watching = True
+    
+    def get_memory_usage(self):
+        return {'total': self.size}
+    
+    def stop_watching(self):
+        self.watching = False
+
+@pytest.fixture
+def tenants_dir(tmp_path):
+    tenants_dir = tmp_path / 'tenants'
+    for tenant_id in ('north', 'south', 'east'):
+        data_dir = tenants_dir / tenant_id
+        data_dir.mkdir(parents=True)
+        faqs = [{'category': 'fees', 'question': f"What does {tenant_id} college cost?", 'answer': "Not much."}]
+        (data_dir / 'faqs.json').write_text(json.dumps({'faqs': faqs}), encoding='utf-8')
+    return tenants_dir
+
+def _manager(tenants_dir, tmp_path, budget_mb, sizes=None):
+    manager = TenantManager(str(tenants_dir), memory_budget_mb=budget_mb, store_dir=str(tmp_path / 'stores'))
+    if sizes is not None:
+        manager._load = lambda tenant_id, data_dir: _FakeKnowledgeBase(tenant_id, sizes[tenant_id])
+    return manager
+
+def test_least_recently_used_tenant_is_evicted(tenants_dir, tmp_path):
+    manager = _manager(tenants_dir, tmp_path, budget_mb=10, sizes={'north': 4, 'south': 4, 'east': 4})
+    
+    north = manager.get('north')
+    manager.get('south')
+    assert manager.get('north') is north
+    manager.get('east')
+    
+    stats = manager.get_stats()
+    assert stats['loaded'] == ['north', 'east']
+    assert (stats['loads'], stats['hits'], stats['evictions']) == (3, 1, 1)
+    assert stats['total_memory_bytes'] <= stats['memory_budget_bytes']
+    assert north.watching
+
+def test_tenant_over_the_budget_alone_stays_loaded(tenants_dir, tmp_path):
+    manager = _manager(tenants_dir, tmp_path, budget_mb=2, sizes={'north': 1, 'south': 5, 'east': 1})
+    
+    north = manager.get('north')
+    south = manager.get('south')
+    
+    assert manager.get_stats()['loaded'] == ['south']
+    assert not north.watching and south.watching
+    assert manager.evict('south') and not manager.evict('south')
+
+def test_concurrent_requests_share_one_load(tenants_dir, tmp_path):
+    manager = _manager(tenants_dir, tmp_path, budget_mb=10)
+    started, release = threading.Event(), threading.Event()
+    loads = []
+    
+    def slow_load(tenant_id, data_dir):
+        loads.append(tenant_id)
+        started.set()
+        release.wait(5)
+        return _FakeKnowledgeBase(tenant_id, 1)
+    
+    manager._load = slow_load
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        first = executor.submit(manager.get, 'north')
+        started.wait(5)
+        waiting = [executor.submit(manager.get, 'north') for _ in range(3)]
+        # Other tenants are not held up by the load in progress
+        manager._load = lambda tenant_id, data_dir: _FakeKnowledgeBase(tenant_id, 1)
+        assert manager.get('south').tenant_id == 'south'
+        release.set()
+        results = [future.result(5) for future in [first] + waiting]
+    
+    assert loads == ['north']
+    assert all(result is results[0] for result in results)
+
+def test_failed_load_reaches_waiters_and_is_retried(tenants_dir, tmp_path):
+    manager = _manager(tenants_dir, tmp_path, budget_mb=10)
+    started, release = threading.Event(), threading.Event()
+    
+    def failing_load(tenant_id, data_dir):
+        started.set()
+        release.wait(5)
+        raise OSError("data directory unavailable")
+    
+    manager._load = failing_load
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        first = executor.submit(manager.get, 'north')
+        started.wait(5)
+        waiter = executor.submit(manager.get, 'north')
+        release.set()
+        for future in (first, waiter):
+            with pytest.raises(OSError):
+                future.result(5)
+    
+    manager._load = lambda tenant_id, data_dir: _FakeKnowledgeBase(tenant_id, 1)
+    assert manager.get('north').tenant_id == 'north'
+
+def test_unknown_tenants_raise_key_error(tenants_dir, tmp_path):
+    manager = _manager(tenants_dir, tmp_path, budget_mb=10)
+    
+    for tenant_id in ('west', '../tenants/north', ''):
+        with pytest.raises(KeyError):
+            manager.get(tenant_id)
+    with pytest.raises(ValueError):
+        manager.register('../north', str(tenants_dir / 'north'))
+    assert manager.tenant_ids() == ['east', 'north', 'south']
+
+def test_tenants_load_their_own_data(tenants_dir, tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'EMBEDDING_BACKEND', 'hashing')
+    monkeypatch.setattr(Config, 'EMBEDDING_CACHE_DIR', tmp_path / 'embeddings')
+    manager = _manager(tenants_dir, tmp_path, budget_mb=512)
+    
+    north, south = manager.get('north'), manager.get('south')
+    
+    assert north.get_all_faqs()[0]['question'] == "What does north college cost?"
+    assert south.get_all_faqs()[0]['question'] == "What does south college cost?"